@@ -0,0 +1,87 @@
+"""Benchmark the vocabulary TF-IDF featurizer against the hashing backend.
+
+For each backend this trains the tfidf + logistic-regression pipeline on the
+standard split and reports:
+- test accuracy / F1
+- serialized artifact size (joblib)
+- artifact load time
+- transform throughput (messages/sec)
+
+Usage: python scripts/bench_featurizers.py [--hash-bits 18] [--repeat 20] [--json out.json]
+"""
+import argparse
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import joblib  # noqa: E402
+from sklearn.linear_model import LogisticRegression  # noqa: E402
+from sklearn.metrics import accuracy_score, f1_score  # noqa: E402
+from sklearn.pipeline import Pipeline  # noqa: E402
+
+from src.spam_classifier.data import SpamDataset  # noqa: E402
+from src.spam_classifier.features import BACKENDS, build_vectorizer  # noqa: E402
+
+
+def bench_backend(backend, train_df, test_df, hash_bits, repeat):
+    pipe = Pipeline([
+        ("tfidf", build_vectorizer(backend, max_features=10000, ngram_range=(1, 2),
+                                   min_df=1, max_df=1.0, n_bits=hash_bits)),
+        ("clf", LogisticRegression(class_weight="balanced", solver="liblinear", random_state=42)),
+    ])
+    pipe.fit(train_df["text"].tolist(), train_df["label"].tolist())
+    y_pred = pipe.predict(test_df["text"].tolist())
+
+    buf = io.BytesIO()
+    joblib.dump(pipe, buf)
+    size = buf.tell()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        buf.seek(0)
+        joblib.load(buf)
+    load_ms = (time.perf_counter() - start) / repeat * 1000
+
+    texts = test_df["text"].tolist() * repeat
+    vectorizer = pipe.named_steps["tfidf"]
+    start = time.perf_counter()
+    vectorizer.transform(texts)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "accuracy": accuracy_score(test_df["label"], y_pred),
+        "f1": f1_score(test_df["label"], y_pred),
+        "artifact_bytes": size,
+        "load_ms": load_ms,
+        "transform_msgs_per_sec": len(texts) / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", type=Path, default=None)
+    parser.add_argument("--hash-bits", type=int, default=18)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", type=Path, default=None, help="Also write results to this file")
+    args = parser.parse_args()
+
+    train_df, _, test_df = SpamDataset(args.data_dir).load_split()
+    rows = [bench_backend(b, train_df, test_df, args.hash_bits, args.repeat) for b in BACKENDS]
+
+    print(f"{'backend':<8} {'acc':>6} {'f1':>6} {'size_kb':>9} {'load_ms':>8} {'msgs/s':>10}")
+    for r in rows:
+        print(f"{r['backend']:<8} {r['accuracy']:>6.3f} {r['f1']:>6.3f} "
+              f"{r['artifact_bytes'] / 1024:>9.1f} {r['load_ms']:>8.2f} "
+              f"{r['transform_msgs_per_sec']:>10.0f}")
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
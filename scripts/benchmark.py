@@ -0,0 +1,262 @@
+"""Benchmark the load, featurize, train and score hot paths.
+
+For each corpus size a synthetic corpus is generated from the SMS dataset
+(same class balance, messages re-mixed from each class's own tokens so they
+are not exact duplicates) and the following are timed:
+- ``SpamDataset.load_split``, cold (CSV parse) and from the dataset cache
+- ``TextFeaturizer.fit_transform`` / ``transform``
+- ``SpamClassifier.fit`` / ``evaluate``
+- ``load_pipeline`` for the joblib pickle and the ``.spm`` artifact
+- ``predict_texts`` at batch sizes 1 .. 100k (p50/p99 latency, msgs/sec)
+
+Each size runs in a fresh process, so ``peak_rss_mb`` (the process peak
+after each stage) is not inflated by earlier sizes. Results are written as
+JSON and compared against a stored baseline; time metrics that grew (or
+throughput that shrank) by more than ``--tolerance`` are flagged.
+
+Usage: python scripts/benchmark.py [--sizes 10000 100000] [--output latest.json]
+       [--baseline results/benchmarks/baseline.json] [--update-baseline]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import joblib  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import sklearn  # noqa: E402
+from sklearn.pipeline import Pipeline  # noqa: E402
+
+RESULTS_DIR = ROOT / "results" / "benchmarks"
+BASELINE_PATH = RESULTS_DIR / "baseline.json"
+DEFAULT_SIZES = (10_000,)
+BATCH_SIZES = (1, 10, 100, 1_000, 10_000, 100_000)
+# Compared against the baseline: lower is better for times, higher for
+# rates. Memory and call counts are reported but not compared.
+TIME_METRICS = ("seconds", "p50_ms", "p99_ms")
+RATE_METRICS = ("msgs_per_sec",)
+
+
+def synthesize_corpus(source, n, seed=0, replace_rate=0.2):
+    """Return ``n`` synthetic (label, text) rows modelled on ``source``.
+
+    Each row copies a random source message of a class drawn with the
+    source's class balance and replaces about ``replace_rate`` of its tokens
+    with tokens sampled from that class's unigram distribution.
+    """
+    rng = np.random.default_rng(seed)
+    labels = source["label"].to_numpy()
+    tokens = [t.split() for t in source["text"].astype(str)]
+    out_labels = rng.choice(labels, size=n)
+    texts = [None] * n
+    for label in (0, 1):
+        idx = np.flatnonzero(labels == label)
+        vocab = [tok for i in idx for tok in tokens[i]]
+        rows = np.flatnonzero(out_labels == label)
+        picks = rng.choice(idx, size=len(rows))
+        for row, pick in zip(rows, picks):
+            words = list(tokens[pick]) or [vocab[rng.integers(len(vocab))]]
+            swap = np.flatnonzero(rng.random(len(words)) < replace_rate)
+            for k, j in zip(swap, rng.integers(len(vocab), size=len(swap))):
+                words[k] = vocab[j]
+            texts[row] = " ".join(words)
+    return pd.DataFrame({"label": np.where(out_labels == 1, "spam", "ham"), "text": texts})
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def timed(fn, repeat=1):
+    """Run ``fn`` ``repeat`` times; return (last result, stats dict)."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        durations.append(time.perf_counter() - start)
+    return result, {"seconds": float(np.median(durations)), "peak_rss_mb": _peak_rss_mb()}
+
+
+def latency(fn, batch, calls):
+    """Per-call p50/p99 latency and throughput of ``fn(batch)``."""
+    fn(batch)  # warm up (fast-path scorer construction, page cache)
+    durations = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter()
+        fn(batch)
+        durations[i] = time.perf_counter() - start
+    p50 = float(np.percentile(durations, 50))
+    return {
+        "calls": calls,
+        "p50_ms": p50 * 1000,
+        "p99_ms": float(np.percentile(durations, 99)) * 1000,
+        "msgs_per_sec": len(batch) / p50 if p50 > 0 else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run_size(n, source_dir, seed=0):
+    """Benchmark every stage on an ``n``-message corpus (run in a child process)."""
+    from src.spam_classifier.artifact import export_pipeline
+    from src.spam_classifier.data import SpamDataset
+    from src.spam_classifier.features import TextFeaturizer
+    from src.spam_classifier.model import SpamClassifier
+    from src.spam_classifier.pipeline import get_registry, load_pipeline, predict_texts
+
+    source = SpamDataset(source_dir, use_cache=False).preprocess(
+        SpamDataset(source_dir, use_cache=False).load_raw()
+    )
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="spam-bench-") as tmp:
+        tmp = Path(tmp)
+        (tmp / "raw").mkdir()
+        corpus = synthesize_corpus(source, n, seed=seed)
+        corpus.to_csv(tmp / "raw" / "sms_spam_no_header.csv", header=False, index=False)
+        del corpus
+
+        _, results["load_split_cold"] = timed(
+            lambda: SpamDataset(tmp, use_cache=False).load_split())
+        SpamDataset(tmp).load_split()  # populate the cache
+        (train_df, _, test_df), results["load_split_cached"] = timed(
+            lambda: SpamDataset(tmp).load_split(), repeat=3)
+
+        featurizer = TextFeaturizer(max_features=10000, ngram_range=(1, 2))
+        X_train, results["featurize_fit_transform"] = timed(
+            lambda: featurizer.fit_transform(train_df["text"]))
+        X_test, results["featurize_transform"] = timed(
+            lambda: featurizer.transform(test_df["text"]))
+        for key, rows in (("featurize_fit_transform", len(train_df)),
+                          ("featurize_transform", len(test_df))):
+            results[key]["msgs_per_sec"] = rows / results[key]["seconds"]
+
+        classifier = SpamClassifier()
+        _, results["classifier_fit"] = timed(lambda: classifier.fit(X_train, train_df["label"]))
+        _, results["classifier_evaluate"] = timed(
+            lambda: classifier.evaluate(X_test, test_df["label"]), repeat=3)
+
+        pipe = Pipeline([("tfidf", featurizer.vectorizer), ("clf", classifier.model)])
+        joblib.dump(pipe, tmp / "pipeline.joblib")
+        export_pipeline(pipe, tmp / "pipeline.spm")
+        _, results["load_pipeline_joblib"] = timed(
+            lambda: load_pipeline(tmp / "pipeline.joblib"), repeat=5)
+        _, results["load_pipeline_artifact"] = timed(
+            lambda: load_pipeline(tmp / "pipeline.spm"), repeat=5)
+
+        get_registry().swap(load_pipeline(tmp / "pipeline.spm"))
+        texts = test_df["text"].tolist()
+        for batch_size in BATCH_SIZES:
+            batch = (texts * (batch_size // max(len(texts), 1) + 1))[:batch_size]
+            # Aim for ~50k messages per batch size, between 5 and 1000 calls.
+            calls = int(min(1000, max(5, 50_000 // batch_size)))
+            results[f"predict_texts_b{batch_size}"] = latency(predict_texts, batch, calls)
+    return results
+
+
+def flatten(report):
+    """``{"size/stage/metric": value}`` for the comparable metrics of a report."""
+    flat = {}
+    for size, stages in report["results"].items():
+        for stage, metrics in stages.items():
+            for metric, value in metrics.items():
+                if metric in TIME_METRICS or metric in RATE_METRICS:
+                    flat[f"{size}/{stage}/{metric}"] = value
+    return flat
+
+
+def compare(report, baseline, tolerance=0.2):
+    """Rows of (key, baseline, current, ratio, regressed) for shared metrics.
+
+    ``ratio`` is current / baseline for times and baseline / current for
+    rates, so above 1 always means slower.
+    """
+    current, base = flatten(report), flatten(baseline)
+    rows = []
+    for key in sorted(set(current) & set(base)):
+        new, old = current[key], base[key]
+        if key.endswith(RATE_METRICS):
+            ratio = old / new if new else float("inf")
+        else:
+            ratio = new / old if old else float("inf")
+        rows.append((key, old, new, ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data-dir", type=Path, default=None,
+                        help="Dataset dir with raw/sms_spam_no_header.csv (default: data/)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES),
+                        help="Synthetic corpus sizes, e.g. 10000 100000 1000000 10000000")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "latest.json")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Flag metrics more than this fraction slower than the baseline")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Also store this run as the new baseline")
+    parser.add_argument("--fail-on-regression", action="store_true",
+                        help="Exit with status 1 if any metric regressed")
+    args = parser.parse_args()
+
+    source_dir = args.data_dir or ROOT / "data"
+    report = {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "sklearn": sklearn.__version__,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+    for n in args.sizes:
+        print(f"Benchmarking {n} messages...", flush=True)
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            report["results"][str(n)] = pool.submit(run_size, n, source_dir, args.seed).result()
+
+    print(f"\n{'size/stage':<40} {'seconds':>9} {'p50_ms':>9} {'p99_ms':>9} "
+          f"{'msgs/s':>11} {'rss_mb':>8}")
+    for size, stages in report["results"].items():
+        for stage, m in stages.items():
+            cells = [f"{m[k]:>9.4f}" if k in m else f"{'':>9}"
+                     for k in ("seconds", "p50_ms", "p99_ms")]
+            rate = f"{m['msgs_per_sec']:>11.0f}" if "msgs_per_sec" in m else f"{'':>11}"
+            print(f"{size + '/' + stage:<40} {' '.join(cells)} {rate} {m['peak_rss_mb']:>8.1f}")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults saved to {args.output}")
+
+    regressed = []
+    if args.baseline.exists() and args.baseline.resolve() != args.output.resolve():
+        rows = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+        regressed = [row for row in rows if row[4]]
+        print(f"Compared {len(rows)} metrics with {args.baseline}: {len(regressed)} regressed "
+              f"(tolerance {args.tolerance:.0%})")
+        for key, old, new, ratio, _ in regressed:
+            print(f"  REGRESSION {key}: {old:.4g} -> {new:.4g} ({ratio:.2f}x slower)")
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"Baseline updated: {args.baseline}")
+    if regressed and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,18 @@
 
 This package re-exports the implementation under `src/spam_classifier` so tests
 and older imports that use `spam_classifier` work without modifying PYTHONPATH.
+Submodules are imported on first access, keeping `import spam_classifier` cheap.
 """
-
-from . import data, features, model  # noqa: F401
+import importlib
 
 __all__ = ["data", "features", "model"]
+
+
+def __getattr__(name):
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return importlib.import_module(f".{name}", __name__)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
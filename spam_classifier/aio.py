@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.aio` pointing to `src.spam_classifier.aio`."""
+from src.spam_classifier.aio import *  # noqa: F401,F403
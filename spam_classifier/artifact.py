@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.artifact` pointing to `src.spam_classifier.artifact`."""
+from src.spam_classifier.artifact import *  # noqa: F401,F403
@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.batch` pointing to `src.spam_classifier.batch`."""
+from src.spam_classifier.batch import *  # noqa: F401,F403
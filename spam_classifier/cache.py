@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.cache` pointing to `src.spam_classifier.cache`."""
+from src.spam_classifier.cache import *  # noqa: F401,F403
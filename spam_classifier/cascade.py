@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.cascade` pointing to `src.spam_classifier.cascade`."""
+from src.spam_classifier.cascade import *  # noqa: F401,F403
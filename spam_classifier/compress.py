@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.compress` pointing to `src.spam_classifier.compress`."""
+from src.spam_classifier.compress import *  # noqa: F401,F403
@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.evaluation` pointing to `src.spam_classifier.evaluation`."""
+from src.spam_classifier.evaluation import *  # noqa: F401,F403
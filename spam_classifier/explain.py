@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.explain` pointing to `src.spam_classifier.explain`."""
+from src.spam_classifier.explain import *  # noqa: F401,F403
@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.fastpath` pointing to `src.spam_classifier.fastpath`."""
+from src.spam_classifier.fastpath import *  # noqa: F401,F403
@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.feature_cache` pointing to `src.spam_classifier.feature_cache`."""
+from src.spam_classifier.feature_cache import *  # noqa: F401,F403
@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.instrumentation` pointing to `src.spam_classifier.instrumentation`."""
+from src.spam_classifier.instrumentation import *  # noqa: F401,F403
@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.online` pointing to `src.spam_classifier.online`."""
+from src.spam_classifier.online import *  # noqa: F401,F403
@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.parallel` pointing to `src.spam_classifier.parallel`."""
+from src.spam_classifier.parallel import *  # noqa: F401,F403
@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.pipeline` pointing to `src.spam_classifier.pipeline`."""
+from src.spam_classifier.pipeline import *  # noqa: F401,F403
@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.registry` pointing to `src.spam_classifier.registry`."""
+from src.spam_classifier.registry import *  # noqa: F401,F403
@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.server` pointing to `src.spam_classifier.server`."""
+from src.spam_classifier.server import *  # noqa: F401,F403
@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.shadow` pointing to `src.spam_classifier.shadow`."""
+from src.spam_classifier.shadow import *  # noqa: F401,F403
@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.streaming` pointing to `src.spam_classifier.streaming`."""
+from src.spam_classifier.streaming import *  # noqa: F401,F403
@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.sweep` pointing to `src.spam_classifier.sweep`."""
+from src.spam_classifier.sweep import *  # noqa: F401,F403
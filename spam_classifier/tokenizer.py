@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.tokenizer` pointing to `src.spam_classifier.tokenizer`."""
+from src.spam_classifier.tokenizer import *  # noqa: F401,F403
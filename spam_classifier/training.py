@@ -0,0 +1,2 @@
+"""Compatibility wrapper for `spam_classifier.training` pointing to `src.spam_classifier.training`."""
+from src.spam_classifier.training import *  # noqa: F401,F403
@@ -1,6 +1,29 @@
-"""Package initialization."""
-from .data import SpamDataset
-from .features import TextFeaturizer
-from .model import SpamClassifier
+"""Package initialization.
 
-__version__ = "0.1.0"
\ No newline at end of file
+``SpamDataset``, ``TextFeaturizer`` and ``SpamClassifier`` are imported on
+first access (PEP 562), so ``import spam_classifier`` does not pull in
+pandas or scikit-learn.
+"""
+import importlib
+
+__version__ = "0.1.0"
+
+_LAZY_ATTRS = {
+    "SpamDataset": ".data",
+    "TextFeaturizer": ".features",
+    "SpamClassifier": ".model",
+}
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
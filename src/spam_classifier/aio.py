@@ -0,0 +1,164 @@
+"""Asyncio scoring API with shared batches, bounded concurrency and backpressure.
+
+``predict_texts`` is CPU-bound and would block an event loop for the whole
+batch. ``AsyncScorer.score`` instead queues the texts, merges concurrent
+callers into shared batches and runs inference on an executor, so the loop
+keeps serving other coroutines.
+"""
+import asyncio
+import time
+
+import numpy as np
+
+from .pipeline import score_texts
+
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT_MS = 5.0
+DEFAULT_MAX_QUEUE = 1024
+DEFAULT_MAX_IN_FLIGHT = 2
+
+
+class AsyncScorer:
+    """Score texts from coroutines without stalling the event loop.
+
+    - Callers' texts are merged into batches of up to ``max_batch_size``
+      messages, waiting at most ``max_wait_ms`` to fill one. A request that
+      would overflow a batch starts the next one; a request of more than
+      ``max_batch_size`` messages is queued as slices of at most that size
+      whose results are merged.
+    - At most ``max_in_flight`` batches run on ``executor`` at once (None
+      uses the loop's default thread pool).
+    - At most ``max_queue`` requests (or slices) wait in the queue; beyond that
+      ``score`` waits for room (backpressure) and ``score_nowait`` raises
+      ``asyncio.QueueFull`` so callers can shed load instead.
+    """
+
+    def __init__(self, score_fn=None, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS, max_queue=DEFAULT_MAX_QUEUE,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT, executor=None):
+        self.score_fn = score_fn or score_texts
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue = max_queue
+        self.max_in_flight = max_in_flight
+        self.executor = executor
+        self._queue = None
+        # A request that did not fit into the previous batch (runner only).
+        self._carry = None
+        self._semaphore = None
+        self._runner = None
+        self._tasks = set()
+
+    async def __aenter__(self):
+        self._ensure_started()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _ensure_started(self):
+        # Created lazily so they bind to the running loop.
+        if self._runner is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._runner = asyncio.get_running_loop().create_task(self._run())
+
+    def _items(self, texts):
+        """Queue items ``(texts, future)`` of at most ``max_batch_size`` texts each."""
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        texts, cap = list(texts), self.max_batch_size
+        if len(texts) <= cap:
+            return [(texts, loop.create_future())]
+        return [(texts[i:i + cap], loop.create_future()) for i in range(0, len(texts), cap)]
+
+    async def score(self, texts):
+        """Score ``texts`` and return a ``ScoreResult``; waits if the queue is full."""
+        items = self._items(texts)
+        for item in items:
+            await self._queue.put(item)
+        return await _merge([future for _, future in items])
+
+    async def score_nowait(self, texts):
+        """Like ``score`` but raise ``asyncio.QueueFull`` instead of waiting."""
+        items = self._items(texts)
+        # All slices or none, so a rejected request leaves nothing queued.
+        if self._queue.maxsize and self._queue.maxsize - self._queue.qsize() < len(items):
+            raise asyncio.QueueFull
+        for item in items:
+            self._queue.put_nowait(item)
+        return await _merge([future for _, future in items])
+
+    async def close(self):
+        """Finish queued and in-flight batches, then stop the batching task."""
+        if self._runner is None:
+            return
+        await self._queue.join()
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._runner = None
+
+    async def _collect(self):
+        first, self._carry = self._carry, None
+        if first is None:
+            first = await self._queue.get()
+        batch, size = [first], len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if size + len(item[0]) > self.max_batch_size:
+                self._carry = item
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Blocks here while max_in_flight batches are running; the queue
+            # then fills up and pushes back on callers.
+            await self._semaphore.acquire()
+            task = asyncio.get_running_loop().create_task(self._execute(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, batch):
+        loop = asyncio.get_running_loop()
+        texts = [t for item_texts, _ in batch for t in item_texts]
+        try:
+            result = await loop.run_in_executor(self.executor, self.score_fn, texts)
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+        else:
+            start = 0
+            for item_texts, future in batch:
+                stop = start + len(item_texts)
+                if not future.done():
+                    future.set_result(type(result)(*(col[start:stop] for col in result)))
+                start = stop
+        finally:
+            self._semaphore.release()
+            for _ in batch:
+                self._queue.task_done()
+
+
+async def _merge(futures):
+    """The ``ScoreResult`` slices of ``futures`` concatenated in order."""
+    if len(futures) == 1:
+        return await futures[0]
+    results = await asyncio.gather(*futures)
+    return type(results[0])(*(np.concatenate(cols) for cols in zip(*results)))
@@ -0,0 +1,419 @@
+"""Compact, memory-mappable model artifact for the tfidf + linear pipeline.
+
+Layout of a ``.spm`` file (all integers and floats little-endian)::
+
+    magic (8 bytes) | format version <u4 | header length <u4 | JSON header
+    ... sections, each aligned to 64 bytes ...
+
+The JSON header records the vectorizer parameters, the class labels and the
+offset/dtype/shape of every section. Sections:
+
+- ``vocab_offsets`` (<u8, n_terms + 1) and ``vocab_bytes`` (u1): the
+  vocabulary as a sorted UTF-8 string table; column ``j`` is term ``j``.
+- ``vocab_slots`` (<i4): open-addressing hash index (crc32, linear probing)
+  from term to column, so lookups never need a Python dict.
+- ``idf``, ``coef`` (n_features) and ``intercept`` (<f8, 1). ``idf`` and
+  ``coef`` are <f8 by default, or <f4, or i1 codes with a ``<name>_scale``
+  section (<f8, 2: scale, offset) so that ``value = offset + scale * code``.
+  Files with i1 sections are written as format version 2.
+
+Loading maps the file read-only and exposes every section as a zero-copy
+view, so processes serving the same artifact share one page-cache copy.
+"""
+import json
+import mmap
+import sys
+import zlib
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import normalize
+
+from .features import HashingTfidfVectorizer
+from .model import sigmoid
+from .tokenizer import tokenizer_for
+
+MAGIC = b"SPAMMDL\x00"
+FORMAT_VERSION = 1
+# Version 2 adds int8-quantized sections, which version-1 readers would misread.
+QUANTIZED_FORMAT_VERSION = 2
+EXPORT_DTYPES = ("float64", "float32", "int8")
+ALIGN = 64
+EMPTY_SLOT = -1
+
+# TfidfVectorizer parameters needed to rebuild the analyzer and weighting.
+TFIDF_PARAMS = (
+    "lowercase", "strip_accents", "token_pattern", "stop_words", "ngram_range",
+    "analyzer", "binary", "norm", "use_idf", "sublinear_tf",
+)
+HASHING_PARAMS = ("n_bits", "ngram_range", "lowercase", "norm", "sublinear_tf")
+
+
+def _term_hash(term_bytes):
+    return zlib.crc32(term_bytes)
+
+
+def _build_slots(terms_bytes):
+    size = 1
+    while size < 2 * max(len(terms_bytes), 1):
+        size *= 2
+    mask = size - 1
+    slots = np.full(size, EMPTY_SLOT, dtype="<i4")
+    for j, term in enumerate(terms_bytes):
+        h = _term_hash(term) & mask
+        while slots[h] != EMPTY_SLOT:
+            h = (h + 1) & mask
+        slots[h] = j
+    return slots
+
+
+def _quantize(arr, dtype):
+    """``{name suffix: array}`` storing ``arr`` as ``dtype`` (see the module docstring)."""
+    if dtype == "float64":
+        return {"": np.asarray(arr, dtype="<f8")}
+    if dtype == "float32":
+        return {"": np.asarray(arr, dtype="<f4")}
+    if dtype != "int8":
+        raise ValueError(f"dtype must be one of {EXPORT_DTYPES}, not {dtype!r}")
+    arr = np.asarray(arr, dtype=np.float64)
+    lo, hi = (float(arr.min()), float(arr.max())) if arr.size else (0.0, 0.0)
+    scale = (hi - lo) / 254 or 1.0
+    offset = (hi + lo) / 2
+    codes = np.clip(np.rint((arr - offset) / scale), -127, 127).astype("i1")
+    return {"": codes, "_scale": np.array([scale, offset], dtype="<f8")}
+
+
+def _vectorizer_section(vectorizer):
+    """Return (kind, params, arrays, column order) for a fitted vectorizer."""
+    if isinstance(vectorizer, HashingTfidfVectorizer):
+        params = {k: getattr(vectorizer, k) for k in HASHING_PARAMS}
+        return "hashing", params, {"idf": np.asarray(vectorizer.idf_)}, None
+    if isinstance(vectorizer, TfidfVectorizer):
+        if vectorizer.preprocessor is not None or vectorizer.tokenizer is not None:
+            raise ValueError("Custom preprocessor/tokenizer callables cannot be exported")
+        if callable(vectorizer.analyzer):
+            raise ValueError("A callable analyzer cannot be exported")
+        params = {k: getattr(vectorizer, k) for k in TFIDF_PARAMS}
+        if isinstance(params["stop_words"], (set, frozenset, tuple)):
+            params["stop_words"] = sorted(params["stop_words"])
+        vocab = vectorizer.vocabulary_
+        terms = sorted(vocab, key=lambda t: t.encode("utf-8"))
+        order = np.array([vocab[t] for t in terms], dtype=np.int64)
+        encoded = [t.encode("utf-8") for t in terms]
+        offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+        arrays = {
+            "vocab_offsets": offsets,
+            "vocab_bytes": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            "vocab_slots": _build_slots(encoded),
+        }
+        if vectorizer.use_idf:
+            arrays["idf"] = np.asarray(vectorizer.idf_)[order]
+        return "tfidf", params, arrays, order
+    raise ValueError(f"Cannot export vectorizer of type {type(vectorizer).__name__}")
+
+
+def export_pipeline(pipe, path, dtype="float64"):
+    """Write a fitted ``tfidf`` + binary linear ``clf`` pipeline to ``path``.
+
+    ``dtype`` ("float64", "float32" or "int8") is the storage type of the
+    ``idf`` and ``coef`` sections.
+    """
+    vectorizer, clf = pipe.named_steps["tfidf"], pipe.named_steps["clf"]
+    if not (isinstance(clf, LogisticRegression) or getattr(clf, "loss", None) == "log_loss"):
+        raise ValueError("Only logistic (log-loss) linear classifiers can be exported")
+    kind, params, arrays, order = _vectorizer_section(vectorizer)
+    coef = np.asarray(clf.coef_, dtype="<f8")
+    if coef.shape[0] != 1:
+        raise ValueError("Only binary linear classifiers can be exported")
+    coef = coef[0] if order is None else coef[0][order]
+    arrays["coef"] = coef
+    for name in ("idf", "coef"):
+        if name in arrays:
+            for suffix, arr in _quantize(arrays.pop(name), dtype).items():
+                arrays[name + suffix] = arr
+    arrays["intercept"] = np.asarray(clf.intercept_, dtype="<f8").reshape(1)
+    version = QUANTIZED_FORMAT_VERSION if dtype == "int8" else FORMAT_VERSION
+
+    sections, blobs, pos = {}, [], 0
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr, dtype=arr.dtype.newbyteorder("<"))
+        pad = (-pos) % ALIGN
+        blobs.append(b"\x00" * pad)
+        pos += pad
+        sections[name] = {"offset": pos, "dtype": arr.dtype.str, "shape": list(arr.shape)}
+        blobs.append(arr.tobytes())
+        pos += arr.nbytes
+
+    header = {
+        "kind": kind,
+        "params": params,
+        "classes": [c.item() for c in np.asarray(clf.classes_)],
+        "dtype": dtype,
+        "sections": sections,
+    }
+    header_bytes = json.dumps(header).encode("utf-8")
+    prefix_len = len(MAGIC) + 8 + len(header_bytes)
+    data_start = prefix_len + (-prefix_len) % ALIGN
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.array([version, len(header_bytes)], dtype="<u4").tobytes())
+        f.write(header_bytes)
+        f.write(b"\x00" * (data_start - prefix_len))
+        for blob in blobs:
+            f.write(blob)
+
+
+class CompactModel:
+    """Read-only view over a mapped ``.spm`` file."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{self.path} is not a compact model artifact")
+        version, header_len = np.frombuffer(self._mm, dtype="<u4", count=2, offset=len(MAGIC))
+        if version not in (FORMAT_VERSION, QUANTIZED_FORMAT_VERSION):
+            raise ValueError(f"Unsupported artifact format version {version}")
+        start = len(MAGIC) + 8
+        self.header = json.loads(self._mm[start:start + int(header_len)].decode("utf-8"))
+        prefix_len = start + int(header_len)
+        self._data_start = prefix_len + (-prefix_len) % ALIGN
+        self.kind = self.header["kind"]
+        self.params = self.header["params"]
+        self.params["ngram_range"] = tuple(self.params["ngram_range"])
+
+    def __reduce__(self):
+        # Unpickling maps the file afresh (e.g. in a worker process).
+        return (type(self), (str(self.path),))
+
+    def array(self, name):
+        """Zero-copy numpy view of a section, or None if it is absent."""
+        spec = self.header["sections"].get(name)
+        if spec is None:
+            return None
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        arr = np.frombuffer(self._mm, dtype=dtype, count=count,
+                            offset=self._data_start + spec["offset"])
+        return arr.reshape(spec["shape"])
+
+    def values(self, name):
+        """Section ``name`` as floats: a zero-copy view, or decoded int8 codes."""
+        arr = self.array(name)
+        scale = self.array(name + "_scale")
+        if arr is None or scale is None:
+            return arr
+        return scale[1] + scale[0] * arr.astype(np.float64)
+
+    def raw(self, name):
+        """Memoryview of a section's bytes (no copy)."""
+        spec = self.header["sections"][name]
+        dtype = np.dtype(spec["dtype"])
+        start = self._data_start + spec["offset"]
+        return memoryview(self._mm)[start:start + int(np.prod(spec["shape"])) * dtype.itemsize]
+
+
+class StringTable:
+    """Sorted UTF-8 string table with an O(1) hash index, backed by the map."""
+
+    def __init__(self, model):
+        self._bytes = model.raw("vocab_bytes")
+        if sys.byteorder == "little":
+            self._offsets = model.raw("vocab_offsets").cast("Q")
+            self._slots = model.raw("vocab_slots").cast("i")
+        else:
+            self._offsets = model.array("vocab_offsets").tolist()
+            self._slots = model.array("vocab_slots").tolist()
+        self._mask = len(self._slots) - 1
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, j):
+        return bytes(self._bytes[self._offsets[j]:self._offsets[j + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        return (self[j] for j in range(len(self)))
+
+    def index(self, term):
+        """Column of ``term``, or -1 if it is not in the vocabulary."""
+        key = term.encode("utf-8")
+        slots, offsets, data, mask = self._slots, self._offsets, self._bytes, self._mask
+        h = _term_hash(key) & mask
+        while True:
+            j = slots[h]
+            if j == EMPTY_SLOT:
+                return -1
+            if data[offsets[j]:offsets[j + 1]] == key:
+                return j
+            h = (h + 1) & mask
+
+
+def _restore_step(cls, path, model):
+    step = cls.__new__(cls)
+    step.path = path
+    step._bind(model)
+    return step
+
+
+class _MappedStep(BaseEstimator):
+    """Pipeline step reading its state from a mapped artifact.
+
+    ``load_artifact`` binds both steps to one ``CompactModel``, so they read
+    the same file even if it is replaced in between. Pickling stores only
+    the artifact path and that shared model, so a worker process re-maps the
+    file once instead of copying the arrays.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._bind(CompactModel(path))
+
+    def _bind(self, model):
+        self._model = model
+
+    def __sklearn_is_fitted__(self):
+        return True
+
+    def __reduce__(self):
+        return (_restore_step, (type(self), self.path, self._model))
+
+    def fit(self, X, y=None):
+        raise TypeError("Mapped artifacts are read-only; retrain and re-export instead")
+
+
+class MappedTfidfVectorizer(_MappedStep):
+    """TF-IDF transform using the mapped string table and IDF vector."""
+
+    def _bind(self, model):
+        self._model = model
+        params = model.params
+        self.vocabulary = StringTable(self._model)
+        self.idf_ = self._model.values("idf")
+        self._analyze = TfidfVectorizer(
+            **{k: params[k] for k in ("lowercase", "strip_accents", "token_pattern",
+                                      "stop_words", "ngram_range", "analyzer")}
+        ).build_analyzer()
+        self._tokenizer = tokenizer_for(params)
+
+    def build_analyzer(self):
+        """Return the callable that turns a document into n-gram strings."""
+        return self._analyze
+
+    def get_feature_names_out(self, input_features=None):
+        """Vocabulary terms in column order (decodes the whole table)."""
+        return np.asarray(list(self.vocabulary), dtype=object)
+
+    @property
+    def vocabulary_(self):
+        """Term-to-column dict (built on access; the transform does not need it)."""
+        return {term: j for j, term in enumerate(self.vocabulary)}
+
+    def _count_analyzed(self, texts, lookup):
+        # Per-batch memo of term -> column; discarded after the call so the
+        # process never holds a full vocabulary dict.
+        seen = {}
+        indptr, indices, values = [0], [], []
+        for doc in texts:
+            counts = {}
+            for term in self._analyze(doc):
+                j = seen.get(term)
+                if j is None:
+                    j = seen[term] = lookup(term)
+                if j >= 0:
+                    counts[j] = counts.get(j, 0) + 1
+            indices.extend(counts)
+            values.extend(counts.values())
+            indptr.append(len(indices))
+        X = sp.csr_matrix(
+            (np.asarray(values, dtype=np.float64), np.asarray(indices, dtype=np.int32), indptr),
+            shape=(len(indptr) - 1, len(self.vocabulary)),
+        )
+        X.sort_indices()
+        return X
+
+    def transform(self, texts):
+        """Convert texts to a TF-IDF matrix without a vocabulary dict."""
+        params = self._model.params
+        lookup = self.vocabulary.index
+        texts = texts if isinstance(texts, list) else list(texts)
+        if self._tokenizer is not None and all(type(doc) is str for doc in texts):
+            # Each distinct term is looked up once per batch; no vocabulary dict.
+            X = self._tokenizer.count_matrix(texts, lookup, len(self.vocabulary),
+                                             dtype=np.float64)
+        else:
+            X = self._count_analyzed(texts, lookup)
+        if params["binary"]:
+            X.data.fill(1.0)
+        if params["sublinear_tf"]:
+            np.log(X.data, X.data)
+            X.data += 1.0
+        if self.idf_ is not None:
+            X.data *= self.idf_[X.indices]
+        if params["norm"]:
+            X = normalize(X, norm=params["norm"], copy=False)
+        return X
+
+
+class MappedHashingVectorizer(_MappedStep, HashingTfidfVectorizer):
+    """Hashing TF-IDF whose ``idf_`` is a view into the mapped artifact."""
+
+    def __init__(self, path):
+        _MappedStep.__init__(self, path)
+
+    def _bind(self, model):
+        self._model = model
+        for k, v in model.params.items():
+            setattr(self, k, v)
+        self.min_df, self.max_df = 1, 1.0
+        self.idf_ = model.values("idf")
+
+    def get_params(self, deep=True):
+        return {"path": self.path}
+
+    fit = _MappedStep.fit
+    fit_transform = _MappedStep.fit
+
+
+class MappedLinearClassifier(_MappedStep):
+    """Binary logistic scorer over mapped ``coef``/``intercept`` arrays."""
+
+    loss = "log_loss"
+
+    def _bind(self, model):
+        self._model = model
+        self.classes_ = np.asarray(model.header["classes"])
+        self.coef_ = model.values("coef").reshape(1, -1)
+        self.intercept_ = model.array("intercept")
+
+    def decision_function(self, X):
+        """Signed distance to the decision boundary."""
+        return np.asarray(X @ self.coef_[0]).ravel() + self.intercept_[0]
+
+    def predict_proba(self, X):
+        """Probability estimates for ``classes_``."""
+        p = sigmoid(self.decision_function(X))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X):
+        """Predicted class labels."""
+        return self.classes_[(self.decision_function(X) > 0).astype(int)]
+
+
+def load_artifact(path):
+    """Map a ``.spm`` file and return it as a ready-to-score sklearn Pipeline."""
+    # One mapping for both steps: a publish replacing the file cannot pair
+    # one model's vocabulary with another's coefficients.
+    model = CompactModel(path)
+    vectorizer_cls = MappedHashingVectorizer if model.kind == "hashing" else MappedTfidfVectorizer
+    return Pipeline([
+        ("tfidf", _restore_step(vectorizer_cls, str(path), model)),
+        ("clf", _restore_step(MappedLinearClassifier, str(path), model)),
+    ])
@@ -0,0 +1,152 @@
+"""Streaming, chunked batch scoring for large CSV/JSONL inputs."""
+import time
+from collections import deque
+
+import pandas as pd
+
+from .cache import PredictionCache
+from .parallel import ParallelScorer
+from .pipeline import get_pipeline, score_texts
+
+DEFAULT_CHUNK_SIZE = 10000
+TEXT_COLUMNS = ("text", "message", "body")
+JSONL_SUFFIXES = (".jsonl", ".ndjson", ".json")
+
+
+def detect_format(source):
+    """Guess ``"csv"`` or ``"jsonl"`` from a path or a named file object."""
+    name = str(getattr(source, "name", source)).lower()
+    return "jsonl" if name.endswith(JSONL_SUFFIXES) else "csv"
+
+
+def find_text_column(columns, text_column=None):
+    """Return the column holding the message text."""
+    if text_column is not None:
+        if text_column not in columns:
+            raise ValueError(f"Input has no column named {text_column!r}")
+        return text_column
+    for col in columns:
+        if str(col).lower() in TEXT_COLUMNS:
+            return col
+    raise ValueError("Input must contain a 'text', 'message' or 'body' column")
+
+
+def read_chunks(source, fmt=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrames of at most ``chunk_size`` rows from a CSV/JSONL source."""
+    fmt = fmt or detect_format(source)
+    if fmt == "jsonl":
+        reader = pd.read_json(source, lines=True, chunksize=chunk_size, dtype=False)
+    elif fmt == "csv":
+        reader = pd.read_csv(source, chunksize=chunk_size)
+    else:
+        raise ValueError(f"Unsupported input format: {fmt!r}")
+    with reader:
+        yield from reader
+
+
+def _chunk_texts(chunk, col):
+    return chunk[col].fillna("").astype(str).tolist()
+
+
+def _attach_scores(chunk, labels, probs):
+    chunk["pred"] = ["SPAM" if int(p) == 1 else "HAM" for p in labels]
+    chunk["spam_prob"] = probs
+    return chunk
+
+
+def score_chunks(chunks, text_column=None, pipe=None, cache=None):
+    """Add ``pred`` and ``spam_prob`` columns to each chunk as it streams by.
+
+    A ``PredictionCache`` lets repeated messages skip the model entirely.
+    """
+    if pipe is None:
+        pipe = get_pipeline()
+    col = None
+    for chunk in chunks:
+        if col is None:
+            col = find_text_column(chunk.columns, text_column)
+        labels, probs, _ = score_texts(_chunk_texts(chunk, col), pipe, cache=cache)
+        yield _attach_scores(chunk, labels, probs)
+
+
+def score_chunks_parallel(chunks, scorer, text_column=None, max_pending=None):
+    """Like ``score_chunks`` but dispatches chunks to a ``ParallelScorer``.
+
+    Chunks are yielded in input order; at most ``max_pending`` (default twice
+    the worker count) are held in memory while workers run.
+    """
+    max_pending = max_pending or 2 * scorer.workers
+    pending = deque()
+    col = None
+    for chunk in chunks:
+        if col is None:
+            col = find_text_column(chunk.columns, text_column)
+        pending.append((chunk, scorer.submit(_chunk_texts(chunk, col))))
+        if len(pending) >= max_pending:
+            done, future = pending.popleft()
+            labels, probs, _ = future.result()
+            yield _attach_scores(done, labels, probs)
+    while pending:
+        done, future = pending.popleft()
+        labels, probs, _ = future.result()
+        yield _attach_scores(done, labels, probs)
+
+
+def _write_chunk(chunk, f, fmt, first):
+    if fmt == "jsonl":
+        chunk.to_json(f, orient="records", lines=True, force_ascii=False)
+    else:
+        chunk.to_csv(f, header=first, index=False)
+
+
+def write_chunks(chunks, output, fmt="csv", progress=None):
+    """Write scored chunks incrementally and return throughput stats.
+
+    ``progress`` is called as ``progress(rows, elapsed_seconds)`` after each
+    chunk. Only one chunk is held in memory at a time.
+    """
+    rows = 0
+    start = time.perf_counter()
+    with open(output, "w", encoding="utf-8", newline="") as f:
+        for i, chunk in enumerate(chunks):
+            _write_chunk(chunk, f, fmt, first=(i == 0))
+            rows += len(chunk)
+            if progress is not None:
+                progress(rows, time.perf_counter() - start)
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_sec": rows / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def score_file(
+    source,
+    output,
+    text_column=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    input_format=None,
+    output_format=None,
+    pipe=None,
+    progress=None,
+    workers=None,
+    cache_size=None,
+):
+    """Score a CSV/JSONL file (or file object) into ``output`` chunk by chunk.
+
+    Peak memory is bounded by ``chunk_size`` rather than the input size.
+    With ``workers`` > 1 chunks are scored in a process pool where each
+    worker holds its own copy of the pipeline. ``cache_size`` enables a
+    prediction cache of that many entries (one per worker).
+    """
+    input_format = input_format or detect_format(source)
+    output_format = output_format or detect_format(output)
+    chunks = read_chunks(source, input_format, chunk_size)
+    if workers is None or workers <= 1:
+        cache = PredictionCache(cache_size) if cache_size else None
+        scored = score_chunks(chunks, text_column=text_column, pipe=pipe, cache=cache)
+        return write_chunks(scored, output, output_format, progress=progress)
+    with ParallelScorer(workers=workers, pipe=pipe, cache_size=cache_size) as scorer:
+        scored = score_chunks_parallel(chunks, scorer, text_column=text_column)
+        return write_chunks(scored, output, output_format, progress=progress)
@@ -0,0 +1,109 @@
+"""Content-addressed prediction cache for repeated messages."""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .model import ScoreResult
+from .tokenizer import normalize_text
+
+DEFAULT_MAX_ENTRIES = 100_000
+
+
+def text_key(text):
+    """Stable 16-byte digest of the normalised text."""
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=16).digest()
+
+
+class PredictionCache:
+    """LRU cache of ``(label, spam_prob, margin)`` keyed by normalised text.
+
+    Entries belong to one model version; scoring with a different version
+    clears the cache, so a swapped or retrained model never serves stale
+    predictions. Keys ignore case and surrounding whitespace, which the
+    lowercasing TF-IDF featurizers ignore as well.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        """Drop every entry (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters, hit rate and current size."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._entries),
+            "model_version": self._version,
+        }
+
+    def _lookup(self, keys, version):
+        """Return cached rows (None for misses) and the distinct missing keys."""
+        rows = [None] * len(keys)
+        missing = {}
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            entries = self._entries
+            for i, key in enumerate(keys):
+                row = entries.get(key)
+                if row is not None:
+                    entries.move_to_end(key)
+                    rows[i] = row
+                    self.hits += 1
+                elif key in missing:
+                    # Duplicate within the batch: served from the first copy.
+                    self.hits += 1
+                else:
+                    missing[key] = i
+                    self.misses += 1
+        return rows, missing
+
+    def _store(self, pairs, version):
+        with self._lock:
+            if version != self._version:
+                return
+            entries = self._entries
+            for key, row in pairs:
+                entries[key] = row
+                entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+    def score(self, texts, score_fn, version):
+        """Score ``texts``, calling ``score_fn`` only on distinct uncached ones.
+
+        ``version`` identifies the model behind ``score_fn``. Duplicate texts
+        in the batch are scored once and the result fanned out.
+        """
+        texts = list(texts)
+        keys = [text_key(t) for t in texts]
+        rows, missing = self._lookup(keys, version)
+        if missing:
+            first_index = list(missing.values())
+            labels, probs, margins = score_fn([texts[i] for i in first_index])
+            fresh = dict(zip(missing, zip(labels, probs, margins)))
+            self._store(fresh.items(), version)
+            rows = [row if row is not None else fresh[key] for row, key in zip(rows, keys)]
+        if not rows:
+            empty = np.array([])
+            return ScoreResult(empty, empty, empty)
+        labels, probs, margins = zip(*rows)
+        return ScoreResult(np.asarray(labels), np.asarray(probs, dtype=float),
+                           np.asarray(margins, dtype=float))
@@ -0,0 +1,162 @@
+"""Two-stage cascade scoring: a tiny unigram model first, the full model only
+for the messages it is unsure about.
+
+Stage 1 is a linear model over a few hundred unigrams. Its spam
+probability decides a message outright when it is at most ``low`` (ham) or
+at least ``high`` (spam); messages inside the ``(low, high)`` band are
+re-scored by the full pipeline. The band is calibrated on the validation
+split so that stage-1 decisions agree with the full model on at least
+``agreement`` of the messages it decides on each side.
+
+``cascade.json`` next to the serving artifact records the band, the stage-1
+artifact and the version of the full model it was calibrated against; a
+cascade is only used while that full model is the one being served.
+"""
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+from . import instrumentation
+from .model import ScoreResult
+
+STAGE1_PARAMS = {"max_features": 500, "ngram_range": (1, 1)}
+DEFAULT_AGREEMENT = 0.995
+CONFIG_FILE = "cascade.json"
+STAGE1_FILE = "stage1.spm"
+
+
+def calibrate_band(stage1_proba, reference_labels, agreement=DEFAULT_AGREEMENT):
+    """Return the widest ``(low, high)`` band meeting ``agreement``.
+
+    Stage 1 calls ham every message with probability ``<= low`` and spam
+    every message with probability ``>= high``; each side is grown from its
+    extreme as far as its labels still agree with ``reference_labels`` (the
+    full model's predictions) at the ``agreement`` rate. ``low`` is at most
+    0.5 and ``high`` at least 0.5.
+    """
+    proba = np.asarray(stage1_proba, dtype=float)
+    reference = np.asarray(reference_labels)
+    order = np.argsort(proba, kind="stable")
+    p, ref = proba[order], reference[order]
+    n = np.arange(1, len(p) + 1)
+
+    low = 0.0
+    ham_ok = np.flatnonzero(np.cumsum(ref == 0) / n >= agreement)
+    if len(ham_ok):
+        low = min(float(p[ham_ok[-1]]), 0.5)
+    high = 1.0
+    spam_ok = np.flatnonzero(np.cumsum(ref[::-1] == 1) / n >= agreement)
+    if len(spam_ok):
+        high = max(float(p[::-1][spam_ok[-1]]), 0.5)
+    return low, high
+
+
+class CascadeScorer:
+    """Score with ``stage1`` and send the uncertain band to ``full``."""
+
+    def __init__(self, stage1, full, low, high):
+        if not 0.0 <= low <= high <= 1.0:
+            raise ValueError(f"Need 0 <= low <= high <= 1, got ({low}, {high})")
+        self.stage1 = stage1
+        self.full = full
+        self.low = low
+        self.high = high
+
+    def uncertain(self, proba):
+        return (proba > self.low) & (proba < self.high)
+
+    def score(self, texts):
+        """``ScoreResult`` for ``texts``; margins are those of the deciding stage."""
+        from .pipeline import _score_uncached
+
+        texts = list(texts)
+        first = _score_uncached(texts, self.stage1)
+        routed = np.flatnonzero(self.uncertain(first.probabilities))
+        instrumentation.inc("cascade_messages", len(texts))
+        instrumentation.inc("cascade_routed_messages", len(routed))
+        if not len(routed):
+            return first
+        second = _score_uncached([texts[i] for i in routed], self.full)
+        labels = np.array(first.labels, copy=True)
+        proba = np.array(first.probabilities, dtype=float, copy=True)
+        margins = np.array(first.margins, dtype=float, copy=True)
+        labels[routed] = second.labels
+        proba[routed] = second.probabilities
+        margins[routed] = second.margins
+        return ScoreResult(labels, proba, margins)
+
+    def save(self, directory, full_version):
+        """Write the stage-1 artifact and ``cascade.json`` into ``directory``."""
+        from .artifact import export_pipeline
+
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        export_pipeline(self.stage1, directory / STAGE1_FILE)
+        return self.save_config(directory, full_version)
+
+    def save_config(self, directory, full_version):
+        """Write ``cascade.json`` for the stage-1 artifact already in ``directory``."""
+        from .registry import file_digest
+        from .training import write_metrics
+
+        directory = Path(directory)
+        config = {
+            "low": self.low,
+            "high": self.high,
+            "stage1": STAGE1_FILE,
+            "stage1_version": file_digest(directory / STAGE1_FILE),
+            "full_version": full_version,
+        }
+        write_metrics(config, directory / CONFIG_FILE)
+        return config
+
+    @classmethod
+    def load(cls, directory, full):
+        """Load a saved cascade around ``full``; returns ``(scorer, config)``."""
+        from .artifact import load_artifact
+
+        directory = Path(directory)
+        config = json.loads((directory / CONFIG_FILE).read_text())
+        stage1 = load_artifact(directory / config["stage1"])
+        return cls(stage1, full, config["low"], config["high"]), config
+
+
+def _throughput(score, texts, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        score(texts)
+        best = min(best, time.perf_counter() - start)
+    return len(texts) / best if best > 0 else float("inf")
+
+
+def evaluate_cascade(scorer, frames, full_scores):
+    """Accuracy/throughput trade-off of ``scorer`` on each labelled frame.
+
+    ``frames`` maps split names to DataFrames with ``text``/``label``;
+    ``full_scores`` maps them to the full model's ``ScoreResult``.
+    """
+    from .model import evaluation_metrics
+    from .pipeline import _score_uncached
+
+    report = {}
+    for split, frame in frames.items():
+        texts, y = frame["text"].tolist(), frame["label"].to_numpy()
+        cascaded = scorer.score(texts)
+        metrics = evaluation_metrics(y, cascaded.labels, cascaded.probabilities)
+        full = full_scores[split]
+        full_rate = _throughput(lambda t: _score_uncached(t, scorer.full), texts)
+        cascade_rate = _throughput(scorer.score, texts)
+        stage1 = _score_uncached(texts, scorer.stage1)
+        report[split] = dict(
+            metrics,
+            routed_fraction=float(scorer.uncertain(stage1.probabilities).mean()),
+            agreement_with_full=float(np.mean(cascaded.labels == full.labels)),
+            accuracy_loss=float(np.mean(full.labels == y) - metrics["accuracy"]),
+            full_msgs_per_sec=full_rate,
+            cascade_msgs_per_sec=cascade_rate,
+            speedup=cascade_rate / full_rate,
+        )
+    return report
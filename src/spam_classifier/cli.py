@@ -1,80 +1,393 @@
 """Command-line interface for spam classifier."""
 import argparse
-import json
-from pathlib import Path
+import os
+import sys
 
-from .data import SpamDataset
-from .features import TextFeaturizer
-from .model import SpamClassifier
+def _start_instrumentation(args):
+    """Enable instrumentation if asked to; returns an exporter to stop, or None."""
+    if not (getattr(args, "instrument", False) or args.metrics_json):
+        return None
+    from . import instrumentation
+
+    instrumentation.enable()
+    if args.metrics_json:
+        return instrumentation.PeriodicExporter(
+            instrumentation.json_file_exporter(args.metrics_json), args.metrics_interval
+        )
+    return None
+
+def _add_metrics_args(parser):
+    parser.add_argument("--metrics-json", default=None,
+                        help="Record hot-path timers/counters and dump them to this JSON file")
+    parser.add_argument("--metrics-interval", type=float, default=60.0,
+                        help="Seconds between JSON metric dumps")
 
 def train(args):
-    """Train a new spam classifier."""
-    # Load and split data
-    dataset = SpamDataset()
-    train_df, val_df, test_df = dataset.load_split(
-        test_size=args.test_size,
-        val_size=args.val_size
-    )
-    
-    # Extract features
-    featurizer = TextFeaturizer(
+    """Train, evaluate and publish a new spam classifier."""
+    from .training import DEFAULT_EPOCHS, METRICS_FILE, RESULTS_DIR, train_model
+
+    corpus = None
+    if args.corpus:
+        from .streaming import StreamingDataset
+
+        corpus = StreamingDataset(args.corpus, chunk_size=args.chunk_size,
+                                  test_size=args.test_size, val_size=args.val_size)
+    result = train_model(
         max_features=args.max_features,
-        ngram_range=(1, args.max_ngram)
-    )
-    
-    X_train = featurizer.fit_transform(train_df["text"])
-    X_val = featurizer.transform(val_df["text"])
-    X_test = featurizer.transform(test_df["text"])
-    
-    # Train model
-    classifier = SpamClassifier(
+        ngram_range=(1, args.max_ngram),
         C=args.regularization,
-        class_weight="balanced"
+        backend=args.featurizer,
+        n_bits=args.hash_bits,
+        test_size=args.test_size,
+        val_size=args.val_size,
+        use_cache=not args.no_cache,
+        cascade=args.cascade,
+        cascade_agreement=args.cascade_agreement,
+        n_resamples=args.bootstrap,
+        corpus=corpus,
+        epochs=DEFAULT_EPOCHS if args.epochs is None else args.epochs,
     )
-    classifier.fit(X_train, train_df["label"])
-    
-    # Evaluate
-    results = {
-        "train": classifier.evaluate(X_train, train_df["label"]),
-        "val": classifier.evaluate(X_val, val_df["label"]),
-        "test": classifier.evaluate(X_test, test_df["label"])
-    }
     
-    # Save results
-    output_dir = Path("results") / "phase1"
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Convert numpy arrays and numpy types to native Python types for JSON
-    def _make_json_serializable(obj):
-        if isinstance(obj, dict):
-            return {k: _make_json_serializable(v) for k, v in obj.items()}
-        if hasattr(obj, "tolist"):
-            return obj.tolist()
-        try:
-            return float(obj)
-        except Exception:
-            return obj
-
-    serializable = _make_json_serializable(results)
-    with open(output_dir / "metrics.json", "w") as f:
-        json.dump(serializable, f, indent=2)
-    
-    print("\nResults saved to results/phase1/metrics.json")
+    print(f"\nPublished model version {result.version[:12]}")
+    print(f"Results saved to {RESULTS_DIR / METRICS_FILE}")
     print("\nValidation metrics:")
-    for metric, value in results["val"].items():
-        if metric != "confusion_matrix":
+    intervals = result.metrics.get("confidence_intervals", {}).get("val", {})
+    for metric, value in result.metrics["val"].items():
+        if metric in intervals:
+            ci = intervals[metric]
+            print(f"{metric}: {value:.3f} (95% CI {ci['low']:.3f}-{ci['high']:.3f})")
+        elif metric != "confusion_matrix":
             print(f"{metric}: {value:.3f}")
+    if "cascade" in result.metrics:
+        report = result.metrics["cascade"]
+        print(f"\nCascade band ({report['low']:.3f}, {report['high']:.3f}):")
+        for split in ("val", "test"):
+            stats = report[split]
+            print(f"{split}: {stats['routed_fraction']:.1%} routed to the full model, "
+                  f"{stats['speedup']:.2f}x throughput, "
+                  f"accuracy loss {stats['accuracy_loss']:+.4f}")
 
-def main():
-    parser = argparse.ArgumentParser(description="Train spam classifier")
-    parser.add_argument("--test-size", type=float, default=0.15)
-    parser.add_argument("--val-size", type=float, default=0.15)
-    parser.add_argument("--max-features", type=int, default=10000)
-    parser.add_argument("--max-ngram", type=int, default=2)
-    parser.add_argument("--regularization", type=float, default=1.0)
-    
-    args = parser.parse_args()
-    train(args)
+def score(args):
+    """Stream-score a CSV/JSONL file with the saved pipeline."""
+    from .batch import score_file
+
+    def report(rows, elapsed):
+        rate = rows / elapsed if elapsed > 0 else 0.0
+        print(f"\rScored {rows} rows ({rate:.0f} rows/s)", end="", file=sys.stderr, flush=True)
+
+    if args.workers == 0:
+        args.workers = os.cpu_count() or 1
+    stats = score_file(
+        args.input,
+        args.output,
+        text_column=args.text_column,
+        chunk_size=args.chunk_size,
+        input_format=args.input_format,
+        output_format=args.output_format,
+        progress=report,
+        workers=args.workers,
+        cache_size=args.cache_size,
+    )
+    print(file=sys.stderr)
+    print(f"Wrote {stats['rows']} predictions to {args.output} "
+          f"in {stats['seconds']:.1f}s ({stats['rows_per_sec']:.0f} rows/s)")
+
+def serve(args):
+    """Run the HTTP/JSON scoring service."""
+    from .pipeline import enable_cascade, enable_prediction_cache
+    from .server import serve as run_server
+
+    if args.cache_size:
+        enable_prediction_cache(args.cache_size)
+    if args.cascade and args.shadow:
+        raise SystemExit("--shadow compares full models; it cannot be combined with --cascade")
+    if args.cascade:
+        enable_cascade()
+    if args.shadow:
+        from .pipeline import enable_shadow
+
+        candidates = {os.path.splitext(os.path.basename(path))[0]: path for path in args.shadow}
+        enable_shadow(candidates, log_path=args.shadow_log)
+    run_server(
+        host=args.host,
+        port=args.port,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+    )
+
+def train_online(args):
+    """Update the incremental model with newly appended feedback rows."""
+    from .online import OnlineTrainer
+
+    if not args.feedback and not args.corpus:
+        raise SystemExit("train-online needs feedback files and/or --corpus")
+    kwargs = {"n_bits": args.hash_bits} if args.hash_bits is not None else {}
+    trainer = OnlineTrainer.load(args.state_dir, **kwargs)
+    rows = 0
+    if args.corpus:
+        from .streaming import StreamingDataset
+
+        corpus = StreamingDataset(args.corpus, chunk_size=args.chunk_size)
+        rows += trainer.fit_stream(corpus)
+        metrics = trainer.evaluate_chunks(corpus.chunks("val"))
+        print("Validation metrics (streamed):")
+        for metric, value in metrics.items():
+            if metric != "confusion_matrix":
+                print(f"{metric}: {value:.3f}")
+    rows += trainer.ingest(args.feedback, batch_size=args.chunk_size)
+    trainer.save()
+    print(f"Ingested {rows} new rows ({trainer.n_docs} total, {trainer.n_updates} updates)")
+    if rows and not args.no_publish:
+        version = trainer.publish()
+        trainer.save()
+        print(f"Published model version {version[:12]}")
+
+def sweep(args):
+    """Search featurizer and classifier settings; write a leaderboard."""
+    from .sweep import LEADERBOARD_FILE, RESULTS_DIR, run_sweep
+
+    space = {
+        "backend": args.featurizer,
+        "max_features": args.max_features,
+        "n_bits": args.hash_bits,
+        "max_ngram": args.max_ngram,
+        "C": args.regularization,
+        "class_weight": [None if w == "none" else w for w in args.class_weight],
+    }
+    leaderboard = run_sweep(
+        space,
+        n_trials=args.n_trials,
+        seed=args.seed,
+        workers=args.workers or None,
+        metric=args.metric,
+        test_size=args.test_size,
+        val_size=args.val_size,
+    )
+    print(f"Ran {leaderboard['n_trials']} trials over {leaderboard['n_featurizer_configs']} "
+          f"featurizer configs in {leaderboard['seconds']:.1f}s")
+    print(f"Leaderboard saved to {RESULTS_DIR / LEADERBOARD_FILE}")
+    for row in leaderboard["trials"][:5]:
+        print(f"{row['rank']:>3}. val {args.metric}={row['val'][args.metric]:.4f} "
+              f"fit={row['fit_seconds']:.2f}s {row['params']}")
+
+def cv(args):
+    """Stratified k-fold cross-validation with bootstrap confidence intervals."""
+    from .evaluation import CV_FILE, cross_validate
+    from .training import RESULTS_DIR
+
+    if args.workers == 0:
+        args.workers = os.cpu_count() or 1
+    report = cross_validate(
+        n_splits=args.folds,
+        max_features=args.max_features,
+        ngram_range=(1, args.max_ngram),
+        C=args.regularization,
+        backend=args.featurizer,
+        n_bits=args.hash_bits,
+        test_size=args.test_size,
+        val_size=args.val_size,
+        use_cache=not args.no_cache,
+        workers=args.workers,
+        seed=args.seed,
+        n_resamples=args.bootstrap,
+    )
+    print(f"{report['n_splits']}-fold CV over {report['n_messages']} messages "
+          f"in {report['seconds']:.1f}s")
+    print(f"Results saved to {RESULTS_DIR / CV_FILE} and {report['pr_curve']}")
+    for metric, ci in report["out_of_fold_ci"].items():
+        print(f"{metric}: {report['mean'][metric]:.3f} +/- {report['std'][metric]:.3f} "
+              f"across folds, out-of-fold {ci['estimate']:.3f} "
+              f"(95% CI {ci['low']:.3f}-{ci['high']:.3f})")
+
+def compress(args):
+    """Prune and quantize the trained model; report size, speed and metric deltas."""
+    from .compress import COMPRESSION_FILE, compress_model
+    from .training import RESULTS_DIR
+
+    result = compress_model(
+        threshold=args.threshold,
+        top_n=args.top_n,
+        dtype=args.dtype,
+        output=args.output,
+        publish=args.publish,
+        refit=not args.no_refit,
+    )
+    print(f"Wrote {result['artifact']} (version {result['model_version'][:12]})")
+    print(f"Report saved to {RESULTS_DIR / COMPRESSION_FILE}")
+    before, after = result["reference"], result["compressed"]
+    print(f"{'':>24}{'float64':>12}{args.dtype:>12}")
+    for key in ("n_features", "size_bytes", "load_seconds", "transform_msgs_per_sec"):
+        print(f"{key:>24}{before[key]:>12.4g}{after[key]:>12.4g}")
+    for split, delta in result["metric_delta"].items():
+        print(f"{split} delta vs metrics.json: "
+              + ", ".join(f"{m} {d:+.4f}" for m, d in delta.items()))
+
+COMMANDS = {
+    "train": "Train spam classifier",
+    "score": "Score a CSV/JSONL file in bounded-memory chunks",
+    "serve": "Run the HTTP scoring service with micro-batching",
+    "train-online": "Incrementally update the model from new labelled feedback",
+    "sweep": "Grid/random hyperparameter search with a process pool",
+    "cv": "Parallel stratified k-fold cross-validation with bootstrap CIs",
+    "compress": "Prune low-weight terms and export a quantized artifact",
+}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Spam classifier command-line interface")
+    subparsers = parser.add_subparsers(dest="command")
+
+    train_parser = subparsers.add_parser("train", help=COMMANDS["train"])
+    train_parser.add_argument("--test-size", type=float, default=0.15)
+    train_parser.add_argument("--val-size", type=float, default=0.15)
+    train_parser.add_argument("--max-features", type=int, default=10000)
+    train_parser.add_argument("--max-ngram", type=int, default=2)
+    train_parser.add_argument("--regularization", type=float, default=1.0)
+    train_parser.add_argument("--featurizer", choices=["tfidf", "hashing"], default="tfidf",
+                              help="Vocabulary TF-IDF or hashed n-grams with fitted IDF")
+    train_parser.add_argument("--hash-bits", type=int, default=18,
+                              help="Hashed feature columns = 2 ** bits (hashing featurizer only)")
+    train_parser.add_argument("--no-cache", action="store_true",
+                              help="Neither read nor write the dataset and feature-matrix caches")
+    train_parser.add_argument("--bootstrap", type=int, default=1000,
+                              help="Bootstrap resamples for val/test confidence intervals "
+                                   "(0 = off)")
+    train_parser.add_argument("--cascade", action="store_true",
+                              help="Also fit and calibrate a unigram pre-filter for cascade scoring")
+    train_parser.add_argument("--cascade-agreement", type=float, default=None,
+                              help="Least agreement of pre-filter decisions with the full "
+                                   "model on val (default 0.995)")
+    train_parser.add_argument("--corpus", nargs="+", default=[],
+                              help="Train out of core on these CSV/JSONL files (stratified "
+                                   "streamed splits, hashing featurizer, SGD partial_fit)")
+    train_parser.add_argument("--chunk-size", type=int, default=50000,
+                              help="Rows per chunk with --corpus")
+    train_parser.add_argument("--epochs", type=int, default=None,
+                              help="partial_fit passes over the train split with --corpus "
+                                   "(default 5)")
+    _add_metrics_args(train_parser)
+    train_parser.set_defaults(func=train)
+
+    score_parser = subparsers.add_parser("score", help=COMMANDS["score"])
+    score_parser.add_argument("input", help="CSV or JSONL file to score")
+    score_parser.add_argument("output", help="Where to write predictions (CSV or JSONL)")
+    score_parser.add_argument("--text-column", default=None)
+    score_parser.add_argument("--chunk-size", type=int, default=10000)
+    score_parser.add_argument("--input-format", choices=["csv", "jsonl"], default=None)
+    score_parser.add_argument("--output-format", choices=["csv", "jsonl"], default=None)
+    score_parser.add_argument("--workers", type=int, default=1,
+                              help="Worker processes (0 = one per CPU core)")
+    score_parser.add_argument("--cache-size", type=int, default=0,
+                              help="Cache predictions for up to N distinct messages (0 = off)")
+    _add_metrics_args(score_parser)
+    score_parser.set_defaults(func=score)
+
+    serve_parser = subparsers.add_parser("serve", help=COMMANDS["serve"])
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--max-batch-size", type=int, default=256,
+                              help="Most messages merged into one predict call")
+    serve_parser.add_argument("--max-wait-ms", type=float, default=5.0,
+                              help="How long to hold a request while filling a batch")
+    serve_parser.add_argument("--cache-size", type=int, default=0,
+                              help="Cache predictions for up to N distinct messages (0 = off)")
+    serve_parser.add_argument("--instrument", action="store_true",
+                              help="Record stage timers/counters (GET /metrics/prometheus)")
+    serve_parser.add_argument("--cascade", action="store_true",
+                              help="Score with the pre-filter cascade saved by `train --cascade`")
+    serve_parser.add_argument("--shadow", nargs="+", default=[], metavar="ARTIFACT",
+                              help="Candidate .spm models scored alongside the served one")
+    serve_parser.add_argument("--shadow-log", default=None,
+                              help="Append messages where a candidate disagrees (JSON lines)")
+    _add_metrics_args(serve_parser)
+    serve_parser.set_defaults(func=serve)
+
+    online_parser = subparsers.add_parser("train-online", help=COMMANDS["train-online"])
+    online_parser.add_argument("feedback", nargs="*",
+                               help="Append-only CSV(s) of label,text rows (ham/spam, no header)")
+    online_parser.add_argument("--corpus", nargs="+", default=[],
+                               help="CSV/JSONL corpus streamed in chunks for one full pass "
+                                    "over its hash-assigned train split")
+    online_parser.add_argument("--chunk-size", type=int, default=10000)
+    online_parser.add_argument("--state-dir", default=None,
+                               help="Checkpoint directory (default: models/phase1/online)")
+    online_parser.add_argument("--hash-bits", type=int, default=None,
+                               help="Hashed feature columns = 2 ** bits (fixed after the first run)")
+    online_parser.add_argument("--no-publish", action="store_true",
+                               help="Only checkpoint; do not publish a new serving model")
+    online_parser.set_defaults(func=train_online)
+
+    sweep_parser = subparsers.add_parser("sweep", help=COMMANDS["sweep"])
+    sweep_parser.add_argument("--test-size", type=float, default=0.15)
+    sweep_parser.add_argument("--val-size", type=float, default=0.15)
+    sweep_parser.add_argument("--featurizer", nargs="+", choices=["tfidf", "hashing"],
+                              default=["tfidf"])
+    sweep_parser.add_argument("--max-features", nargs="+", type=int, default=[5000, 10000])
+    sweep_parser.add_argument("--hash-bits", nargs="+", type=int, default=[18])
+    sweep_parser.add_argument("--max-ngram", nargs="+", type=int, default=[1, 2])
+    sweep_parser.add_argument("--regularization", nargs="+", type=float,
+                              default=[0.1, 1.0, 10.0])
+    sweep_parser.add_argument("--class-weight", nargs="+", choices=["none", "balanced"],
+                              default=["balanced"])
+    sweep_parser.add_argument("--n-trials", type=int, default=None,
+                              help="Random search: sample N grid points (default: full grid)")
+    sweep_parser.add_argument("--seed", type=int, default=42)
+    sweep_parser.add_argument("--workers", type=int, default=0,
+                              help="Worker processes for classifier fits (0 = one per CPU core)")
+    sweep_parser.add_argument("--metric", default="f1",
+                              choices=["accuracy", "precision", "recall", "f1", "roc_auc"],
+                              help="Validation metric used to rank trials")
+    sweep_parser.set_defaults(func=sweep)
+
+    cv_parser = subparsers.add_parser("cv", help=COMMANDS["cv"])
+    cv_parser.add_argument("--folds", type=int, default=5)
+    cv_parser.add_argument("--workers", type=int, default=0,
+                           help="Worker processes, one fold each (0 = one per CPU core)")
+    cv_parser.add_argument("--bootstrap", type=int, default=1000,
+                           help="Bootstrap resamples of the out-of-fold predictions")
+    cv_parser.add_argument("--seed", type=int, default=42)
+    cv_parser.add_argument("--test-size", type=float, default=0.15)
+    cv_parser.add_argument("--val-size", type=float, default=0.15)
+    cv_parser.add_argument("--max-features", type=int, default=10000)
+    cv_parser.add_argument("--max-ngram", type=int, default=2)
+    cv_parser.add_argument("--regularization", type=float, default=1.0)
+    cv_parser.add_argument("--featurizer", choices=["tfidf", "hashing"], default="tfidf")
+    cv_parser.add_argument("--hash-bits", type=int, default=18)
+    cv_parser.add_argument("--no-cache", action="store_true",
+                           help="Neither read nor write the dataset and feature-matrix caches")
+    cv_parser.set_defaults(func=cv)
+
+    compress_parser = subparsers.add_parser("compress", help=COMMANDS["compress"])
+    compress_parser.add_argument("--threshold", type=float, default=None,
+                                 help="Drop terms with |coef| below this")
+    compress_parser.add_argument("--top-n", type=int, default=None,
+                                 help="Keep only the N terms with the largest |coef|")
+    compress_parser.add_argument("--dtype", choices=["float64", "float32", "int8"],
+                                 default="int8", help="Storage type of idf and coefficients")
+    compress_parser.add_argument("--output", default=None,
+                                 help="Artifact path (default: pipeline.compressed.spm "
+                                      "next to the trained model)")
+    compress_parser.add_argument("--no-refit", action="store_true",
+                                 help="Keep the original coefficients of the kept terms "
+                                      "instead of refitting on the pruned features")
+    compress_parser.add_argument("--publish", action="store_true",
+                                 help="Replace the served artifact instead of writing "
+                                      "--output, rewriting pipeline.joblib, metrics.json "
+                                      "and cascade.json for it")
+    compress_parser.set_defaults(func=compress)
+
+    if argv is None:
+        argv = sys.argv[1:]
+    # Keep the original `cli.py --max-features ...` form working as `train`.
+    if not argv or argv[0] not in COMMANDS and argv[0] not in ("-h", "--help"):
+        argv = ["train"] + list(argv)
+
+    args = parser.parse_args(argv)
+    exporter = _start_instrumentation(args) if hasattr(args, "metrics_json") else None
+    try:
+        args.func(args)
+    finally:
+        if exporter is not None:
+            exporter.stop()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,236 @@
+"""Post-training model compression: coefficient pruning and quantized export.
+
+``prune_pipeline`` keeps only the vocabulary terms whose logistic-regression
+coefficients matter (``|coef| >= threshold`` and/or the ``top_n`` largest)
+and re-derives a vectorizer and classifier over just those columns. Dropped
+terms no longer count towards a message's L2 norm, which inflates the kept
+features; ``refit_classifier`` re-fits the coefficients on the pruned
+features of the training split (the default in ``compress_model``), which
+recovers most of the precision lost by pruning alone.
+
+``compress_model`` prunes the trained pipeline, exports it with ``idf`` and
+``coef`` stored as float64, float32 or int8 (see ``artifact``) and reports
+artifact size, load time, transform throughput and the val/test metric
+delta against ``metrics.json``, next to the same numbers for the
+uncompressed float64 artifact. Publishing goes through
+``training.publish_model``, which also rewrites the joblib pickle,
+``metrics.json`` and ``cascade.json`` for the new version.
+"""
+import copy
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .training import METRICS_FILE, RESULTS_DIR, write_metrics
+
+COMPRESSION_FILE = "compression.json"
+METRICS = ("accuracy", "precision", "recall", "f1", "roc_auc")
+
+
+def kept_columns(coef, threshold=None, top_n=None):
+    """Sorted columns with ``|coef| >= threshold`` among the ``top_n`` largest."""
+    weight = np.abs(np.asarray(coef, dtype=np.float64).ravel())
+    keep = np.ones(len(weight), dtype=bool)
+    if threshold is not None:
+        keep &= weight >= threshold
+    if top_n is not None and top_n < keep.sum():
+        ranked = np.flatnonzero(keep)[np.argsort(-weight[keep], kind="stable")]
+        keep[:] = False
+        keep[ranked[:top_n]] = True
+    return np.flatnonzero(keep)
+
+
+def prune_pipeline(pipe, threshold=None, top_n=None):
+    """Copy of a fitted ``tfidf`` + linear ``clf`` pipeline over the kept columns.
+
+    Raises ``ValueError`` for hashed features (columns have no terms to drop).
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.pipeline import Pipeline
+
+    vectorizer, clf = pipe.named_steps["tfidf"], pipe.named_steps["clf"]
+    if not isinstance(vectorizer, TfidfVectorizer):
+        raise ValueError("Only vocabulary tfidf pipelines can be pruned")
+    coef = np.asarray(clf.coef_)
+    if coef.shape[0] != 1:
+        raise ValueError("Only binary linear classifiers can be pruned")
+    kept = kept_columns(coef[0], threshold, top_n)
+
+    # Kept columns stay in vocabulary (sorted) order, as a fresh fit numbers them.
+    terms = vectorizer.get_feature_names_out()[kept]
+    idf = np.asarray(vectorizer.idf_)[kept] if vectorizer.use_idf else None
+    pruned_clf = copy.deepcopy(clf)
+    pruned_clf.coef_ = coef[:, kept].copy()
+    pruned_clf.n_features_in_ = len(kept)
+    return Pipeline([("tfidf", rebuild_vectorizer(vectorizer, terms, idf)), ("clf", pruned_clf)])
+
+
+def rebuild_vectorizer(vectorizer, terms, idf=None):
+    """A fitted copy of a ``TfidfVectorizer`` over ``terms`` (in column order).
+
+    Built from public parameters only: ``terms`` become a fixed
+    ``vocabulary`` and ``idf`` (when ``use_idf``) is set through ``idf_``.
+    """
+    from sklearn.base import clone
+
+    terms = [str(term) for term in terms]
+    rebuilt = clone(vectorizer).set_params(vocabulary={term: j for j, term in enumerate(terms)})
+    # With a fixed vocabulary, fit only sets up the inner transformer.
+    rebuilt.fit(terms)
+    if rebuilt.use_idf:
+        rebuilt.idf_ = np.asarray(idf, dtype=np.float64)
+    return rebuilt
+
+
+def stored_pipeline(pipe, dtype):
+    """Copy of ``pipe`` with the ``idf``/``coef`` values a ``dtype`` artifact stores.
+
+    ``compress_model(publish=True)`` keeps this as the joblib pickle, so the
+    sklearn fallback scores exactly like the quantized artifact.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    from .artifact import export_pipeline, load_artifact
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "stored.spm"
+        export_pipeline(pipe, path, dtype=dtype)
+        served = load_artifact(path)
+        vectorizer, clf = served.named_steps["tfidf"], served.named_steps["clf"]
+        stored = copy.deepcopy(pipe)
+        if isinstance(stored.named_steps["tfidf"], TfidfVectorizer):
+            # Artifact columns are in UTF-8 term order; rebuild over that order.
+            stored.steps[0] = ("tfidf", rebuild_vectorizer(
+                stored.named_steps["tfidf"], vectorizer.get_feature_names_out(),
+                vectorizer.idf_))
+        elif vectorizer.idf_ is not None:
+            stored.named_steps["tfidf"].idf_ = np.array(vectorizer.idf_, dtype=np.float64)
+        stored.named_steps["clf"].coef_ = np.array(clf.coef_, dtype=np.float64)
+        stored.named_steps["clf"].intercept_ = np.array(clf.intercept_, dtype=np.float64)
+    return stored
+
+
+def refit_classifier(pipe, texts, labels, C=1.0):
+    """Refit ``pipe``'s classifier on its own (pruned) features of ``texts``."""
+    from sklearn.pipeline import Pipeline
+
+    from .model import SpamClassifier
+
+    classifier = SpamClassifier(C=C, class_weight="balanced")
+    classifier.fit(pipe[:-1].transform(texts), labels)
+    return Pipeline([("tfidf", pipe.named_steps["tfidf"]), ("clf", classifier.model)])
+
+
+def measure_artifact(path, frames, repeat=3):
+    """Size, load time, transform throughput and metrics of a ``.spm`` file.
+
+    ``frames`` maps split names to DataFrames with ``text``/``label``;
+    throughput is measured on the largest of them.
+    """
+    from .artifact import load_artifact
+    from .model import evaluation_metrics, score_matrix
+
+    start = time.perf_counter()
+    pipe = load_artifact(path)
+    load_seconds = time.perf_counter() - start
+    report = {
+        "size_bytes": Path(path).stat().st_size,
+        "load_seconds": load_seconds,
+        "n_features": int(np.shape(pipe[-1].coef_)[1]),
+    }
+    for split, frame in frames.items():
+        scores = score_matrix(pipe[-1], pipe[:-1].transform(frame["text"].tolist()))
+        report[split] = evaluation_metrics(frame["label"], scores.labels, scores.probabilities)
+    texts = max(frames.values(), key=len)["text"].tolist()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pipe[:-1].transform(texts)
+        best = min(best, time.perf_counter() - start)
+    report["transform_msgs_per_sec"] = len(texts) / best if best > 0 else float("inf")
+    return report
+
+
+def compress_model(threshold=None, top_n=None, dtype="int8", output=None, source=None,
+                   dataset=None, results_dir=RESULTS_DIR, publish=False, refit=True,
+                   registry=None, n_resamples=1000):
+    """Prune and quantize the trained model and report the trade-off.
+
+    ``source`` is the joblib pipeline (default ``pipeline.MODEL_PATH``);
+    the compressed artifact goes to ``output`` (default
+    ``pipeline.compressed.spm`` beside it). With ``publish`` it is published
+    through ``training.publish_model`` instead: it replaces ``registry``'s
+    artifact (default: the serving registry's), ``source`` and
+    ``metrics.json``, and recalibrates a saved cascade, all for the new
+    version. A pruned model is refit on the training split unless ``refit``
+    is false. The report is written to ``results_dir/compression.json`` and
+    returned; its metric deltas are against the ``metrics.json`` it started
+    from.
+    """
+    import joblib
+
+    from . import pipeline as serving
+    from .artifact import export_pipeline
+    from .data import SpamDataset
+    from .registry import ModelRegistry, file_digest
+    from .training import publish_model
+
+    results_dir = Path(results_dir)
+    baseline = json.loads((results_dir / METRICS_FILE).read_text())
+    source = Path(source or serving.MODEL_PATH)
+    pipe = joblib.load(source)
+    params = baseline.get("params", {})
+    dataset = dataset or SpamDataset()
+    train, val, test = dataset.load_split(test_size=params.get("test_size", 0.15),
+                                          val_size=params.get("val_size", 0.15))
+    frames = {"val": val, "test": test}
+    compression = {"threshold": threshold, "top_n": top_n, "dtype": dtype}
+
+    pruned = threshold is not None or top_n is not None
+    compressed = pipe
+    if pruned:
+        compressed = prune_pipeline(pipe, threshold, top_n)
+        if refit:
+            compressed = refit_classifier(compressed, train["text"], train["label"],
+                                          C=params.get("C", 1.0))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        reference_path = Path(tmp) / "reference.spm"
+        export_pipeline(pipe, reference_path)
+        reference = measure_artifact(reference_path, frames)
+
+    compression["refit"] = pruned and refit
+    if publish:
+        # Atomic replace; serving registries pick the new file up by its hash.
+        registry = ModelRegistry((registry or serving.get_registry()).path,
+                                 loader=serving.load_pipeline,
+                                 dumper=lambda p, path: export_pipeline(p, path, dtype=dtype))
+        publish_model(stored_pipeline(compressed, dtype),
+                      {"train": train, "val": val, "test": test},
+                      {**params, "compression": compression}, registry=registry,
+                      model_path=source, results_dir=results_dir, n_resamples=n_resamples,
+                      cascade_agreement=baseline.get("cascade", {}).get("agreement"))
+        output = registry.path
+    else:
+        output = Path(output or source.with_name("pipeline.compressed.spm"))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        export_pipeline(compressed, output, dtype=dtype)
+    report = measure_artifact(output, frames)
+
+    result = {
+        "params": compression,
+        "artifact": str(output),
+        "model_version": file_digest(output),
+        "baseline_version": baseline.get("model_version"),
+        "reference": reference,
+        "compressed": report,
+        "metric_delta": {
+            split: {m: report[split][m] - baseline[split][m] for m in METRICS if m in baseline[split]}
+            for split in frames if split in baseline
+        },
+    }
+    write_metrics(result, results_dir / COMPRESSION_FILE)
+    return result
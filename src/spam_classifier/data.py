@@ -1,16 +1,66 @@
 """Data loading and preprocessing utilities."""
+import hashlib
+import json
+import os
+import uuid
+
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from sklearn.model_selection import train_test_split
 
+from .registry import file_digest
+
+# Bump when the preprocessing or the cache layout changes.
+CACHE_VERSION = 1
+
+
+def _encode_texts(texts):
+    """Concatenate texts into one UTF-8 buffer plus character offsets."""
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum([len(t) for t in texts], out=offsets[1:])
+    return np.frombuffer("".join(texts).encode("utf-8"), dtype=np.uint8), offsets
+
+
+def _decode_texts(buffer, offsets):
+    joined = buffer.tobytes().decode("utf-8")
+    return [joined[a:b] for a, b in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+def _save_npz(path, **arrays):
+    """Write ``arrays`` atomically; a read-only data dir just skips caching."""
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp.npz")
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def _load_npz(path):
+    try:
+        with np.load(path) as npz:
+            return {name: npz[name] for name in npz.files}
+    except (OSError, ValueError, KeyError):
+        return None
+
+
 class SpamDataset:
-    """Handler for loading and preprocessing the SMS spam dataset."""
+    """Handler for loading and preprocessing the SMS spam dataset.
+
+    Preprocessed columns and split indices are cached under
+    ``data/cache`` as ``.npz`` files keyed by the raw file's hash (and, for
+    splits, the split parameters), so repeated runs skip CSV parsing.
+    """
     
-    def __init__(self, data_dir: Path = None):
+    def __init__(self, data_dir: Path = None, cache_dir: Path = None, use_cache: bool = True):
         if data_dir is None:
             data_dir = Path(__file__).parent.parent.parent / "data"
         self.data_dir = data_dir
         self.raw_path = data_dir / "raw" / "sms_spam_no_header.csv"
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else Path(data_dir) / "cache"
+        self.use_cache = use_cache
     
     def load_raw(self) -> pd.DataFrame:
         """Load the raw dataset and add headers."""
@@ -28,8 +78,62 @@ class SpamDataset:
         
         return df
     
+    def _raw_key(self):
+        return f"v{CACHE_VERSION}-{file_digest(self.raw_path)[:20]}"
+    
+    def cache_key(self):
+        """Identifies the raw file and preprocessing version, for derived caches."""
+        return self._raw_key()
+    
+    def load_preprocessed(self, raw_key=None) -> pd.DataFrame:
+        """Load the preprocessed dataset, from the cache when it is current."""
+        if not self.use_cache:
+            return self.preprocess(self.load_raw())
+        path = self.cache_dir / f"dataset-{raw_key or self._raw_key()}.npz"
+        cached = _load_npz(path)
+        if cached is not None:
+            texts = pd.Series(_decode_texts(cached["text_bytes"], cached["text_offsets"]),
+                              index=cached["index"])
+            if cached["text_isna"].any():
+                texts[cached["text_isna"]] = np.nan
+            return pd.DataFrame({"label": cached["label"], "text": texts}, index=cached["index"])
+        
+        df = self.preprocess(self.load_raw())
+        isna = df["text"].isna().to_numpy()
+        text_bytes, text_offsets = _encode_texts(df["text"].fillna("").tolist())
+        _save_npz(path, label=df["label"].to_numpy(), text_bytes=text_bytes,
+                  text_offsets=text_offsets, text_isna=isna, index=df.index.to_numpy())
+        return df
+    
+    def _split_positions(self, df, test_size, val_size, random_state):
+        positions = np.arange(len(df))
+        train_val, test = train_test_split(
+            positions, test_size=test_size, stratify=df["label"],
+            random_state=random_state
+        )
+        val_ratio = val_size / (1 - test_size)
+        train, val = train_test_split(
+            train_val, test_size=val_ratio,
+            stratify=df["label"].to_numpy()[train_val], random_state=random_state
+        )
+        return train, val, test
+    
     def load_split(self, test_size=0.15, val_size=0.15, random_state=42):
         """Load and split the dataset into train/val/test."""
+        if self.use_cache:
+            raw_key = self._raw_key()
+            df = self.load_preprocessed(raw_key)
+            params = json.dumps([test_size, val_size, random_state])
+            split_key = hashlib.sha256(params.encode()).hexdigest()[:12]
+            path = self.cache_dir / f"split-{raw_key}-{split_key}.npz"
+            cached = _load_npz(path)
+            if cached is None:
+                train, val, test = self._split_positions(df, test_size, val_size, random_state)
+                _save_npz(path, train=train, val=val, test=test)
+            else:
+                train, val, test = cached["train"], cached["val"], cached["test"]
+            return df.iloc[train], df.iloc[val], df.iloc[test]
+        
         df = self.load_raw()
         df = self.preprocess(df)
         
@@ -0,0 +1,202 @@
+"""Evaluation beyond single point estimates: bootstrap CIs, PR curves and k-fold CV.
+
+``bootstrap_ci`` resamples one set of predicted probabilities; nothing is
+re-predicted. A resample is represented by how often it draws each message
+(a row of a ``(resamples, n)`` count matrix), so the confusion counts of all
+resamples are four matrix-vector products and ROC AUC is a cumulative sum
+over the messages sorted once by score.
+
+``cross_validate`` runs stratified k-fold CV over the train and validation
+splits (the test split stays held out) in a process pool. Every fold is
+featurized through the feature cache, so reruns with other classifier
+settings skip vectorization. The out-of-fold probabilities give the bootstrap
+CIs and the precision/recall curve written next to ``cv.json``.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from .training import RESULTS_DIR, write_metrics
+
+CV_FILE = "cv.json"
+METRICS = ("accuracy", "precision", "recall", "f1", "roc_auc")
+# Resample count-matrix cells materialized at once.
+_CHUNK_CELLS = 1 << 22
+
+# Texts and labels of the CV pool, sent to each worker once.
+_worker_data = {}
+
+
+def _divide(a, b):
+    return np.divide(a, b, out=np.zeros_like(a, dtype=float), where=b > 0)
+
+
+def weighted_metrics(weights, y_true, y_proba, y_pred=None):
+    """Every metric for each row of ``weights`` (per-message draw counts).
+
+    ``y_pred`` defaults to ``y_proba > 0.5`` (the classifier's own rule).
+    Returns ``{metric: array of len(weights)}``; undefined ROC AUC is NaN.
+    """
+    y_true = np.asarray(y_true)
+    y_proba = np.asarray(y_proba, dtype=np.float64)
+    predicted = (y_proba > 0.5) if y_pred is None else np.asarray(y_pred) == 1
+    weights = np.atleast_2d(weights).astype(np.float64)
+    positive = y_true == 1
+    tp = weights @ (positive & predicted)
+    fp = weights @ (~positive & predicted)
+    fn = weights @ (positive & ~predicted)
+    n_pos = weights @ positive
+    n_neg = weights.sum(axis=1) - n_pos
+    precision, recall = _divide(tp, tp + fp), _divide(tp, tp + fn)
+    # AUC = P(score of a positive > score of a negative), ties counting half:
+    # sum over runs of tied scores, in score order.
+    order = np.argsort(y_proba, kind="stable")
+    sorted_proba = y_proba[order]
+    starts = np.flatnonzero(np.r_[True, sorted_proba[1:] != sorted_proba[:-1]])
+    by_score = weights[:, order]
+    pos = np.add.reduceat(by_score * positive[order], starts, axis=1)
+    neg = np.add.reduceat(by_score * ~positive[order], starts, axis=1)
+    below = np.cumsum(neg, axis=1) - neg
+    with np.errstate(invalid="ignore", divide="ignore"):
+        auc = (pos * (below + 0.5 * neg)).sum(axis=1) / (n_pos * n_neg)
+    return {
+        "accuracy": _divide(n_pos - fn + (n_neg - fp), n_pos + n_neg),
+        "precision": precision,
+        "recall": recall,
+        "f1": _divide(2 * precision * recall, precision + recall),
+        "roc_auc": auc,
+    }
+
+
+def bootstrap_ci(y_true, y_proba, y_pred=None, n_resamples=1000, confidence=0.95, seed=42):
+    """Percentile bootstrap intervals for ``METRICS`` from one set of probabilities.
+
+    ``y_pred`` defaults to ``y_proba > 0.5``. Returns ``{metric:
+    {"estimate", "low", "high"}}``; resamples where a metric is undefined
+    (e.g. no negatives for ROC AUC) are left out of its interval, and
+    ``n_resamples=0`` gives NaN bounds.
+    """
+    n = len(y_true)
+    estimate = weighted_metrics(np.ones(n), y_true, y_proba, y_pred)
+    rng = np.random.default_rng(seed)
+    chunk = max(1, _CHUNK_CELLS // max(n, 1))
+    samples = {metric: [] for metric in METRICS}
+    for first in range(0, n_resamples, chunk):
+        size = min(chunk, n_resamples - first)
+        draws = rng.integers(0, n, size=(size, n)) + n * np.arange(size)[:, None]
+        counts = np.bincount(draws.ravel(), minlength=size * n).reshape(size, n)
+        for metric, values in weighted_metrics(counts, y_true, y_proba, y_pred).items():
+            samples[metric].append(values)
+    tail = (1.0 - confidence) / 2 * 100
+    intervals = {}
+    for metric in METRICS:
+        values = np.concatenate(samples[metric]) if samples[metric] else np.empty(0)
+        values = values[np.isfinite(values)]
+        low, high = np.percentile(values, [tail, 100 - tail]) if len(values) else (np.nan, np.nan)
+        intervals[metric] = {"estimate": float(estimate[metric][0]),
+                             "low": float(low), "high": float(high)}
+    return intervals
+
+
+def write_pr_curve(path, y_true, y_proba):
+    """Write precision and recall at every distinct threshold as CSV."""
+    from sklearn.metrics import precision_recall_curve
+
+    precision, recall, thresholds = precision_recall_curve(y_true, y_proba)
+    # The last point (precision 1, recall 0) has no threshold.
+    rows = np.column_stack([thresholds, precision[:-1], recall[:-1]])
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savetxt(path, rows, delimiter=",", header="threshold,precision,recall",
+               comments="", fmt="%.6g")
+    return path
+
+
+def _init_worker(texts, labels):
+    _worker_data["texts"], _worker_data["labels"] = texts, labels
+
+
+def _run_fold(fold, train_idx, val_idx, featurizer_params, C, cache_args):
+    from .feature_cache import featurize_splits
+    from .features import TextFeaturizer
+    from .model import SpamClassifier
+
+    texts, labels = _worker_data["texts"], _worker_data["labels"]
+    start = time.perf_counter()
+    featurizer = TextFeaturizer(**featurizer_params)
+    split_texts = {"train": [texts[i] for i in train_idx], "val": [texts[i] for i in val_idx]}
+    X = featurize_splits(featurizer, split_texts, **cache_args)
+    classifier = SpamClassifier(C=C, class_weight="balanced").fit(X["train"], labels[train_idx])
+    scores = classifier.score(X["val"])
+    return fold, scores.labels, scores.probabilities, time.perf_counter() - start
+
+
+def cross_validate(n_splits=5, max_features=10000, ngram_range=(1, 2), C=1.0, backend="tfidf",
+                   n_bits=18, test_size=0.15, val_size=0.15, dataset=None, use_cache=True,
+                   workers=None, seed=42, n_resamples=1000, results_dir=RESULTS_DIR):
+    """Stratified k-fold CV over train + val, folds fitted in parallel.
+
+    Writes ``results_dir/cv.json`` (per-fold metrics, their mean and
+    standard deviation, and bootstrap CIs of the out-of-fold predictions)
+    and ``pr_curve_cv.csv``; returns the ``cv.json`` dict.
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    from .data import SpamDataset
+    from .feature_cache import FeatureCache
+    from .model import evaluation_metrics
+
+    dataset = dataset or SpamDataset(use_cache=use_cache)
+    train, val, _ = dataset.load_split(test_size=test_size, val_size=val_size)
+    texts = train["text"].tolist() + val["text"].tolist()
+    labels = np.concatenate([train["label"].to_numpy(), val["label"].to_numpy()])
+    featurizer_params = {"max_features": max_features, "ngram_range": tuple(ngram_range),
+                         "backend": backend, "n_bits": n_bits}
+    folds = list(StratifiedKFold(n_splits, shuffle=True, random_state=seed).split(texts, labels))
+
+    start = time.perf_counter()
+    proba = np.empty(len(texts))
+    pred = np.empty(len(texts), dtype=labels.dtype)
+    fold_rows = [None] * n_splits
+    workers = min(workers or os.cpu_count() or 1, n_splits)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(texts, labels)) as pool:
+        futures = []
+        for fold, (train_idx, val_idx) in enumerate(folds):
+            cache_args = {"dataset_key": None, "split_params": None, "cache": None}
+            if use_cache:
+                cache_args = {
+                    "dataset_key": dataset.cache_key(),
+                    "split_params": [test_size, val_size, 42, "cv", n_splits, seed, fold],
+                    "cache": FeatureCache(dataset.cache_dir),
+                }
+            futures.append(pool.submit(_run_fold, fold, train_idx, val_idx,
+                                       featurizer_params, C, cache_args))
+        for future in futures:
+            fold, fold_pred, fold_proba, seconds = future.result()
+            val_idx = folds[fold][1]
+            pred[val_idx], proba[val_idx] = fold_pred, fold_proba
+            metrics = evaluation_metrics(labels[val_idx], fold_pred, fold_proba)
+            fold_rows[fold] = dict(metrics, fold=fold, n_val=len(val_idx), seconds=seconds)
+
+    per_metric = {m: np.array([row[m] for row in fold_rows]) for m in METRICS}
+    results_dir = Path(results_dir)
+    report = {
+        "n_splits": n_splits,
+        "n_messages": len(texts),
+        "params": dict(featurizer_params, C=C, test_size=test_size, val_size=val_size,
+                       seed=seed),
+        "seconds": time.perf_counter() - start,
+        "folds": fold_rows,
+        "mean": {m: float(v.mean()) for m, v in per_metric.items()},
+        "std": {m: float(v.std(ddof=1)) if n_splits > 1 else 0.0
+                for m, v in per_metric.items()},
+        "out_of_fold_ci": bootstrap_ci(labels, proba, pred, n_resamples=n_resamples,
+                                       seed=seed),
+        "pr_curve": str(write_pr_curve(results_dir / "pr_curve_cv.csv", labels, proba)),
+    }
+    write_metrics(report, results_dir / CV_FILE)
+    return report
@@ -0,0 +1,175 @@
+"""Token-level explanations for the linear tfidf pipelines.
+
+For a linear model the margin of a message is ``intercept + sum_j x_j *
+coef_j``, so ``x_j * coef_j`` is exactly how much term ``j`` pushed that
+message towards spam (positive) or ham (negative). ``Explainer`` computes
+these contributions for a whole batch as one sparse element-wise product
+and picks every row's top-k terms with a single sort over the non-zeros;
+term names are decoded only for the entries it returns.
+
+One ``Explainer`` is built per loaded pipeline (``explainer_for``) and keeps
+the coefficient order for ``top_tokens``, so nothing vocabulary-sized is
+rebuilt per request.
+"""
+import weakref
+from typing import List, NamedTuple, Tuple
+
+import numpy as np
+
+from .tokenizer import tokenizer_for
+
+_explainers = weakref.WeakKeyDictionary()
+
+
+class Explanation(NamedTuple):
+    """Why one message scored as it did; token lists are strongest first."""
+    margin: float
+    spam_tokens: List[Tuple[str, float]]
+    ham_tokens: List[Tuple[str, float]]
+
+
+def _top_k_per_row(values, rows, k):
+    """Positions of the ``k`` largest ``values`` of each row, grouped by row."""
+    by_value = np.argsort(-values)
+    order = by_value[np.argsort(rows[by_value], kind="stable")]
+    sorted_rows = rows[order]
+    starts = np.searchsorted(sorted_rows, sorted_rows, side="left")
+    return order[np.arange(len(order)) - starts < k]
+
+
+class Explainer:
+    """Per-message term contributions for a fitted ``tfidf`` + linear ``clf``."""
+
+    def __init__(self, vectorizer, coef, intercept):
+        self.vectorizer = vectorizer
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self._order = None
+        self._names = None
+
+    @classmethod
+    def from_pipeline(cls, pipe):
+        """Build from a pipeline with ``tfidf`` and binary linear ``clf`` steps.
+
+        Raises ``ValueError`` for pipelines without per-term weights (e.g.
+        the HAM fallback).
+        """
+        steps = getattr(pipe, "named_steps", {})
+        vectorizer, clf = steps.get("tfidf"), steps.get("clf")
+        coef = getattr(clf, "coef_", None)
+        if vectorizer is None or coef is None or np.shape(coef)[0] != 1:
+            raise ValueError("Explanations need a tfidf step and a binary linear classifier")
+        return cls(vectorizer, np.asarray(coef)[0], np.ravel(clf.intercept_)[0])
+
+    def _term_names(self):
+        """Column -> term (indexable), or None when columns are hashed."""
+        from .artifact import MappedTfidfVectorizer
+        from .features import HashingTfidfVectorizer
+
+        if self._names is None:
+            if isinstance(self.vectorizer, MappedTfidfVectorizer):
+                # Decoded on demand from the mapped string table.
+                self._names = self.vectorizer.vocabulary
+            elif isinstance(self.vectorizer, HashingTfidfVectorizer):
+                return None
+            else:
+                self._names = self.vectorizer.get_feature_names_out()
+        return self._names
+
+    def _names_of(self, cols, texts):
+        """Term names of ``cols`` (hashed columns are named from ``texts``)."""
+        names = self._term_names()
+        if isinstance(names, np.ndarray):
+            return names[cols].tolist()
+        if names is None:
+            names = self._hashed_names(np.unique(cols), texts)
+        else:
+            names = {j: names[j] for j in np.unique(cols).tolist()}
+        return [names[j] for j in cols.tolist()]
+
+    def _hashed_names(self, wanted, texts):
+        """Column -> term for the ``wanted`` hashed columns, from the batch's terms."""
+        from sklearn.feature_extraction import FeatureHasher
+
+        tokenizer = tokenizer_for(vars(self.vectorizer))
+        if tokenizer is not None:
+            # ``count`` reports each distinct n-gram of the batch once.
+            terms = []
+            tokenizer.count(texts, lambda term: terms.append(term) or -1)
+        else:
+            analyze = self.vectorizer.build_analyzer()
+            terms = list(dict.fromkeys(term for text in texts for term in analyze(text)))
+        # Same columns as HashingVectorizer(alternate_sign=False), hashed in one call.
+        hasher = FeatureHasher(len(self.coef), input_type="string", alternate_sign=False)
+        cols = hasher.transform([term] for term in terms).indices
+        names = {}
+        for j in np.flatnonzero(np.isin(cols, wanted)).tolist():
+            names.setdefault(int(cols[j]), terms[j])
+        return names
+
+    def top_tokens(self, n=15, label="spam"):
+        """The ``n`` terms with the largest global weight towards ``label``."""
+        if label not in ("spam", "ham"):
+            raise ValueError(f"label must be 'spam' or 'ham', not {label!r}")
+        if self._term_names() is None:
+            raise ValueError("Hashed features have no global term names")
+        if self._order is None:
+            self._order = np.argsort(self.coef, kind="stable")
+        cols = self._order[::-1][:n] if label == "spam" else self._order[:n]
+        return list(zip(self._names_of(cols, ()), self.coef[cols].tolist()))
+
+    def contributions(self, X):
+        """``X * coef`` as a CSR matrix: each term's share of each margin."""
+        C = X.tocsr(copy=True)
+        C.data *= self.coef[C.indices]
+        return C
+
+    def explain_matrix(self, X, k=5, texts=None):
+        """``Explanation`` per row of a feature matrix ``X``.
+
+        ``texts`` is needed only to name hashed columns.
+        """
+        C = self.contributions(X)
+        margins = np.asarray(C.sum(axis=1)).ravel() + self.intercept
+        rows = np.repeat(np.arange(C.shape[0]), np.diff(C.indptr))
+        n_rows = C.shape[0]
+        tops = []
+        for sign in (1.0, -1.0):
+            values = sign * C.data
+            keep = np.flatnonzero(values > 0)
+            tops.append(keep[_top_k_per_row(values[keep], rows[keep], k)])
+        # Name the picked columns of both lists in one go.
+        names = self._names_of(C.indices[np.concatenate(tops)], texts or [])
+        picked = []
+        for top in tops:
+            pairs = list(zip(names[:len(top)], C.data[top].tolist()))
+            del names[:len(top)]
+            bounds = np.zeros(n_rows + 1, dtype=np.int64)
+            np.cumsum(np.bincount(rows[top], minlength=n_rows), out=bounds[1:])
+            bounds = bounds.tolist()
+            picked.append([pairs[a:b] for a, b in zip(bounds[:-1], bounds[1:])])
+        return [Explanation(m, spam, ham) for m, spam, ham in zip(margins.tolist(), *picked)]
+
+    def explain(self, texts, k=5):
+        """Featurize ``texts`` once and explain every message."""
+        texts = list(texts)
+        return self.explain_matrix(self.vectorizer.transform(texts), k=k, texts=texts)
+
+
+def explainer_for(pipe):
+    """The cached ``Explainer`` for ``pipe`` (one per loaded model version)."""
+    try:
+        return _explainers[pipe]
+    except KeyError:
+        pass
+    explainer = _explainers[pipe] = Explainer.from_pipeline(pipe)
+    return explainer
+
+
+def explain_texts(texts, k=5, pipe=None):
+    """Explain ``texts`` with ``pipe`` or the currently served pipeline."""
+    if pipe is None:
+        from .pipeline import get_pipeline
+
+        pipe = get_pipeline()
+    return explainer_for(pipe).explain(texts, k=k)
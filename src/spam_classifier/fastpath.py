@@ -0,0 +1,179 @@
+"""Fast-path linear scorer for single messages and tiny batches.
+
+For one SMS, ``pipe.predict_proba([text])`` spends most of its time in
+sklearn input validation and sparse-matrix construction. ``LinearScorer``
+instead tokenizes with the fitted vectorizer's analyzer, looks up each term's
+column, and accumulates the TF-IDF weight, L2 norm and coefficient dot
+product directly over the handful of non-zero terms.
+"""
+import math
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.utils import murmurhash3_32
+
+from .artifact import MappedTfidfVectorizer
+from .features import HashingTfidfVectorizer
+from .model import ScoreResult, is_log_loss_model, sigmoid
+
+
+def _sigmoid(m):
+    if m >= 0:
+        return 1.0 / (1.0 + math.exp(-m))
+    e = math.exp(m)
+    return e / (1.0 + e)
+
+
+def _as_sequence(arr, max_list=1 << 17):
+    """Plain float list for vocab-sized arrays (indexing numpy scalars one at
+    a time is slow); wide hashed arrays stay numpy to avoid a large copy."""
+    arr = np.asarray(arr, dtype=float)
+    return arr.tolist() if arr.size <= max_list else arr
+
+
+def _column_lookup(vectorizer):
+    """Return ``term -> column or None`` for a fitted vectorizer."""
+    if isinstance(vectorizer, MappedTfidfVectorizer):
+        index = vectorizer.vocabulary.index
+
+        def lookup(term):
+            j = index(term)
+            return j if j >= 0 else None
+        return lookup
+    if isinstance(vectorizer, HashingTfidfVectorizer):
+        n_features = 2 ** vectorizer.n_bits
+
+        def lookup(term):
+            # Same column as HashingVectorizer(alternate_sign=False).
+            return abs(murmurhash3_32(term, seed=0)) % n_features
+        return lookup
+    if isinstance(vectorizer, TfidfVectorizer):
+        return vectorizer.vocabulary_.get
+    raise ValueError(f"No fast path for vectorizer {type(vectorizer).__name__}")
+
+
+def _weighting(vectorizer):
+    """Return (binary, sublinear_tf, norm, idf-or-None) for a vectorizer."""
+    if isinstance(vectorizer, MappedTfidfVectorizer):
+        params = vectorizer._model.params
+        return params["binary"], params["sublinear_tf"], params["norm"], vectorizer.idf_
+    if isinstance(vectorizer, HashingTfidfVectorizer):
+        return False, vectorizer.sublinear_tf, vectorizer.norm, vectorizer.idf_
+    idf = vectorizer.idf_ if vectorizer.use_idf else None
+    return vectorizer.binary, vectorizer.sublinear_tf, vectorizer.norm, idf
+
+
+class LinearScorer:
+    """Score texts with a fitted ``tfidf`` + binary logistic ``clf`` pipeline.
+
+    Results match ``score_texts`` to floating-point tolerance. Raises
+    ``ValueError`` from ``from_pipeline`` if the pipeline cannot be scored
+    this way (e.g. the HAM fallback), so callers can keep the sklearn path.
+    """
+
+    def __init__(self, analyzer, lookup, idf, coef, intercept, classes,
+                 binary=False, sublinear_tf=False, norm="l2"):
+        if norm not in (None, "l1", "l2"):
+            raise ValueError(f"Unsupported norm {norm!r}")
+        self._analyze = analyzer
+        self._lookup = lookup
+        self._idf = None if idf is None else _as_sequence(idf)
+        self._coef = _as_sequence(coef)
+        self._intercept = float(intercept)
+        self.classes_ = np.asarray(classes)
+        self._spam_is_positive = self.classes_[1] == 1
+        self._binary = binary
+        self._sublinear_tf = sublinear_tf
+        self._norm = norm
+
+    @classmethod
+    def from_pipeline(cls, pipe):
+        """Build a scorer from a fitted pipeline's ``tfidf`` and ``clf`` steps."""
+        if len(pipe.steps) != 2:
+            raise ValueError("Fast path needs a single vectorizer step and a classifier")
+        vectorizer, clf = pipe.steps[0][1], pipe.steps[1][1]
+        if not is_log_loss_model(clf):
+            raise ValueError(f"No fast path for classifier {type(clf).__name__}")
+        if np.shape(clf.coef_)[0] != 1 or len(clf.classes_) != 2:
+            raise ValueError("Fast path needs a binary linear model")
+        lookup = _column_lookup(vectorizer)
+        binary, sublinear_tf, norm, idf = _weighting(vectorizer)
+        return cls(
+            vectorizer.build_analyzer(), lookup, idf, np.asarray(clf.coef_)[0],
+            np.ravel(clf.intercept_)[0], clf.classes_,
+            binary=binary, sublinear_tf=sublinear_tf, norm=norm,
+        )
+
+    def margin(self, text):
+        """Decision margin for a single message."""
+        lookup, idf, coef = self._lookup, self._idf, self._coef
+        counts = {}
+        for term in self._analyze(text):
+            j = lookup(term)
+            if j is not None:
+                counts[j] = counts.get(j, 0) + 1
+        dot = 0.0
+        norm_acc = 0.0
+        for j, tf in counts.items():
+            if self._binary:
+                tf = 1.0
+            elif self._sublinear_tf:
+                tf = math.log(tf) + 1.0
+            w = tf * idf[j] if idf is not None else float(tf)
+            if w == 0.0:
+                continue
+            dot += w * coef[j]
+            norm_acc += w * w if self._norm == "l2" else abs(w)
+        if self._norm and norm_acc > 0.0:
+            dot /= math.sqrt(norm_acc) if self._norm == "l2" else norm_acc
+        return dot + self._intercept
+
+    def features(self, texts):
+        """Tf-idf entries of a (small) batch as ``(rows, columns, weights)`` arrays.
+
+        Lets callers apply other coefficients to the same features; weights
+        are normalized like the vectorizer's output.
+        """
+        lookup, idf = self._lookup, self._idf
+        rows, cols, weights = [], [], []
+        for i, text in enumerate(texts):
+            counts = {}
+            for term in self._analyze(text):
+                j = lookup(term)
+                if j is not None:
+                    counts[j] = counts.get(j, 0) + 1
+            for j, tf in counts.items():
+                if self._binary:
+                    tf = 1.0
+                elif self._sublinear_tf:
+                    tf = math.log(tf) + 1.0
+                w = tf * idf[j] if idf is not None else float(tf)
+                if w != 0.0:
+                    rows.append(i)
+                    cols.append(j)
+                    weights.append(w)
+        rows = np.array(rows, dtype=np.intp)
+        weights = np.array(weights, dtype=float)
+        if self._norm and len(weights):
+            if self._norm == "l2":
+                norms = np.sqrt(np.bincount(rows, weights * weights))
+            else:
+                norms = np.bincount(rows, np.abs(weights))
+            weights /= norms[rows]
+        return rows, np.array(cols, dtype=np.intp), weights
+
+    def score_one(self, text):
+        """Return ``(label, spam_probability, margin)`` for one message."""
+        m = self.margin(text)
+        p = _sigmoid(m)
+        label = self.classes_[1] if m > 0 else self.classes_[0]
+        return label, (p if self._spam_is_positive else 1.0 - p), m
+
+    def score(self, texts):
+        """Score a (small) batch message by message; returns a ``ScoreResult``."""
+        margins = np.array([self.margin(t) for t in texts], dtype=float)
+        probs = sigmoid(margins)
+        labels = self.classes_[(margins > 0).astype(int)]
+        if not self._spam_is_positive:
+            probs = 1.0 - probs
+        return ScoreResult(labels, probs, margins)
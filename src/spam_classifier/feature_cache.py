@@ -0,0 +1,162 @@
+"""On-disk cache of fitted featurizers and their feature matrices.
+
+An entry is keyed by the dataset (raw file hash), the split parameters and
+the ``TextFeaturizer`` parameters, so runs that only change classifier
+settings skip vectorization entirely. Each entry is a directory::
+
+    features/<key>/vectorizer.joblib       fitted vectorizer
+    features/<key>/<split>.data.npy        CSR arrays per split, loaded
+    features/<key>/<split>.indices.npy     with mmap_mode="r" (zero-copy,
+    features/<key>/<split>.indptr.npy      shared through the page cache)
+    features/<key>/<split>.json            shape and array lengths
+
+Splits are added to an entry as they are first needed. Files are written
+under temporary names and renamed into place, so a crashed or concurrent
+run never leaves a half-written matrix behind; a read-only cache directory
+just disables caching.
+"""
+import hashlib
+import json
+import os
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+from . import instrumentation
+
+# Bump when the featurizers or the entry layout change.
+FEATURE_CACHE_VERSION = 1
+CSR_ARRAYS = ("data", "indices", "indptr")
+
+
+def feature_cache_key(dataset_key, split_params, featurizer_params):
+    """Hex key for one (dataset, split, featurizer config) combination."""
+    import sklearn
+
+    payload = json.dumps(
+        [FEATURE_CACHE_VERSION, sklearn.__version__, dataset_key, split_params, featurizer_params],
+        sort_keys=True, default=list,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:24]
+
+
+def _write_atomic(path, write):
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def _save_npy(path, array):
+    # np.save appends ".npy" to names without it; write through a handle.
+    with open(path, "wb") as f:
+        np.save(f, array)
+
+
+class FeatureCache:
+    """Fitted vectorizers and memory-mapped CSR matrices under ``cache_dir``."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir) / "features"
+
+    def entry_dir(self, key):
+        return self.cache_dir / key
+
+    def load_vectorizer(self, key):
+        """The fitted vectorizer for ``key``, or None."""
+        import joblib
+
+        path = self.entry_dir(key) / "vectorizer.joblib"
+        try:
+            return joblib.load(path)
+        except (OSError, EOFError, ValueError):
+            return None
+
+    def save_vectorizer(self, key, vectorizer):
+        import joblib
+
+        try:
+            self.entry_dir(key).mkdir(parents=True, exist_ok=True)
+            _write_atomic(self.entry_dir(key) / "vectorizer.joblib",
+                          lambda tmp: joblib.dump(vectorizer, tmp))
+        except OSError:
+            pass
+
+    def load_matrix(self, key, split):
+        """The cached CSR matrix of ``split``, memory-mapped, or None."""
+        import scipy.sparse as sp
+
+        entry = self.entry_dir(key)
+        try:
+            meta = json.loads((entry / f"{split}.json").read_text())
+            arrays = [np.load(entry / f"{split}.{name}.npy", mmap_mode="r")
+                      for name in CSR_ARRAYS]
+        except (OSError, ValueError, EOFError):
+            return None
+        if [len(a) for a in arrays] != meta["lengths"]:
+            return None
+        X = sp.csr_matrix(tuple(arrays), shape=tuple(meta["shape"]), copy=False)
+        # Saved canonical; without the flag scipy would try to sort the
+        # read-only arrays in place.
+        X.has_canonical_format = True
+        return X
+
+    def save_matrix(self, key, split, X):
+        """Store ``X`` in canonical CSR form (sorted, no duplicates) and return that form."""
+        entry = self.entry_dir(key)
+        X = X.tocsr()
+        if not X.has_canonical_format:
+            X = X.copy()
+            X.sum_duplicates()
+        try:
+            entry.mkdir(parents=True, exist_ok=True)
+            for name in CSR_ARRAYS:
+                array = np.ascontiguousarray(getattr(X, name))
+                _write_atomic(entry / f"{split}.{name}.npy", lambda tmp: _save_npy(tmp, array))
+            # The metadata goes last: it is what marks the split as complete.
+            meta = {"shape": list(X.shape), "lengths": [len(getattr(X, n)) for n in CSR_ARRAYS]}
+            _write_atomic(entry / f"{split}.json", lambda tmp: tmp.write_text(json.dumps(meta)))
+        except OSError:
+            pass
+        return X
+
+
+def featurize_splits(featurizer, texts, dataset_key, split_params, cache=None):
+    """Fit ``featurizer`` on ``texts["train"]`` and transform every split.
+
+    ``texts`` maps split names to sequences of texts. With a ``cache``
+    (``FeatureCache``), the fitted vectorizer and each split's matrix are
+    reused when present and stored when not; on a hit ``featurizer`` gets
+    the cached vectorizer. Returns ``{split: csr_matrix}``.
+    """
+    if cache is None:
+        X = {"train": featurizer.fit_transform(texts["train"])}
+        for split, split_texts in texts.items():
+            if split != "train":
+                X[split] = featurizer.transform(split_texts)
+        return X
+
+    key = feature_cache_key(dataset_key, split_params, featurizer.params)
+    vectorizer = cache.load_vectorizer(key)
+    X = {}
+    if vectorizer is None:
+        instrumentation.inc("feature_cache_misses", split="train")
+        X["train"] = cache.save_matrix(key, "train", featurizer.fit_transform(texts["train"]))
+        cache.save_vectorizer(key, featurizer.vectorizer)
+    else:
+        featurizer.vectorizer = vectorizer
+    for split, split_texts in texts.items():
+        if split in X:
+            continue
+        matrix = cache.load_matrix(key, split)
+        if matrix is None:
+            instrumentation.inc("feature_cache_misses", split=split)
+            matrix = cache.save_matrix(key, split, featurizer.transform(split_texts))
+        else:
+            instrumentation.inc("feature_cache_hits", split=split)
+        X[split] = matrix
+    return X
@@ -1,5 +1,167 @@
 """Feature extraction for text classification."""
-from sklearn.feature_extraction.text import TfidfVectorizer
+import numpy as np
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+from . import instrumentation
+from .tokenizer import tokenizer_for
+
+BACKENDS = ("tfidf", "hashing")
+
+
+class HashingTfidfVectorizer(TransformerMixin, BaseEstimator):
+    """TF-IDF over hashed n-grams: no vocabulary, only a fitted IDF vector.
+
+    Tokens are mapped to ``2 ** n_bits`` columns with a stateless hash, so
+    transform needs nothing but ``idf_`` and can run in any process. Columns
+    whose document frequency falls outside ``[min_df, max_df]`` get a zero
+    IDF weight, which drops them just like the vocabulary cut in
+    ``TfidfVectorizer``.
+    """
+
+    def __init__(
+        self,
+        n_bits=18,
+        ngram_range=(1, 2),
+        min_df=1,
+        max_df=1.0,
+        lowercase=True,
+        norm="l2",
+        sublinear_tf=False,
+    ):
+        self.n_bits = n_bits
+        self.ngram_range = ngram_range
+        self.min_df = min_df
+        self.max_df = max_df
+        self.lowercase = lowercase
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+
+    def _hasher(self):
+        return HashingVectorizer(
+            n_features=2 ** self.n_bits,
+            ngram_range=self.ngram_range,
+            lowercase=self.lowercase,
+            alternate_sign=False,
+            norm=None,
+        )
+
+    def build_analyzer(self):
+        """Return the callable that turns a document into n-gram strings."""
+        return self._hasher().build_analyzer()
+
+    def hash_counts(self, texts):
+        """Raw hashed n-gram counts (no IDF, no normalisation)."""
+        with instrumentation.timer("tokenize"):
+            return self._hasher().transform(texts)
+
+    def fit_document_frequencies(self, df, n_docs):
+        """Set IDF weights from per-column document frequencies.
+
+        Lets incremental training keep running counts instead of refitting.
+        """
+        max_df = self.max_df if isinstance(self.max_df, int) else self.max_df * n_docs
+        min_df = self.min_df if isinstance(self.min_df, int) else self.min_df * n_docs
+        idf = np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+        idf[(df < min_df) | (df > max_df)] = 0.0
+        self.idf_ = idf
+        return self
+
+    def _fit_counts(self, counts):
+        df = np.bincount(counts.indices, minlength=counts.shape[1])
+        return self.fit_document_frequencies(df, counts.shape[0])
+
+    def weight_counts(self, counts):
+        """Apply TF scaling, IDF weights and normalisation to hashed counts."""
+        with instrumentation.timer("tfidf_weight"):
+            counts = counts.astype(np.float64)
+            if self.sublinear_tf:
+                np.log(counts.data, counts.data)
+                counts.data += 1.0
+            X = counts @ sp.diags(self.idf_, format="csr")
+            X.eliminate_zeros()
+            if self.norm:
+                X = normalize(X, norm=self.norm, copy=False)
+            return X
+
+    def fit(self, texts, y=None):
+        """Learn IDF weights for the hashed n-gram columns."""
+        return self._fit_counts(self.hash_counts(texts))
+
+    def transform(self, texts):
+        """Convert texts to a TF-IDF matrix with ``2 ** n_bits`` columns."""
+        return self.weight_counts(self.hash_counts(texts))
+
+    def fit_transform(self, texts, y=None):
+        """Learn IDF weights and transform, hashing the texts only once."""
+        counts = self.hash_counts(texts)
+        return self._fit_counts(counts).weight_counts(counts)
+
+
+class TokenizedTfidfVectorizer(TfidfVectorizer):
+    """``TfidfVectorizer`` that counts n-grams with the shared ``Tokenizer``.
+
+    Parameters and output are exactly those of ``TfidfVectorizer``; settings
+    the tokenizer does not cover fall back to the sklearn analyzer.
+    """
+
+    def _count_vocab(self, raw_documents, fixed_vocab):
+        docs = raw_documents if isinstance(raw_documents, list) else list(raw_documents)
+        tokenizer = tokenizer_for(vars(self))
+        if tokenizer is None or not all(type(doc) is str for doc in docs):
+            return super()._count_vocab(docs, fixed_vocab)
+        if fixed_vocab:
+            vocabulary = self.vocabulary_
+            get = vocabulary.get
+
+            def lookup(term):
+                return get(term, -1)
+        else:
+            # New terms get the next column, like sklearn's defaultdict;
+            # fit_transform sorts and prunes the vocabulary afterwards.
+            vocabulary = {}
+            setdefault = vocabulary.setdefault
+
+            def lookup(term):
+                return setdefault(term, len(vocabulary))
+        with instrumentation.timer("tokenize"):
+            X = tokenizer.count_matrix(docs, lookup, lambda: len(vocabulary), dtype=self.dtype)
+        if not vocabulary:
+            raise ValueError("empty vocabulary; perhaps the documents only contain stop words")
+        return vocabulary, X
+
+
+def build_vectorizer(
+    backend="tfidf",
+    max_features=10000,
+    ngram_range=(1, 2),
+    min_df=1,
+    max_df=0.95,
+    n_bits=18,
+):
+    """Create the vectorizer for ``backend`` (``"tfidf"`` or ``"hashing"``).
+
+    ``max_features`` only applies to the vocabulary-based ``"tfidf"``
+    backend; ``n_bits`` only applies to ``"hashing"``.
+    """
+    if backend == "tfidf":
+        return TokenizedTfidfVectorizer(
+            max_features=max_features,
+            ngram_range=ngram_range,
+            min_df=min_df,
+            max_df=max_df
+        )
+    if backend == "hashing":
+        return HashingTfidfVectorizer(
+            n_bits=n_bits,
+            ngram_range=ngram_range,
+            min_df=min_df,
+            max_df=max_df
+        )
+    raise ValueError(f"Unknown featurizer backend {backend!r}; expected one of {BACKENDS}")
+
 
 class TextFeaturizer:
     """Convert text to TF-IDF features."""
@@ -9,13 +171,27 @@ class TextFeaturizer:
         max_features=10000,
         ngram_range=(1, 2),
         min_df=1,
-        max_df=0.95
+        max_df=0.95,
+        backend="tfidf",
+        n_bits=18
     ):
-        self.vectorizer = TfidfVectorizer(
+        self.backend = backend
+        # Everything that determines the fitted vectorizer (feature cache key).
+        self.params = {
+            "backend": backend,
+            "max_features": max_features,
+            "ngram_range": list(ngram_range),
+            "min_df": min_df,
+            "max_df": max_df,
+            "n_bits": n_bits,
+        }
+        self.vectorizer = build_vectorizer(
+            backend=backend,
             max_features=max_features,
             ngram_range=ngram_range,
             min_df=min_df,
-            max_df=max_df
+            max_df=max_df,
+            n_bits=n_bits
         )
     
     def fit(self, texts):
@@ -25,13 +201,15 @@ class TextFeaturizer:
     
     def transform(self, texts):
         """Convert texts to TF-IDF feature matrix."""
-        return self.vectorizer.transform(texts)
+        with instrumentation.timer("featurize"):
+            return self.vectorizer.transform(texts)
     
     def fit_transform(self, texts):
         """Learn vocabulary and transform texts."""
-        return self.vectorizer.fit_transform(texts)
+        with instrumentation.timer("featurize_fit"):
+            return self.vectorizer.fit_transform(texts)
     
     @property
     def vocabulary_(self):
-        """Get the learned vocabulary."""
+        """Get the learned vocabulary (the ``"tfidf"`` backend only)."""
         return self.vectorizer.vocabulary_
\ No newline at end of file
@@ -0,0 +1,246 @@
+"""Hot-path timers, counters and latency histograms.
+
+Instrumentation is off by default; while off, ``timer()`` returns a shared
+no-op context manager and ``inc()``/``observe()`` return after one global
+check, so the hooks in the scoring and training paths cost next to nothing.
+Turn it on with ``enable()`` (or ``serve --instrument``) and read it through
+``snapshot()``, ``prometheus_text()`` or a ``PeriodicExporter``.
+
+Stage timers are histograms named ``<stage>_seconds``:
+``load_pipeline``, ``score`` (one ``score_texts`` call), ``fastpath``,
+``featurize``, ``tokenize``, ``tfidf_weight`` (hashing featurizer),
+``classify``, ``train``, ``train_fit`` and ``evaluate``.
+"""
+import bisect
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+
+PREFIX = "spam_classifier_"
+# Upper bounds in seconds; the last bucket is +Inf.
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+_enabled = False
+
+
+class Histogram:
+    """Fixed-bucket histogram (not thread-safe; ``Metrics`` holds the lock)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Estimate the ``q`` quantile by interpolating inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= rank and n:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return lower
+                return lower + (self.buckets[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def to_dict(self):
+        cumulative, total = {}, 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            total += n
+            cumulative["+Inf" if bound == float("inf") else repr(bound)] = total
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": cumulative,
+        }
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    inner = ",".join(f'{k}="{v}"' for k, v in labels)
+    return f"{name}{{{inner}}}"
+
+
+class Metrics:
+    """Thread-safe store of counters and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, n=1, labels=()):
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def observe(self, name, value):
+        with self._lock:
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = Histogram()
+            hist.observe(value)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        """Counters and histogram summaries as a JSON-serializable dict."""
+        with self._lock:
+            return {
+                "counters": {_series(n, l): v for (n, l), v in sorted(self.counters.items())},
+                "histograms": {n: h.to_dict() for n, h in sorted(self.histograms.items())},
+            }
+
+    def prometheus_text(self):
+        """Render in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), value in sorted(self.counters.items()):
+                metric = f"{PREFIX}{name}_total"
+                if metric not in typed:
+                    typed.add(metric)
+                    lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{_series(metric, labels)} {value}")
+            for name, hist in sorted(self.histograms.items()):
+                metric = f"{PREFIX}{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                for le, count in hist.to_dict()["buckets"].items():
+                    lines.append(f'{metric}_bucket{{le="{le}"}} {count}')
+                lines.append(f"{metric}_sum {hist.sum}")
+                lines.append(f"{metric}_count {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+_metrics = Metrics()
+
+
+class _Timer:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def enable():
+    """Start recording (existing values are kept)."""
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def get_metrics():
+    """Return the process-wide ``Metrics`` store."""
+    return _metrics
+
+
+def timer(stage):
+    """Context manager recording the block's duration as ``<stage>_seconds``."""
+    if not _enabled:
+        return _NULL_TIMER
+    return _Timer(f"{stage}_seconds")
+
+
+def inc(name, n=1, **labels):
+    """Add ``n`` to counter ``name`` (exported as ``<name>_total``)."""
+    if _enabled:
+        _metrics.inc(name, n, tuple(sorted(labels.items())))
+
+
+def observe(name, value):
+    if _enabled:
+        _metrics.observe(name, value)
+
+
+def snapshot():
+    return dict(_metrics.snapshot(), enabled=_enabled)
+
+
+def prometheus_text():
+    return _metrics.prometheus_text()
+
+
+def json_file_exporter(path):
+    """Exporter writing ``snapshot()`` to ``path`` atomically."""
+    path = Path(path)
+
+    def export(data):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        tmp_path.write_text(json.dumps(data, indent=2))
+        os.replace(tmp_path, path)
+    return export
+
+
+class PeriodicExporter:
+    """Call ``export(snapshot())`` every ``interval`` seconds on a daemon thread.
+
+    ``stop()`` exports one final time, so short runs (``train``, ``score``)
+    still leave a complete dump.
+    """
+
+    def __init__(self, export, interval=60.0):
+        self.export = export
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.export(snapshot())
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.export(snapshot())
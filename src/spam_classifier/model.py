@@ -1,10 +1,96 @@
-"""Spam classification model."""
+"""Spam classification model.
+
+Only numpy is imported up front; scikit-learn is imported when a classifier
+is built or evaluated, so scoring helpers stay cheap to import.
+"""
+import sys
+from typing import NamedTuple
+
 import numpy as np
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import (
-    accuracy_score, precision_score, recall_score, 
-    f1_score, roc_auc_score, confusion_matrix
-)
+
+from . import instrumentation
+
+class ScoreResult(NamedTuple):
+    """Labels, spam probabilities and decision margins for a batch."""
+
+    labels: np.ndarray
+    probabilities: np.ndarray
+    margins: np.ndarray
+
+
+def sigmoid(margins):
+    """Numerically stable logistic function (``scipy.special.expit``)."""
+    margins = np.asarray(margins, dtype=float)
+    # exp(-logaddexp(0, -m)) == 1 / (1 + exp(-m)) without overflow.
+    return np.exp(-np.logaddexp(0.0, -margins))
+
+
+def is_log_loss_model(estimator):
+    """True for a LogisticRegression or any linear model trained on log loss.
+
+    Never imports scikit-learn: an estimator can only be a
+    ``LogisticRegression`` if ``sklearn.linear_model`` is already loaded.
+    """
+    if getattr(estimator, "loss", None) == "log_loss":
+        return True
+    linear_model = sys.modules.get("sklearn.linear_model")
+    return linear_model is not None and isinstance(estimator, linear_model.LogisticRegression)
+
+
+def score_matrix(estimator, X):
+    """Score an already-vectorized batch with a single pass over ``X``.
+
+    For binary linear models the decision margin is computed once and the
+    label and spam probability are derived from it, instead of running
+    ``predict`` and ``predict_proba`` separately. Estimators without a
+    ``decision_function`` (e.g. the HAM fallback) get NaN margins.
+    """
+    with instrumentation.timer("classify"):
+        return _score_matrix(estimator, X)
+
+
+def _score_matrix(estimator, X):
+    classes = np.asarray(estimator.classes_)
+    if hasattr(estimator, "decision_function") and len(classes) == 2:
+        margins = np.asarray(estimator.decision_function(X), dtype=float).ravel()
+        labels = classes[(margins > 0).astype(int)]
+        if is_log_loss_model(estimator):
+            spam_proba = sigmoid(margins)
+        else:
+            spam_proba = estimator.predict_proba(X)[:, 1]
+        if classes[1] != 1:
+            spam_proba = 1.0 - spam_proba
+        return ScoreResult(labels, spam_proba, margins)
+
+    labels = np.asarray(estimator.predict(X))
+    spam_idx = np.flatnonzero(classes == 1)
+    try:
+        if len(spam_idx) == 0:
+            raise ValueError("estimator has no spam class")
+        spam_proba = estimator.predict_proba(X)[:, spam_idx[0]]
+    except Exception:
+        # Give 0.0 for HAM and 1.0 for SPAM if probabilities are unavailable.
+        spam_proba = (labels == 1).astype(float)
+    margins = np.full(len(labels), np.nan)
+    return ScoreResult(labels, np.asarray(spam_proba, dtype=float), margins)
+
+
+def evaluation_metrics(y_true, y_pred, y_proba):
+    """Accuracy, precision, recall, F1, ROC AUC and the confusion matrix."""
+    from sklearn.metrics import (
+        accuracy_score, precision_score, recall_score,
+        f1_score, roc_auc_score, confusion_matrix
+    )
+
+    return {
+        "accuracy": accuracy_score(y_true, y_pred),
+        "precision": precision_score(y_true, y_pred),
+        "recall": recall_score(y_true, y_pred),
+        "f1": f1_score(y_true, y_pred),
+        "roc_auc": roc_auc_score(y_true, y_proba),
+        "confusion_matrix": confusion_matrix(y_true, y_pred)
+    }
+
 
 class SpamClassifier:
     """Logistic regression classifier for spam detection."""
@@ -16,6 +102,8 @@ class SpamClassifier:
         solver="liblinear",
         random_state=42
     ):
+        from sklearn.linear_model import LogisticRegression
+
         self.model = LogisticRegression(
             C=C,
             class_weight=class_weight,
@@ -25,7 +113,8 @@ class SpamClassifier:
     
     def fit(self, X, y):
         """Train the classifier."""
-        self.model.fit(X, y)
+        with instrumentation.timer("train_fit"):
+            self.model.fit(X, y)
         return self
     
     def predict(self, X):
@@ -36,18 +125,16 @@ class SpamClassifier:
         """Get probability estimates."""
         return self.model.predict_proba(X)
     
+    def score(self, X):
+        """Get labels, spam probabilities and margins in one pass."""
+        return score_matrix(self.model, X)
+    
+    def score_texts(self, featurizer, texts):
+        """Vectorize raw ``texts`` once with a fitted ``featurizer`` and score them."""
+        return self.score(featurizer.transform(texts))
+    
     def evaluate(self, X, y_true):
         """Compute multiple evaluation metrics."""
-        y_pred = self.predict(X)
-        y_proba = self.predict_proba(X)[:, 1]  # Prob of spam
-        
-        metrics = {
-            "accuracy": accuracy_score(y_true, y_pred),
-            "precision": precision_score(y_true, y_pred),
-            "recall": recall_score(y_true, y_pred),
-            "f1": f1_score(y_true, y_pred),
-            "roc_auc": roc_auc_score(y_true, y_proba),
-            "confusion_matrix": confusion_matrix(y_true, y_pred)
-        }
-        
-        return metrics
\ No newline at end of file
+        with instrumentation.timer("evaluate"):
+            y_pred, y_proba, _ = self.score(X)
+            return evaluation_metrics(y_true, y_pred, y_proba)
\ No newline at end of file
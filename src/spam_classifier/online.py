@@ -0,0 +1,221 @@
+"""Incremental (online) training from newly labelled feedback.
+
+``OnlineTrainer`` keeps a checkpoint holding running document frequencies
+for a hashing featurizer, an ``SGDClassifier`` trained with ``partial_fit``
+and, per feedback file, the byte offset already consumed. Each run reads
+only the rows appended since the last checkpoint, in bounded chunks, so an
+update costs time proportional to the new data rather than the whole
+history, and memory proportional to one chunk.
+
+IDF weights are re-derived from the running counts before each update, so
+older updates were learned under slightly different weights; as the corpus
+grows the IDF settles and this drift becomes negligible.
+"""
+import copy
+import io
+import os
+import uuid
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.pipeline import Pipeline
+
+from .data import SpamDataset
+from .features import HashingTfidfVectorizer
+from .model import evaluation_metrics, score_matrix
+from .pipeline import MODELS_DIR, get_registry
+
+STATE_DIR = MODELS_DIR / "online"
+STATE_FILE = "online_state.joblib"
+CLASSES = np.array([0, 1])
+
+
+# Bytes read from a feedback file at a time.
+READ_SIZE = 1 << 20
+
+
+def _record_ends(data, in_quotes=False):
+    """Positions just past each CSV record in ``data``; and whether it ends quoted.
+
+    A record ends at a newline outside double quotes. ``in_quotes`` is the
+    state at the start of ``data``; an escaped ``""`` toggles it twice.
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    quoted = (np.cumsum(buf == ord('"')) + in_quotes) % 2 == 1
+    ends = np.flatnonzero((buf == ord("\n")) & ~quoted) + 1
+    return ends, bool(quoted[-1]) if len(buf) else in_quotes
+
+
+class OnlineTrainer:
+    """Hashing TF-IDF + SGD logistic regression updated with ``partial_fit``."""
+
+    def __init__(self, state_dir=None, n_bits=18, ngram_range=(1, 2), alpha=1e-5,
+                 random_state=42):
+        self.state_dir = Path(state_dir) if state_dir is not None else STATE_DIR
+        self.state_path = self.state_dir / STATE_FILE
+        self.featurizer = HashingTfidfVectorizer(n_bits=n_bits, ngram_range=ngram_range)
+        self.clf = SGDClassifier(loss="log_loss", alpha=alpha, random_state=random_state)
+        self.n_docs = 0
+        self.doc_freq = np.zeros(2 ** n_bits, dtype=np.int64)
+        self.offsets = {}
+        self.n_updates = 0
+        self.published_version = None
+
+    @classmethod
+    def load(cls, state_dir=None, **kwargs):
+        """Resume from the checkpoint in ``state_dir``, or start fresh."""
+        trainer = cls(state_dir, **kwargs)
+        if trainer.state_path.exists():
+            state = joblib.load(trainer.state_path)
+            if "n_bits" in kwargs and state["n_bits"] != kwargs["n_bits"]:
+                raise ValueError(
+                    f"Checkpoint uses n_bits={state['n_bits']}, not {kwargs['n_bits']}"
+                )
+            trainer.featurizer = state["featurizer"]
+            trainer.clf = state["clf"]
+            trainer.n_docs = state["n_docs"]
+            trainer.doc_freq = state["doc_freq"]
+            trainer.offsets = state["offsets"]
+            trainer.n_updates = state["n_updates"]
+            trainer.published_version = state["published_version"]
+        return trainer
+
+    def save(self):
+        """Atomically write the checkpoint."""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        state = {
+            "n_bits": self.featurizer.n_bits,
+            "featurizer": self.featurizer,
+            "clf": self.clf,
+            "n_docs": self.n_docs,
+            "doc_freq": self.doc_freq,
+            "offsets": self.offsets,
+            "n_updates": self.n_updates,
+            "published_version": self.published_version,
+        }
+        tmp_path = self.state_path.with_name(f".{STATE_FILE}.{uuid.uuid4().hex}.tmp")
+        joblib.dump(state, tmp_path)
+        os.replace(tmp_path, self.state_path)
+
+    def _refresh_idf(self):
+        self.featurizer.fit_document_frequencies(self.doc_freq, self.n_docs)
+
+    def partial_fit(self, texts, labels):
+        """Update document frequencies, then the classifier, with one batch."""
+        texts = list(texts)
+        if not texts:
+            return self
+        counts = self.featurizer.hash_counts(texts)
+        self.doc_freq += np.bincount(counts.indices, minlength=len(self.doc_freq))
+        self.n_docs += len(texts)
+        self._refresh_idf()
+        X = self.featurizer.weight_counts(counts)
+        self.clf.partial_fit(X, np.asarray(labels), classes=CLASSES)
+        self.n_updates += 1
+        return self
+
+    def fit_chunks(self, chunks):
+        """``partial_fit`` on each preprocessed (label, text) DataFrame chunk."""
+        rows = 0
+        for chunk in chunks:
+            self.partial_fit(chunk["text"], chunk["label"])
+            rows += len(chunk)
+        return rows
+
+    def fit_stream(self, dataset):
+        """One pass over the train split of a ``StreamingDataset``."""
+        return self.fit_chunks(dataset.chunks("train"))
+
+    def evaluate_chunks(self, chunks):
+        """Evaluation metrics over preprocessed chunks.
+
+        Only labels and scores are kept, never the texts or feature rows.
+        """
+        self._refresh_idf()
+        y_true, y_pred, y_proba = [], [], []
+        for chunk in chunks:
+            X = self.featurizer.transform(chunk["text"])
+            labels, probs, _ = score_matrix(self.clf, X)
+            y_true.append(chunk["label"].to_numpy())
+            y_pred.append(labels)
+            y_proba.append(probs)
+        if not y_true:
+            raise ValueError("No rows to evaluate")
+        return evaluation_metrics(np.concatenate(y_true), np.concatenate(y_pred),
+                                  np.concatenate(y_proba))
+
+    def _start_offset(self, path):
+        """``(key, offset)``: where the unread part of ``path`` begins."""
+        key = str(Path(path).resolve())
+        offset = self.offsets.get(key, 0)
+        if os.path.getsize(path) < offset:
+            # File was truncated or rotated: start over.
+            offset = 0
+        return key, offset
+
+    def _read_new_rows(self, path, offset, batch_size):
+        """Yield ``(rows, end offset)`` for the records of ``path`` after ``offset``.
+
+        The file is read in ``READ_SIZE`` blocks and parsed ``batch_size``
+        records at a time. Only complete CSV records are consumed (a quoted
+        text may span lines), so a file that is still being appended to is
+        picked up correctly next time.
+        """
+        pending, ends, in_quotes = b"", [], False
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while True:
+                block = f.read(READ_SIZE)
+                if block:
+                    block_ends, in_quotes = _record_ends(block, in_quotes)
+                    ends.extend((block_ends + len(pending)).tolist())
+                    pending += block
+                while len(ends) >= batch_size or (ends and not block):
+                    end = ends[min(batch_size, len(ends)) - 1]
+                    df = pd.read_csv(io.BytesIO(pending[:end]), names=["label", "text"])
+                    df["text"] = df["text"].fillna("").astype(str)
+                    offset += end
+                    yield SpamDataset().preprocess(df), offset
+                    pending = pending[end:]
+                    ends = [e - end for e in ends[batch_size:]]
+                if not block:
+                    return
+
+    def ingest(self, paths, batch_size=10000):
+        """Train on rows appended to each feedback CSV since the checkpoint.
+
+        Feedback files use the raw dataset format (``ham|spam,text`` without a
+        header). They are read and trained on ``batch_size`` rows at a time.
+        Returns the number of new rows consumed.
+        """
+        total = 0
+        for path in paths:
+            key, offset = self._start_offset(path)
+            self.offsets[key] = offset
+            for df, offset in self._read_new_rows(path, offset, batch_size):
+                total += self.fit_chunks([df])
+                self.offsets[key] = offset
+        return total
+
+    def to_pipeline(self):
+        """Snapshot the current model as a servable ``tfidf`` + ``clf`` pipeline.
+
+        The snapshot is a copy, so further updates never mutate a model that
+        is already being served.
+        """
+        if self.n_docs == 0:
+            raise ValueError("Nothing has been trained yet")
+        self._refresh_idf()
+        return Pipeline([
+            ("tfidf", copy.deepcopy(self.featurizer)),
+            ("clf", copy.deepcopy(self.clf)),
+        ])
+
+    def publish(self, registry=None):
+        """Publish the current model through the registry; returns its version."""
+        registry = registry or get_registry()
+        self.published_version = registry.publish(self.to_pipeline())
+        return self.published_version
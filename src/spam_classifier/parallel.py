@@ -0,0 +1,83 @@
+"""Multi-process batch scoring with one pipeline loaded per worker."""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .cache import PredictionCache
+from .model import ScoreResult
+from .pipeline import load_pipeline, score_texts
+
+# Pipeline (and optional cache) held by each worker process; set once by
+# ``_init_worker``.
+_worker_pipe = None
+_worker_cache = None
+
+
+def _init_worker(model_path, pipe, cache_size):
+    global _worker_pipe, _worker_cache
+    _worker_pipe = pipe if pipe is not None else load_pipeline(model_path)
+    _worker_cache = PredictionCache(cache_size) if cache_size else None
+
+
+def _score_in_worker(texts):
+    return score_texts(texts, _worker_pipe, cache=_worker_cache)
+
+
+class ParallelScorer:
+    """Score text batches across a pool of worker processes.
+
+    Each worker loads the pipeline once when it starts (from ``model_path``,
+    the default artifact, or ``pipe`` sent once per worker), so tasks only
+    carry the texts to score and never re-send the vocabulary. A compact
+    ``.spm`` artifact is memory-mapped, so all workers share one page-cache
+    copy of the model. Results come back in submission order.
+    """
+
+    def __init__(self, workers=None, model_path=None, pipe=None, cache_size=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(model_path, pipe, cache_size),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Shut down the worker pool."""
+        self._executor.shutdown()
+
+    def submit(self, texts):
+        """Queue one batch; returns a future resolving to a ``ScoreResult``."""
+        return self._executor.submit(_score_in_worker, list(texts))
+
+    def imap(self, batches, max_pending=None):
+        """Yield a ``ScoreResult`` per batch, in order, with bounded look-ahead.
+
+        At most ``max_pending`` batches (default: twice the worker count) are
+        in flight, so memory stays flat on arbitrarily long inputs.
+        """
+        max_pending = max_pending or 2 * self.workers
+        pending = deque()
+        for batch in batches:
+            pending.append(self.submit(batch))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def score(self, texts, chunk_size=1000):
+        """Score a list of texts in ``chunk_size`` pieces across the pool."""
+        texts = list(texts)
+        chunks = (texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size))
+        parts = list(self.imap(chunks))
+        if not parts:
+            empty = np.array([])
+            return ScoreResult(empty, empty, empty)
+        return ScoreResult(*(np.concatenate(col) for col in zip(*parts)))
@@ -1,46 +1,76 @@
-"""Pipeline utilities: train, save, load a sklearn pipeline for spam classification."""
+"""Pipeline utilities: train, save, load a sklearn pipeline for spam classification.
+
+Importing this module stays cheap (numpy only): scikit-learn, joblib, pandas
+and the artifact/fast-path modules are imported by the functions that need
+them, so the cost is paid when a model is first trained or loaded.
+"""
+import logging
 from pathlib import Path
-import joblib
-from sklearn.pipeline import Pipeline
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.linear_model import LogisticRegression
-from sklearn.dummy import DummyClassifier
+import uuid
+import weakref
 
-from .data import SpamDataset
+from . import instrumentation
+from .cache import DEFAULT_MAX_ENTRIES, PredictionCache
+from .model import score_matrix
+from .registry import ModelRegistry
 
 MODELS_DIR = Path(__file__).parent.parent / "models" / "phase1"
-MODELS_DIR.mkdir(parents=True, exist_ok=True)
 MODEL_PATH = MODELS_DIR / "pipeline.joblib"
+ARTIFACT_PATH = MODELS_DIR / "pipeline.spm"
+# Batches up to this size skip sklearn and use the direct linear scorer.
+FASTPATH_MAX_BATCH = 16
+
+_logger = logging.getLogger(__name__)
+
+
+def train_and_save_pipeline(max_features=10000, ngram_range=(1,2), C=1.0, backend="tfidf", n_bits=18,
+                            corpus=None):
+    """Train with the shared engine (``training.train_model``); returns the pipeline.
+
+    ``corpus`` (CSV/JSONL paths or a ``StreamingDataset``) trains out of core.
+    """
+    from .training import train_model
 
+    return train_model(max_features=max_features, ngram_range=ngram_range, C=C,
+                       backend=backend, n_bits=n_bits, corpus=corpus).pipeline
 
-def train_and_save_pipeline(max_features=10000, ngram_range=(1,2), C=1.0):
-    dataset = SpamDataset()
-    train_df, val_df, test_df = dataset.load_split()
-    X_train = train_df["text"].tolist()
-    y_train = train_df["label"].tolist()
 
-    pipeline = Pipeline(
-        [
-            ("tfidf", TfidfVectorizer(max_features=max_features, ngram_range=ngram_range, min_df=1)),
-            ("clf", LogisticRegression(C=C, class_weight="balanced", solver="liblinear", random_state=42)),
-        ]
-    )
-    pipeline.fit(X_train, y_train)
-    joblib.dump(pipeline, MODEL_PATH)
-    return pipeline
+def has_trained_model():
+    """True if a trained artifact (or joblib pickle) exists to serve."""
+    return _registry.active_path().exists()
 
 
-def load_pipeline():
-    if MODEL_PATH.exists():
+def load_pipeline(path=None):
+    with instrumentation.timer("load_pipeline"):
+        return _load_pipeline(path)
+
+
+def _load_pipeline(path=None):
+    if path is None:
+        path = ARTIFACT_PATH if ARTIFACT_PATH.exists() else MODEL_PATH
+    if Path(path).exists():
         try:
-            return joblib.load(MODEL_PATH)
-        except Exception:
+            if Path(path).suffix == ARTIFACT_PATH.suffix:
+                from .artifact import load_artifact
+
+                # Memory-mapped: near-zero copy, shared page cache across processes.
+                return load_artifact(path)
+            import joblib
+
+            return joblib.load(path)
+        except Exception as exc:
             # If loading the persisted model fails, fall back to a trivial
             # predictor so the web UI can remain interactive on deployments.
-            pass
+            instrumentation.inc("model_load_errors", error=type(exc).__name__)
+            _logger.warning("Could not load %s; serving the HAM fallback", path, exc_info=True)
     # Return a safe fallback pipeline that always predicts HAM (0).
     # This avoids startup failures when training data or model files are
     # not available or training fails on the deployment host.
+    instrumentation.inc("fallback_model_loads")
+    from sklearn.dummy import DummyClassifier
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.pipeline import Pipeline
+
     fallback = Pipeline([
         ("tfidf", TfidfVectorizer()),
         ("clf", DummyClassifier(strategy="constant", constant=0)),
@@ -55,22 +85,255 @@ def load_pipeline():
     return fallback
 
 
+def _export_pipeline(pipe, path):
+    from .artifact import export_pipeline
+
+    export_pipeline(pipe, path)
+
+
+_registry = ModelRegistry(
+    ARTIFACT_PATH, loader=load_pipeline, dumper=_export_pipeline, fallback_paths=(MODEL_PATH,)
+)
+
+
+def get_registry():
+    """Return the process-wide registry serving ``ARTIFACT_PATH`` (or ``MODEL_PATH``)."""
+    return _registry
+
+
+def get_pipeline():
+    """Return the in-memory pipeline, reloading only if the artifact changed."""
+    return _registry.get()
+
+
+_fast_scorers = weakref.WeakKeyDictionary()
+
+
+def get_fast_scorer(pipe):
+    """Return the cached ``LinearScorer`` for ``pipe``, or None if unsupported."""
+    try:
+        return _fast_scorers[pipe]
+    except KeyError:
+        pass
+    from .fastpath import LinearScorer
+
+    try:
+        scorer = LinearScorer.from_pipeline(pipe)
+    except (ValueError, AttributeError, TypeError):
+        scorer = None
+    _fast_scorers[pipe] = scorer
+    return scorer
+
+
+_prediction_cache = None
+_pipe_versions = weakref.WeakKeyDictionary()
+
+
+def enable_prediction_cache(max_entries=DEFAULT_MAX_ENTRIES):
+    """Put a process-wide ``PredictionCache`` in front of registry scoring."""
+    global _prediction_cache
+    _prediction_cache = PredictionCache(max_entries)
+    return _prediction_cache
+
+
+def disable_prediction_cache():
+    global _prediction_cache
+    _prediction_cache = None
+
+
+def get_prediction_cache():
+    """Return the process-wide prediction cache, or None if disabled."""
+    return _prediction_cache
+
+
+def _pipe_version(pipe):
+    # Explicitly passed pipelines get a private token, so a cache shared
+    # between pipelines never mixes their predictions.
+    token = _pipe_versions.get(pipe)
+    if token is None:
+        token = _pipe_versions.setdefault(pipe, uuid.uuid4().hex)
+    return token
+
+
+_cascade_enabled = False
+_cascades = weakref.WeakKeyDictionary()
+
+
+def enable_cascade():
+    """Score registry requests through the cascade saved next to the artifact.
+
+    The cascade is used only while the served model is the one it was
+    calibrated against (``cascade.json``'s ``full_version``). Raises
+    ``ValueError`` while shadow scoring is enabled.
+    """
+    global _cascade_enabled
+    if _shadow_config is not None:
+        raise ValueError("Shadow scoring compares full models; disable it before the cascade")
+    _cascade_enabled = True
+
+
+def disable_cascade():
+    global _cascade_enabled
+    _cascade_enabled = False
+
+
+def _cascade_for(pipe, version):
+    """The ``CascadeScorer`` around ``pipe`` (at ``version``), or None."""
+    try:
+        return _cascades[pipe]
+    except KeyError:
+        pass
+    from .cascade import CascadeScorer
+
+    try:
+        scorer, config = CascadeScorer.load(MODELS_DIR, pipe)
+    except (OSError, ValueError, KeyError):
+        scorer = None
+    else:
+        if config["full_version"] != version:
+            _logger.warning("cascade.json was calibrated for another model; not using it")
+            scorer = None
+    _cascades[pipe] = scorer
+    return scorer
+
+
+_shadow_config = None
+_shadows = weakref.WeakKeyDictionary()
+
+
+def enable_shadow(candidates, log_path=None):
+    """Shadow-score registry requests with the ``.spm`` files in ``candidates``.
+
+    ``candidates`` maps names to artifact paths. Responses still come from
+    the served model; disagreements are counted (``get_shadow_stats``) and
+    appended to ``log_path`` as JSON lines. Raises ``ValueError`` while the
+    cascade is enabled.
+    """
+    global _shadow_config
+    if _cascade_enabled:
+        raise ValueError("Shadow scoring compares full models; disable the cascade first")
+    from .artifact import load_artifact
+
+    loaded = {name: load_artifact(path) for name, path in candidates.items()}
+    _shadow_config = (loaded, log_path)
+    _shadows.clear()
+
+
+def disable_shadow():
+    global _shadow_config
+    _shadow_config = None
+    _shadows.clear()
+
+
+def get_shadow_stats():
+    """Disagreement stats of the shadow scorer for the served model, or None."""
+    if _shadow_config is None:
+        return None
+    scorer = _shadows.get(_registry.get())
+    return scorer.stats() if scorer is not None else None
+
+
+def _shadow_for(pipe, version):
+    try:
+        return _shadows[pipe]
+    except KeyError:
+        pass
+    from .shadow import ShadowScorer
+
+    candidates, log_path = _shadow_config
+    scorer = _shadows[pipe] = ShadowScorer(pipe, candidates, log_path, primary_version=version)
+    return scorer
+
+
+def _run_shadow(texts, result, features, pipe, version):
+    """Compare the candidates with the served ``result``; never raises.
+
+    A failure is logged and counted, and turns shadow scoring off for
+    ``pipe`` (until the served model or the shadow config changes).
+    """
+    try:
+        shadow = _shadow_for(pipe, version)
+        if shadow is not None:
+            shadow.compare(texts, result, features)
+    except Exception as exc:
+        instrumentation.inc("shadow_errors", error=type(exc).__name__)
+        _logger.warning("Shadow scoring failed; disabled for model %s", version, exc_info=True)
+        _shadows[pipe] = None
+
+
+def _score_uncached(texts, pipe):
+    return _score_with_features(texts, pipe)[0]
+
+
+def _score_with_features(texts, pipe):
+    """``(ScoreResult, X)``; ``X`` is None when the fast path scored the batch."""
+    if len(texts) <= FASTPATH_MAX_BATCH:
+        scorer = get_fast_scorer(pipe)
+        if scorer is not None:
+            instrumentation.inc("fastpath_batches")
+            with instrumentation.timer("fastpath"):
+                return scorer.score(texts), None
+    with instrumentation.timer("featurize"):
+        X = pipe[:-1].transform(texts)
+    return score_matrix(pipe[-1], X), X
+
+
+def score_texts(texts, pipe=None, cache=None):
+    """Vectorize ``texts`` once and return a ``ScoreResult``.
+
+    Labels, spam probabilities and decision margins all come from the same
+    sparse matrix, so tokenization runs a single time per batch. Batches of
+    at most ``FASTPATH_MAX_BATCH`` messages bypass sklearn entirely.
+
+    With a ``cache`` (or, for registry scoring, the process-wide cache from
+    ``enable_prediction_cache``) only distinct uncached texts are scored.
+    """
+    if not instrumentation.is_enabled():
+        return _score_texts(texts, pipe, cache)
+    instrumentation.inc("batches")
+    instrumentation.inc("messages", len(texts))
+    with instrumentation.timer("score"):
+        return _score_texts(texts, pipe, cache)
+
+
+def _score_texts(texts, pipe, cache):
+    version = None
+    if pipe is None:
+        if cache is None:
+            cache = _prediction_cache
+        pipe, version = _registry.get_versioned()
+        if _shadow_config is not None:
+            # Responses are the served model's own, so cache entries stay valid.
+            def shadowed(batch):
+                result, features = _score_with_features(batch, pipe)
+                _run_shadow(batch, result, features, pipe, version)
+                return result
+
+            if cache is None:
+                return shadowed(texts)
+            return cache.score(texts, shadowed, version)
+        cascade = _cascade_for(pipe, version) if _cascade_enabled else None
+        if cascade is not None:
+            if cache is None:
+                return cascade.score(texts)
+            # Cascade predictions may differ from the full model's.
+            return cache.score(texts, cascade.score, f"{version}+cascade")
+    if cache is None:
+        return _score_uncached(texts, pipe)
+    if version is None:
+        version = _pipe_version(pipe)
+    return cache.score(texts, lambda batch: _score_uncached(batch, pipe), version)
+
+
 def predict_texts(texts):
     try:
-        pipe = load_pipeline()
-        # If no persisted pipeline exists, train a new one.
-        if pipe is None:
-            pipe = train_and_save_pipeline()
-        preds = pipe.predict(texts)
-        # Some fallback classifiers may not implement predict_proba; guard it.
-        try:
-            probs = pipe.predict_proba(texts)[:, 1]
-        except Exception:
-            # If predict_proba is unavailable, give 0.0 for HAM and 1.0 for SPAM
-            probs = [1.0 if p == 1 else 0.0 for p in preds]
+        preds, probs, _ = score_texts(texts)
         return preds, probs
-    except Exception:
-        # On any unexpected error, return conservative HAM predictions.
+    except Exception as exc:
+        # On any unexpected error, return conservative HAM predictions, but
+        # keep count so a broken model does not go unnoticed.
+        instrumentation.inc("swallowed_errors", error=type(exc).__name__)
+        _logger.warning("predict_texts failed; returning HAM", exc_info=True)
         preds = [0 for _ in texts]
         probs = [0.0 for _ in texts]
         return preds, probs
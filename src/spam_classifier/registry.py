@@ -0,0 +1,124 @@
+"""In-memory model registry with lazy, thread-safe loading and hot-swap."""
+import hashlib
+import os
+import threading
+import uuid
+from pathlib import Path
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _stat_stamp(path):
+    """Return a cheap change stamp (mtime, size) or None if the file is missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class ModelRegistry:
+    """Hold a fitted pipeline in memory and reload it only when its artifact changes.
+
+    ``get()`` is safe to call from many threads. It stats the artifact on every
+    call (microseconds) and only re-hashes the file when the mtime or size has
+    moved; the model is reloaded only when the content hash differs from the
+    loaded version. ``swap()`` and ``publish()`` replace the served model
+    atomically, so callers always see either the old or the new pipeline.
+    ``fallback_paths`` are served (read-only) while ``path`` does not exist.
+    """
+
+    def __init__(self, path, loader, dumper=None, fallback_paths=()):
+        self.path = Path(path)
+        self.fallback_paths = tuple(Path(p) for p in fallback_paths)
+        self._loader = loader
+        self._dumper = dumper
+        self._lock = threading.Lock()
+        # (model, version, stamp) is replaced as a single tuple so readers
+        # never observe a model paired with another model's version.
+        self._state = (None, None, None)
+
+    @property
+    def version(self):
+        """Content hash (or swap id) of the currently loaded model, if any."""
+        return self._state[1]
+
+    def active_path(self):
+        """The artifact currently served: ``path``, else the first existing fallback."""
+        for candidate in (self.path, *self.fallback_paths):
+            if candidate.exists():
+                return candidate
+        return self.path
+
+    def get(self):
+        """Return the current model, loading or reloading it if needed."""
+        stamp = self._stamp()
+        model, _, loaded_stamp = self._state
+        if model is not None and stamp == loaded_stamp:
+            return model
+        with self._lock:
+            model, version, loaded_stamp = self._state
+            if model is not None and stamp == loaded_stamp:
+                return model
+            path = self.path if stamp is None else stamp[0]
+            digest = file_digest(path) if stamp is not None else None
+            if model is not None and digest is not None and digest == version:
+                # Touched but unchanged: remember the new stamp, keep the model.
+                self._state = (model, version, stamp)
+                return model
+            model = self._loader(path)
+            self._state = (model, digest, stamp)
+            return model
+
+    def get_versioned(self):
+        """Return ``(model, version)`` as one consistent pair."""
+        self.get()
+        model, version, _ = self._state
+        return model, version
+
+    def swap(self, model, version=None):
+        """Atomically replace the served model without touching disk."""
+        if version is None:
+            version = uuid.uuid4().hex
+        with self._lock:
+            self._state = (model, version, self._stamp())
+        return version
+
+    def publish(self, model):
+        """Persist ``model`` to the artifact path atomically and serve it.
+
+        The artifact is written to a temporary file in the same directory and
+        renamed over the old one, so concurrent readers in other processes
+        never see a half-written file.
+        """
+        if self._dumper is None:
+            raise RuntimeError("ModelRegistry was created without a dumper")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{self.path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            self._dumper(model, tmp_path)
+            digest = file_digest(tmp_path)
+            with self._lock:
+                os.replace(tmp_path, self.path)
+                self._state = (model, digest, self._stamp())
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        return digest
+
+    def _stamp(self):
+        path = self.active_path()
+        stamp = _stat_stamp(path)
+        return None if stamp is None else (path,) + stamp
+
+    def clear(self):
+        """Drop the cached model so the next ``get()`` reloads from disk."""
+        with self._lock:
+            self._state = (None, None, None)
@@ -0,0 +1,297 @@
+"""Lightweight HTTP/JSON scoring service with request micro-batching.
+
+Endpoints:
+- ``POST /score`` with ``{"text": "..."}`` or ``{"texts": ["...", ...]}``
+- ``POST /explain``, same body plus optional ``"k"``: each message's top-k
+  spam and ham tokens with their contributions to the margin
+- ``GET /health``
+- ``GET /metrics`` (JSON) and ``GET /metrics/prometheus`` (text exposition);
+  with shadow scoring on, both include per-candidate disagreement counts
+
+Concurrent requests are queued for up to ``max_wait_ms`` and merged into a
+single vectorize + predict call of at most ``max_batch_size`` messages;
+larger requests are scored in slices of that size.
+"""
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from . import instrumentation
+from .explain import explain_texts
+from .pipeline import get_prediction_cache, get_registry, get_shadow_stats, score_texts
+
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_MAX_WAIT_MS = 5.0
+# Own namespace for the batcher (and cache/shadow) gauges, so none of them
+# shares a metric family with an instrumentation counter or histogram.
+GAUGE_PREFIX = f"{instrumentation.PREFIX}batcher_"
+
+_STOP = object()
+
+
+class _Request:
+    __slots__ = ("texts", "future")
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.future = Future()
+
+
+class MicroBatcher:
+    """Merge concurrent scoring calls into shared batches on a worker thread.
+
+    The worker takes the first queued request, then keeps collecting until
+    the batch holds ``max_batch_size`` messages or ``max_wait_ms`` has passed,
+    scores everything with one ``score_fn`` call and hands each caller its
+    slice of the result. A request that would overflow the batch starts the
+    next one; a request of more than ``max_batch_size`` messages is queued
+    as slices of at most that size whose results are merged.
+    """
+
+    def __init__(self, score_fn=None, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.score_fn = score_fn or score_texts
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue()
+        # A request that did not fit into the previous batch (worker only).
+        self._carry = None
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "messages": 0, "batches": 0, "errors": 0}
+        self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts):
+        """Queue ``texts``; returns a Future resolving to a ``ScoreResult``."""
+        texts = list(texts)
+        with self._stats_lock:
+            self.stats["requests"] += 1
+        cap = self.max_batch_size
+        if len(texts) <= cap:
+            request = _Request(texts)
+            self._queue.put(request)
+            return request.future
+        parts = [_Request(texts[i:i + cap]) for i in range(0, len(texts), cap)]
+        merged = _merge_futures([part.future for part in parts])
+        for part in parts:
+            self._queue.put(part)
+        return merged
+
+    def score(self, texts, timeout=None):
+        """Blocking helper around ``submit``."""
+        return self.submit(texts).result(timeout)
+
+    def close(self):
+        """Stop the worker after the requests already queued."""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def queue_depth(self):
+        return self._queue.qsize() + (self._carry is not None)
+
+    def _collect(self, first):
+        batch, size = [first], len(first.texts)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            if size + len(item.texts) > self.max_batch_size:
+                self._carry = item
+                break
+            batch.append(item)
+            size += len(item.texts)
+        return batch, size
+
+    def _run(self):
+        while True:
+            first, self._carry = self._carry, None
+            if first is None:
+                first = self._queue.get()
+            if first is _STOP:
+                return
+            batch, size = self._collect(first)
+            texts = [t for request in batch for t in request.texts]
+            try:
+                result = self.score_fn(texts)
+            except Exception as exc:
+                with self._stats_lock:
+                    self.stats["errors"] += 1
+                for request in batch:
+                    request.future.set_exception(exc)
+                continue
+            with self._stats_lock:
+                self.stats["messages"] += size
+                self.stats["batches"] += 1
+            start = 0
+            for request in batch:
+                stop = start + len(request.texts)
+                request.future.set_result(type(result)(*(col[start:stop] for col in result)))
+                start = stop
+
+    def snapshot(self):
+        """Counters plus derived mean batch size and current queue depth."""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["mean_batch_size"] = stats["messages"] / stats["batches"] if stats["batches"] else 0.0
+        stats["queue_depth"] = self.queue_depth()
+        return stats
+
+
+def _merge_futures(futures):
+    """A Future of the ``ScoreResult`` slices of ``futures`` concatenated in order."""
+    merged = Future()
+    lock = threading.Lock()
+    pending = [len(futures)]
+
+    def done(_):
+        with lock:
+            pending[0] -= 1
+            if pending[0]:
+                return
+        for future in futures:
+            if future.exception() is not None:
+                merged.set_exception(future.exception())
+                return
+        results = [future.result() for future in futures]
+        merged.set_result(type(results[0])(*(np.concatenate(cols) for cols in zip(*results))))
+
+    for future in futures:
+        future.add_done_callback(done)
+    return merged
+
+
+def _result_rows(result):
+    labels, probs, _ = result
+    return [
+        {"label": "SPAM" if int(p) == 1 else "HAM", "pred": int(p), "spam_prob": float(q)}
+        for p, q in zip(labels, probs)
+    ]
+
+
+def _prometheus_gauges(stats, prefix=GAUGE_PREFIX):
+    """Batcher (and cache) stats as Prometheus gauges."""
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            lines.append(_prometheus_gauges(value, f"{prefix}{key}_").rstrip("\n"))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f"# TYPE {prefix}{key} gauge")
+            lines.append(f"{prefix}{key} {value}")
+    return "\n".join(line for line in lines if line) + "\n"
+
+
+class ScoringHandler(BaseHTTPRequestHandler):
+    """Request handler; ``server.batcher`` does the scoring."""
+
+    server_version = "SpamClassifier/0.1"
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, status, text):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stats(self):
+        stats = self.server.batcher.snapshot()
+        cache = get_prediction_cache()
+        if cache is not None:
+            stats["cache"] = cache.stats()
+        shadow = get_shadow_stats()
+        if shadow is not None:
+            stats["shadow"] = shadow
+        return stats
+
+    def do_GET(self):
+        if self.path == "/health":
+            # Resolves (loading if needed) the served model, so a fresh server
+            # reports its version before the first scoring request.
+            version = get_registry().get_versioned()[1]
+            self._send_json(200, {"status": "ok", "model_version": version})
+        elif self.path == "/metrics":
+            stats = self._stats()
+            if instrumentation.is_enabled():
+                stats["instrumentation"] = instrumentation.snapshot()
+            self._send_json(200, stats)
+        elif self.path == "/metrics/prometheus":
+            self._send_text(200, _prometheus_gauges(self._stats()) + instrumentation.prometheus_text())
+        else:
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path not in ("/score", "/explain"):
+            self._send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if "texts" in payload:
+                texts, single = payload["texts"], False
+            elif "text" in payload:
+                texts, single = [payload["text"]], True
+            else:
+                raise ValueError("Body must contain 'text' or 'texts'")
+            if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                raise ValueError("'texts' must be a list of strings")
+            k = int(payload.get("k", 5))
+        except (ValueError, TypeError, AttributeError) as exc:
+            self._send_json(400, {"error": str(exc)})
+            return
+        try:
+            if self.path == "/explain":
+                rows = [e._asdict() for e in explain_texts(texts, k=k)] if texts else []
+            else:
+                rows = _result_rows(self.server.batcher.score(texts)) if texts else []
+        except Exception as exc:
+            self._send_json(500, {"error": str(exc)})
+            return
+        self._send_json(200, rows[0] if single else {"results": rows})
+
+    def log_message(self, format, *args):
+        # Keep per-request access logs off the hot path.
+        pass
+
+
+def make_server(host="127.0.0.1", port=8000, batcher=None, **batcher_kwargs):
+    """Create (but do not start) a threading HTTP server bound to ``host:port``."""
+    server = ThreadingHTTPServer((host, port), ScoringHandler)
+    server.daemon_threads = True
+    server.batcher = batcher or MicroBatcher(**batcher_kwargs)
+    return server
+
+
+def serve(host="127.0.0.1", port=8000, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+          max_wait_ms=DEFAULT_MAX_WAIT_MS):
+    """Run the scoring service until interrupted."""
+    server = make_server(host, port, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+    print(f"Serving on http://{host}:{server.server_port} "
+          f"(max batch {max_batch_size}, max wait {max_wait_ms}ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
@@ -0,0 +1,231 @@
+"""Shadow (A/B) scoring: candidate models scored alongside the served one.
+
+Models whose featurizers are identical (same weighting parameters,
+vocabulary and IDF; e.g. retrained with other classifier settings on cached
+features) form one group. Each batch is vectorized once per group, and all
+of the group's classifiers are applied as one sparse-dense product
+``X @ W`` with ``W`` holding one coefficient column per model, so a
+candidate costs a column of ``W`` rather than another tokenization pass.
+Batches of up to ``FASTPATH_MAX_BATCH`` messages are featurized by the
+group's ``LinearScorer`` instead, as in normal serving. Candidates whose
+featurizer differs still work, at the price of their own vectorization.
+
+The served (primary) model is never part of a group: it is scored on the
+normal serving path, whatever kind of model it is, and
+``ShadowScorer.compare`` only checks the candidates against its result. The
+candidates sharing the primary's featurizer reuse the matrix that path
+vectorized, if any. Candidate predictions feed the disagreement counts and
+the optional JSONL disagreement log, never the response.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+
+import numpy as np
+
+from . import instrumentation
+from .model import ScoreResult, is_log_loss_model, sigmoid
+
+_logger = logging.getLogger(__name__)
+
+
+def featurizer_fingerprint(vectorizer):
+    """Digest of everything that determines ``vectorizer.transform``'s output."""
+    from .artifact import HASHING_PARAMS, TFIDF_PARAMS, MappedTfidfVectorizer
+    from .features import HashingTfidfVectorizer
+
+    digest = hashlib.sha256()
+    if isinstance(vectorizer, HashingTfidfVectorizer):
+        params = {k: getattr(vectorizer, k) for k in HASHING_PARAMS}
+        params["kind"] = "hashing"
+    else:
+        if isinstance(vectorizer, MappedTfidfVectorizer):
+            params = {k: vectorizer._model.params[k] for k in TFIDF_PARAMS}
+        else:
+            params = {k: getattr(vectorizer, k) for k in TFIDF_PARAMS}
+        params["kind"] = "tfidf"
+        for term in vectorizer.get_feature_names_out():
+            digest.update(term.encode("utf-8") + b"\0")
+    digest.update(json.dumps(params, sort_keys=True, default=list).encode("utf-8"))
+    idf = getattr(vectorizer, "idf_", None)
+    if idf is not None:
+        digest.update(np.ascontiguousarray(idf, dtype="<f8").tobytes())
+    return digest.hexdigest()
+
+
+def _fingerprint_or_none(pipe):
+    try:
+        return featurizer_fingerprint(pipe.named_steps["tfidf"])
+    except (AttributeError, KeyError, TypeError):
+        return None
+
+
+class _Group:
+    """Models sharing one featurizer, scored with one stacked product."""
+
+    def __init__(self, pipe):
+        from .pipeline import get_fast_scorer
+
+        self.vectorizer = pipe.named_steps["tfidf"]
+        self.fingerprint = featurizer_fingerprint(self.vectorizer)
+        # Small batches are featurized message by message, as in serving.
+        self.fast_scorer = get_fast_scorer(pipe)
+        self.names, self.columns, self.intercepts, self.classes = [], [], [], []
+
+    def add(self, name, clf):
+        coef = np.asarray(clf.coef_, dtype=np.float64)
+        classes = np.asarray(clf.classes_)
+        if coef.shape[0] != 1 or len(classes) != 2 or not is_log_loss_model(clf):
+            raise ValueError(f"Shadow model {name!r} is not a binary logistic classifier")
+        self.names.append(name)
+        self.columns.append(coef[0])
+        self.intercepts.append(float(np.ravel(clf.intercept_)[0]))
+        self.classes.append(classes)
+        self.weights = np.column_stack(self.columns)
+
+    def score(self, texts, X=None):
+        """``{name: ScoreResult}`` for every model in the group.
+
+        ``X`` is the batch already vectorized by this group's featurizer.
+        """
+        from .pipeline import FASTPATH_MAX_BATCH
+
+        if X is not None:
+            margins = np.asarray(X @ self.weights)
+        elif len(texts) <= FASTPATH_MAX_BATCH and self.fast_scorer is not None:
+            rows, cols, weights = self.fast_scorer.features(texts)
+            contributions = weights[:, None] * self.weights[cols]
+            # bincount returns ints when no term of the batch is known.
+            margins = np.column_stack([
+                np.bincount(rows, contributions[:, j], minlength=len(texts))
+                for j in range(len(self.names))
+            ]).astype(np.float64)
+        else:
+            margins = np.asarray(self.vectorizer.transform(texts) @ self.weights)
+        margins += np.asarray(self.intercepts)
+        results = {}
+        for j, name in enumerate(self.names):
+            m = margins[:, j]
+            proba = sigmoid(m)
+            classes = self.classes[j]
+            if classes[1] != 1:
+                proba = 1.0 - proba
+            results[name] = ScoreResult(classes[(m > 0).astype(int)], proba, m)
+        return results
+
+
+class ShadowScorer:
+    """Score every pipeline of ``candidates`` alongside ``primary``.
+
+    ``candidates`` maps names to fitted ``tfidf`` + binary logistic ``clf``
+    pipelines; ``primary`` can be any served pipeline. ``log_path``, if
+    given, receives one JSON line per disagreement.
+    """
+
+    PRIMARY = "primary"
+
+    def __init__(self, primary, candidates, log_path=None, primary_version=None):
+        if self.PRIMARY in candidates:
+            raise ValueError(f"{self.PRIMARY!r} is reserved for the served model")
+        self.primary = primary
+        self.log_path = log_path
+        self.primary_version = primary_version
+        self.groups = []
+        by_fingerprint = {}
+        for name, pipe in candidates.items():
+            vectorizer, clf = pipe.named_steps["tfidf"], pipe.named_steps["clf"]
+            key = featurizer_fingerprint(vectorizer)
+            if key not in by_fingerprint:
+                by_fingerprint[key] = _Group(pipe)
+                self.groups.append(by_fingerprint[key])
+            by_fingerprint[key].add(name, clf)
+        self.primary_fingerprint = _fingerprint_or_none(primary)
+        if len(self.groups) > 1:
+            _logger.warning("Shadow models use %d distinct featurizers; each one adds a "
+                            "vectorization pass", len(self.groups))
+        self._lock = threading.Lock()
+        self._messages = 0
+        self._disagreements = dict.fromkeys(candidates, 0)
+
+    def score_candidates(self, texts, features=None):
+        """``{name: ScoreResult}`` for every candidate.
+
+        ``features``, the batch as vectorized by the primary's featurizer,
+        spares the candidates sharing that featurizer their own pass.
+        """
+        results = {}
+        for group in self.groups:
+            shared = features is not None and group.fingerprint == self.primary_fingerprint
+            results.update(group.score(texts, features if shared else None))
+        return results
+
+    def score_all(self, texts):
+        """``{name: ScoreResult}`` for the primary and every candidate."""
+        from .pipeline import _score_uncached
+
+        texts = list(texts)
+        return {self.PRIMARY: _score_uncached(texts, self.primary),
+                **self.score_candidates(texts)}
+
+    def score(self, texts):
+        """The primary model's ``ScoreResult``; candidates are compared and logged."""
+        from .pipeline import _score_with_features
+
+        texts = list(texts)
+        primary, features = _score_with_features(texts, self.primary)
+        self.compare(texts, primary, features)
+        return primary
+
+    def compare(self, texts, primary, features=None):
+        """Score the candidates and count or log where they differ from ``primary``.
+
+        ``features`` is the matrix the primary's featurizer produced, if any.
+        """
+        texts = list(texts)
+        results = self.score_candidates(texts, features)
+        records = []
+        counts = {}
+        for name, result in results.items():
+            differ = np.flatnonzero(np.asarray(result.labels) != np.asarray(primary.labels))
+            counts[name] = len(differ)
+            instrumentation.inc("shadow_disagreements", len(differ), model=name)
+            for i in differ.tolist():
+                records.append({
+                    "model": name, "text": texts[i],
+                    "primary": {"label": int(primary.labels[i]),
+                                "spam_prob": float(primary.probabilities[i])},
+                    "candidate": {"label": int(result.labels[i]),
+                                  "spam_prob": float(result.probabilities[i])},
+                })
+        instrumentation.inc("shadow_messages", len(texts))
+        with self._lock:
+            self._messages += len(texts)
+            for name, n in counts.items():
+                self._disagreements[name] += n
+            if records and self.log_path is not None:
+                self._write_log(records)
+
+    def _write_log(self, records):
+        now = time.time()
+        lines = "".join(
+            json.dumps(dict(record, time=now, primary_version=self.primary_version)) + "\n"
+            for record in records
+        )
+        try:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+        except OSError:
+            _logger.warning("Could not append to shadow log %s", self.log_path, exc_info=True)
+
+    def stats(self):
+        """Messages compared and disagreements per candidate."""
+        with self._lock:
+            messages = self._messages
+            return {
+                "messages": messages,
+                "disagreements": dict(self._disagreements),
+                "disagreement_rate": {name: n / messages if messages else 0.0
+                                      for name, n in self._disagreements.items()},
+            }
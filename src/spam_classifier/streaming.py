@@ -0,0 +1,159 @@
+"""Out-of-core dataset loading for corpora larger than memory.
+
+``StreamingDataset`` reads one or more CSV/JSONL files in fixed-size chunks
+and yields preprocessed ``label``/``text`` DataFrames, so only one chunk is
+in memory at a time. Splits are stratified without a global shuffle:
+``StratifiedSplitter`` keeps a running count per class and sends every
+``1 / test_size``-th message of a class to test (then likewise to val),
+starting at a seeded offset. Each class is therefore split in exact
+proportion (to within one message) and every pass over the files assigns
+the same rows. ``training.train_model(corpus=...)`` trains on such a
+dataset out of core.
+"""
+import csv
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from .batch import DEFAULT_CHUNK_SIZE, detect_format, find_text_column, read_chunks
+
+SPLITS = ("train", "val", "test")
+LABEL_COLUMNS = ("label", "class", "category")
+RAW_LABELS = ("ham", "spam")
+
+
+def _is_raw_csv(path):
+    """True for the headerless ``ham|spam,text`` format of the bundled dataset."""
+    with open(path, newline="", encoding="utf-8") as f:
+        first = next(csv.reader(f), [])
+    return len(first) >= 2 and first[0].strip().lower() in RAW_LABELS
+
+
+def _find_label_column(columns, label_column=None):
+    if label_column is not None:
+        if label_column not in columns:
+            raise ValueError(f"Input has no column named {label_column!r}")
+        return label_column
+    for col in columns:
+        if str(col).lower() in LABEL_COLUMNS:
+            return col
+    raise ValueError("Input must contain a 'label', 'class' or 'category' column")
+
+
+class StratifiedSplitter:
+    """Assign messages to train/val/test per class, in stream order.
+
+    The ``k``-th message of a class goes to test when ``floor(k * test_size
+    + phase)`` steps up, so after ``n`` messages of the class exactly
+    ``floor(n * test_size + phase)`` are in test; val takes the same share
+    of the rest. ``phase`` is drawn per class from ``seed``. One splitter
+    covers one pass; ``StreamingDataset.chunks`` starts a new one each time.
+    """
+
+    def __init__(self, test_size=0.15, val_size=0.15, seed=42):
+        if test_size < 0 or val_size < 0 or test_size + val_size >= 1:
+            raise ValueError("test_size and val_size must be >= 0 and sum to less than 1")
+        self.test_size = test_size
+        self.val_share = val_size / (1.0 - test_size)
+        self.seed = seed
+        # label -> [messages seen, messages not sent to test]
+        self._counts = {}
+
+    def _phases(self, label):
+        return np.random.default_rng([self.seed, int(label)]).random(2)
+
+    @staticmethod
+    def _take(start, n, share, phase):
+        k = start + np.arange(n, dtype=np.float64)
+        return np.floor((k + 1) * share + phase) > np.floor(k * share + phase)
+
+    def assign(self, labels):
+        """Split index per message: 0 = train, 1 = val, 2 = test."""
+        labels = np.asarray(labels)
+        split = np.zeros(len(labels), dtype=np.int8)
+        for label in np.unique(labels):
+            rows = np.flatnonzero(labels == label)
+            seen, kept = self._counts.setdefault(label.item(), [0, 0])
+            test_phase, val_phase = self._phases(label)
+            test = self._take(seen, len(rows), self.test_size, test_phase)
+            rest = rows[~test]
+            val = self._take(kept, len(rest), self.val_share, val_phase)
+            split[rows[test]] = 2
+            split[rest[val]] = 1
+            self._counts[label.item()] = [seen + len(rows), kept + len(rest)]
+        return split
+
+
+def preprocess_chunk(chunk, label_col="label", text_col="text"):
+    """``SpamDataset.preprocess`` for one chunk; labels may be ham/spam or 0/1."""
+    labels = chunk[label_col]
+    if is_numeric_dtype(labels):
+        y = labels.astype(int).to_numpy()
+    else:
+        y = (labels.astype(str).str.strip().str.lower() == "spam").astype(int).to_numpy()
+    texts = chunk[text_col].fillna("").astype(str).str.lower().str.strip()
+    return pd.DataFrame({"label": y, "text": texts.to_numpy()})
+
+
+class StreamingDataset:
+    """Preprocessed, split-assigned chunks from CSV/JSONL files.
+
+    Files may be headerless ``ham|spam,text`` CSVs (like the raw SMS file)
+    or CSV/JSONL with a label column and a ``text``/``message``/``body``
+    column.
+    """
+
+    def __init__(self, paths, chunk_size=DEFAULT_CHUNK_SIZE, test_size=0.15, val_size=0.15,
+                 seed=42, text_column=None, label_column=None):
+        if isinstance(paths, (str, bytes)) or not hasattr(paths, "__iter__"):
+            paths = [paths]
+        self.paths = list(paths)
+        self.chunk_size = chunk_size
+        self.test_size = test_size
+        self.val_size = val_size
+        self.seed = seed
+        self.text_column = text_column
+        self.label_column = label_column
+
+    def _raw_chunks(self, path):
+        fmt = detect_format(path)
+        if fmt == "csv" and _is_raw_csv(path):
+            reader = pd.read_csv(path, names=["label", "text"], header=None,
+                                 chunksize=self.chunk_size)
+            with reader:
+                for chunk in reader:
+                    yield preprocess_chunk(chunk)
+            return
+        label_col = text_col = None
+        for chunk in read_chunks(path, fmt, self.chunk_size):
+            if text_col is None:
+                text_col = find_text_column(chunk.columns, self.text_column)
+                label_col = _find_label_column(chunk.columns, self.label_column)
+            yield preprocess_chunk(chunk, label_col, text_col)
+
+    def splitter(self):
+        """A fresh ``StratifiedSplitter`` for one pass over the files."""
+        return StratifiedSplitter(self.test_size, self.val_size, self.seed)
+
+    def chunks(self, split=None):
+        """Yield preprocessed chunks, optionally only the rows of one split.
+
+        Each chunk gets a ``split`` column when ``split`` is None.
+        """
+        if split is not None and split not in SPLITS:
+            raise ValueError(f"Unknown split {split!r}; expected one of {SPLITS}")
+        splitter = self.splitter()
+        for path in self.paths:
+            for chunk in self._raw_chunks(path):
+                assigned = splitter.assign(chunk["label"])
+                if split is None:
+                    chunk["split"] = np.asarray(SPLITS)[assigned]
+                    yield chunk
+                else:
+                    keep = assigned == SPLITS.index(split)
+                    if keep.any():
+                        yield chunk[keep].reset_index(drop=True)
+
+    def __iter__(self):
+        return self.chunks("train")
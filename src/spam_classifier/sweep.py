@@ -0,0 +1,170 @@
+"""Hyperparameter sweep over featurizer and classifier settings.
+
+Trials are grouped by featurizer config, so the corpus is tokenized and
+vectorized once per distinct ``(backend, max_features/n_bits, max_ngram)``
+rather than once per trial, and not at all for configs already in the
+feature cache. The resulting sparse matrices are written to a scratch
+``FeatureCache`` (CSR arrays as ``.npy`` files) and each worker process
+memory-maps them (``mmap_mode="r"``) the first time it sees a config, so
+all workers share one page-cache copy; classifier fits over ``C`` and
+``class_weight`` then run in a process pool while the parent vectorizes the
+next config.
+
+Trials are ranked on the validation split; the test split is left untouched
+for the final ``train`` run with the chosen settings.
+"""
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from .data import SpamDataset
+from .feature_cache import FeatureCache, featurize_splits
+from .features import TextFeaturizer
+from .model import SpamClassifier
+
+RESULTS_DIR = Path("results") / "phase1"
+LEADERBOARD_FILE = "leaderboard.json"
+METRICS = ("accuracy", "precision", "recall", "f1", "roc_auc")
+
+# Matrices for the featurizer config a worker used last; tasks arrive grouped
+# by config, so this is almost always a hit.
+_worker_matrices = {}
+
+
+def expand_space(space, n_trials=None, seed=42):
+    """Expand ``{param: [values]}`` into trial dicts.
+
+    With ``n_trials`` set, draw that many distinct grid points at random
+    instead of the full grid. Settings that do not apply to a trial's
+    backend (``n_bits`` for tfidf, ``max_features`` for hashing) are
+    dropped, and the duplicates that leaves behind are removed.
+    """
+    keys = sorted(space)
+    trials, seen = [], set()
+    for values in itertools.product(*(space[k] for k in keys)):
+        trial = dict(zip(keys, values))
+        if trial.get("backend", "tfidf") == "hashing":
+            trial.pop("max_features", None)
+        else:
+            trial.pop("n_bits", None)
+        key = tuple(sorted(trial.items(), key=lambda kv: kv[0]))
+        if key not in seen:
+            seen.add(key)
+            trials.append(trial)
+    if n_trials is not None and n_trials < len(trials):
+        trials = random.Random(seed).sample(trials, n_trials)
+    return trials
+
+
+def featurizer_key(trial):
+    """The part of a trial that determines the feature matrices."""
+    backend = trial.get("backend", "tfidf")
+    size = trial.get("n_bits", 18) if backend == "hashing" else trial.get("max_features", 10000)
+    return backend, size, trial.get("max_ngram", 2)
+
+
+def _vectorize(key, texts, scratch, entry, dataset_key=None, split_params=None, cache=None):
+    backend, size, max_ngram = key
+    size_arg = {"n_bits": size} if backend == "hashing" else {"max_features": size}
+    featurizer = TextFeaturizer(ngram_range=(1, max_ngram), backend=backend, **size_arg)
+    start = time.perf_counter()
+    X = featurize_splits(featurizer, texts, dataset_key, split_params, cache)
+    seconds = time.perf_counter() - start
+    for split in ("train", "val"):
+        scratch.save_matrix(entry, split, X[split])
+    return seconds
+
+
+def _load_matrices(scratch_dir, entry, labels_path):
+    if entry not in _worker_matrices:
+        _worker_matrices.clear()
+        labels = np.load(labels_path)
+        scratch = FeatureCache(scratch_dir)
+        X_train, X_val = (scratch.load_matrix(entry, split) for split in ("train", "val"))
+        if X_train is None or X_val is None:
+            raise OSError(f"Feature matrices for {entry} are missing from {scratch_dir}")
+        _worker_matrices[entry] = (X_train, X_val, labels["train"], labels["val"])
+    return _worker_matrices[entry]
+
+
+def _fit_trial(scratch_dir, entry, labels_path, C, class_weight):
+    X_train, X_val, y_train, y_val = _load_matrices(scratch_dir, entry, labels_path)
+    start = time.perf_counter()
+    classifier = SpamClassifier(C=C, class_weight=class_weight).fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    metrics = classifier.evaluate(X_val, y_val)
+    metrics = {k: (v.tolist() if hasattr(v, "tolist") else float(v)) for k, v in metrics.items()}
+    return metrics, fit_seconds
+
+
+def run_sweep(space, n_trials=None, seed=42, workers=None, metric="f1",
+              output_dir=RESULTS_DIR, dataset=None, test_size=0.15, val_size=0.15):
+    """Run every trial in ``space`` and write a ranked leaderboard.
+
+    Returns the leaderboard dict that is also saved as
+    ``output_dir/leaderboard.json``.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric!r}; expected one of {METRICS}")
+    trials = expand_space(space, n_trials=n_trials, seed=seed)
+    groups = {}
+    for trial in trials:
+        groups.setdefault(featurizer_key(trial), []).append(trial)
+
+    start = time.perf_counter()
+    dataset = dataset or SpamDataset()
+    train_df, val_df, _ = dataset.load_split(test_size=test_size, val_size=val_size)
+    texts = {"train": train_df["text"].tolist(), "val": val_df["text"].tolist()}
+    # Featurizer configs seen in earlier sweeps or train runs come from the cache.
+    cache_args = {}
+    if getattr(dataset, "use_cache", False):
+        cache_args = {"dataset_key": dataset.cache_key(), "split_params": [test_size, val_size, 42],
+                      "cache": FeatureCache(dataset.cache_dir)}
+
+    pending = []
+    with tempfile.TemporaryDirectory(prefix="spam-sweep-") as scratch, \
+            ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        labels_path = os.path.join(scratch, "labels.npz")
+        np.savez(labels_path, train=train_df["label"].to_numpy(), val=val_df["label"].to_numpy())
+        scratch_cache = FeatureCache(scratch)
+        for i, (key, group) in enumerate(groups.items()):
+            entry = f"config-{i}"
+            featurize_seconds = _vectorize(key, texts, scratch_cache, entry, **cache_args)
+            for trial in group:
+                future = pool.submit(_fit_trial, scratch, entry, labels_path,
+                                     trial.get("C", 1.0), trial.get("class_weight", "balanced"))
+                pending.append((trial, featurize_seconds, future))
+
+        rows = []
+        for trial, featurize_seconds, future in pending:
+            metrics, fit_seconds = future.result()
+            rows.append({
+                "params": trial,
+                "val": metrics,
+                "fit_seconds": fit_seconds,
+                # Paid once per featurizer config and shared by its trials.
+                "featurize_seconds": featurize_seconds,
+            })
+
+    rows.sort(key=lambda row: row["val"][metric], reverse=True)
+    for rank, row in enumerate(rows, 1):
+        row["rank"] = rank
+    leaderboard = {
+        "metric": metric,
+        "n_trials": len(rows),
+        "n_featurizer_configs": len(groups),
+        "seconds": time.perf_counter() - start,
+        "trials": rows,
+    }
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with open(output_dir / LEADERBOARD_FILE, "w") as f:
+        json.dump(leaderboard, f, indent=2)
+    return leaderboard
@@ -0,0 +1,176 @@
+"""Text normalisation and word n-gram tokenization shared by training and inference.
+
+``Tokenizer`` reproduces the word analyzer of ``TfidfVectorizer`` (lowercase,
+``token_pattern``, ``ngram_range`` up to bigrams) but counts a whole batch
+at once:
+
+- a document is lowercased only if it is not already lowercase
+  (``SpamDataset.preprocess`` output always is), so clean text is not copied;
+- tokens are interned to integer ids once per batch, so every distinct token
+  is looked up in the vocabulary once rather than once per occurrence;
+- bigrams are packed ``(id, id)`` integer pairs; the ``"a b"`` string is
+  built once per distinct pair in the batch;
+- counting is done with numpy on the id arrays, not per-document dicts.
+
+Counts are identical to ``CountVectorizer`` with the same settings.
+``normalize_text`` applies the normalisation of ``SpamDataset.preprocess`` to
+one message (the prediction cache keys on it).
+"""
+import itertools
+import re
+
+import numpy as np
+
+DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+# Token ids are packed as ``first << 32 | second`` to key bigrams by int.
+_PAIR_SHIFT = 32
+
+
+def normalize_text(text):
+    """Lowercase and strip ``text``, copying only when something changes."""
+    if not text.islower():
+        text = text.lower()
+    return text.strip()
+
+
+def tokenizer_for(params):
+    """Return a ``Tokenizer`` equivalent to a word ``TfidfVectorizer`` with
+    ``params`` (a dict of its attributes), or None if it needs features the
+    tokenizer does not cover (custom callables, accents, stop words, n > 2).
+    """
+    if (params.get("analyzer", "word") != "word"
+            or params.get("input", "content") != "content"
+            or params.get("preprocessor") is not None
+            or params.get("tokenizer") is not None
+            or params.get("strip_accents") is not None
+            or params.get("stop_words") is not None):
+        return None
+    min_n, max_n = params.get("ngram_range", (1, 1))
+    if max_n > 2:
+        return None
+    return Tokenizer(params.get("lowercase", True),
+                     params.get("token_pattern", DEFAULT_TOKEN_PATTERN), (min_n, max_n))
+
+
+class Tokenizer:
+    """Word unigram/bigram tokenizer matching ``TfidfVectorizer``'s analyzer."""
+
+    def __init__(self, lowercase=True, token_pattern=DEFAULT_TOKEN_PATTERN, ngram_range=(1, 2)):
+        min_n, max_n = ngram_range
+        if not 1 <= min_n <= max_n <= 2:
+            raise ValueError(f"Tokenizer supports unigrams and bigrams, not {ngram_range}")
+        pattern = re.compile(token_pattern)
+        if pattern.groups > 1:
+            raise ValueError("token_pattern may have at most one capturing group")
+        self.lowercase = lowercase
+        self.token_pattern = token_pattern
+        self.ngram_range = tuple(ngram_range)
+        self._findall = pattern.findall
+
+    def tokens(self, text):
+        """Unigram tokens of one document."""
+        if self.lowercase and not text.islower():
+            text = text.lower()
+        return self._findall(text)
+
+    def analyze(self, text):
+        """N-gram strings of one document, in ``TfidfVectorizer`` order."""
+        tokens = self.tokens(text)
+        min_n, max_n = self.ngram_range
+        grams = list(tokens) if min_n == 1 else []
+        if max_n == 2:
+            grams.extend(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        return grams
+
+    def build_analyzer(self):
+        return self.analyze
+
+    def count(self, docs, lookup):
+        """Count n-grams per document as CSR parts ``(values, indices, indptr)``.
+
+        ``lookup(term)`` returns the term's column, or a negative number to
+        drop it; it is called once per distinct term, in order of first
+        appearance. Indices are sorted within each row.
+        """
+        findall = self._findall
+        if self.lowercase:
+            docs = (doc if doc.islower() else doc.lower() for doc in docs)
+        token_lists = [findall(doc) for doc in docs]
+        n_docs = len(token_lists)
+        flat = list(itertools.chain.from_iterable(token_lists))
+        lengths = np.fromiter(map(len, token_lists), dtype=np.int64, count=n_docs)
+        del token_lists
+        # setdefault maps each occurrence to the position of the token's first
+        # occurrence; ranking those positions interns tokens to 0..n-1 in
+        # first-seen order, which is also the key order of ``first``.
+        first = {}
+        n_tokens = len(flat)
+        pos = np.fromiter(map(first.setdefault, flat, itertools.count()),
+                          dtype=np.int64, count=n_tokens)
+        del flat
+        ids = (np.cumsum(pos == np.arange(n_tokens)) - 1)[pos]
+        token_list = list(first)
+        n_unigrams = len(token_list)
+        # Lay the n-grams out in analyzer order (each document's unigrams,
+        # then its bigrams): a document starting at token ``s`` with ``n``
+        # tokens owns slots ``2s .. 2s + 2n``, unigram ``k`` at ``2s + k``
+        # and the bigram starting at ``k`` at ``2s + n + k``. Terms are then
+        # looked up in order of first appearance, so a growing vocabulary
+        # numbers them exactly as ``CountVectorizer`` does.
+        rows = np.repeat(np.arange(n_docs, dtype=np.int64), lengths)
+        doc_starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        slot_terms = np.full(2 * n_tokens, -1, dtype=np.int64)
+        slot_rows = np.empty(2 * n_tokens, dtype=np.int64)
+        if self.ngram_range[0] == 1:
+            slot = doc_starts + np.arange(n_tokens, dtype=np.int64)
+            slot_terms[slot] = ids
+            slot_rows[slot] = rows
+        pair_keys = np.empty(0, dtype=np.int64)
+        if self.ngram_range[1] == 2 and n_tokens > 1:
+            same_doc = np.flatnonzero(rows[1:] == rows[:-1])
+            pairs = ids[same_doc] << _PAIR_SHIFT | ids[same_doc + 1]
+            pair_keys, pair_ids = np.unique(pairs, return_inverse=True)
+            slot = doc_starts[same_doc] + same_doc + lengths[rows[same_doc]]
+            slot_terms[slot] = n_unigrams + pair_ids.ravel()
+            slot_rows[slot] = rows[same_doc]
+        used = slot_terms >= 0
+        seq_terms, seq_rows = slot_terms[used], slot_rows[used]
+        del slot_terms, slot_rows
+
+        first_seen = np.full(n_unigrams + len(pair_keys), len(seq_terms), dtype=np.int64)
+        np.minimum.at(first_seen, seq_terms, np.arange(len(seq_terms), dtype=np.int64))
+        distinct = np.flatnonzero(first_seen < len(seq_terms))
+        low = (1 << _PAIR_SHIFT) - 1
+        terms = token_list + [f"{token_list[key >> _PAIR_SHIFT]} {token_list[key & low]}"
+                              for key in pair_keys.tolist()]
+        del token_list
+        order = distinct[np.argsort(first_seen[distinct])]
+        term_cols = np.full(len(terms), -1, dtype=np.int64)
+        term_cols[order] = [lookup(terms[term]) for term in order.tolist()]
+
+        cols = term_cols[seq_terms]
+        keep = cols >= 0
+        rows, cols = seq_rows[keep], cols[keep]
+        # One sort of row * width + col sums duplicates and orders each row.
+        width = int(cols.max()) + 1 if len(cols) else 1
+        cells, values = np.unique(rows * width + cols, return_counts=True)
+        indptr = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells // width, minlength=n_docs), out=indptr[1:])
+        return values, cells % width, indptr
+
+    def count_matrix(self, docs, lookup, n_features=None, dtype=np.int64):
+        """``count`` as a CSR matrix with sorted indices.
+
+        ``n_features`` may be a callable, evaluated after counting (for a
+        vocabulary that grows while counting).
+        """
+        import scipy.sparse as sp
+
+        values, indices, indptr = self.count(docs, lookup)
+        if callable(n_features):
+            n_features = n_features()
+        index_dtype = np.int64 if indptr[-1] > np.iinfo(np.int32).max else np.int32
+        return sp.csr_matrix(
+            (values.astype(dtype), indices.astype(index_dtype), indptr.astype(index_dtype)),
+            shape=(len(indptr) - 1, n_features),
+        )
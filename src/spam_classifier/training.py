@@ -0,0 +1,301 @@
+"""The one training engine behind ``cli train`` and the web apps.
+
+``train_model`` loads the split, featurizes it once (through the feature
+cache), fits the classifier once, evaluates train/val/test on the matrices
+it already has (plus bootstrap CIs and precision/recall curves for val and
+test, see ``evaluation``) and then publishes the fitted pipeline: the
+``.spm`` serving artifact, the joblib pickle and ``metrics.json``. The metrics file records
+the artifact's content hash as ``model_version``, which is also what the
+model registry (and ``GET /health``) reports for the served model.
+
+With ``corpus`` (a ``streaming.StreamingDataset`` or the CSV/JSONL paths
+for one) it trains out of core instead: one streamed pass over the train
+split collects document frequencies and class counts for a hashing
+featurizer, ``epochs`` passes fit an SGD logistic regression with
+``partial_fit``, and the splits are scored chunk by chunk, keeping only
+labels and scores. Only one chunk of texts is in memory at a time.
+
+With ``cascade=True`` it also fits the small stage-1 model of
+``cascade.py`` on the same split, calibrates its confidence band on the
+validation predictions of the full model and saves it next to the artifact;
+``metrics["cascade"]`` reports the throughput gained and accuracy lost on
+val and test.
+
+``publish_model`` publishes a pipeline fitted elsewhere (``compress``) the
+same way, so the pickle, ``metrics.json`` and the cascade never describe an
+older model than the artifact being served.
+"""
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+
+from . import instrumentation
+
+RESULTS_DIR = Path("results") / "phase1"
+METRICS_FILE = "metrics.json"
+SPLITS = ("train", "val", "test")
+# partial_fit passes over a streamed corpus.
+DEFAULT_EPOCHS = 5
+
+
+class TrainingResult(NamedTuple):
+    pipeline: object
+    metrics: dict
+    version: str
+
+
+def _json_ready(obj):
+    """Convert numpy arrays and scalars to native Python types for JSON."""
+    if isinstance(obj, dict):
+        return {k: _json_ready(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_json_ready(v) for v in obj]
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    if obj is None or isinstance(obj, (str, int)):
+        return obj
+    try:
+        return float(obj)
+    except Exception:
+        return obj
+
+
+def write_metrics(metrics, path):
+    """Write ``metrics`` as JSON atomically (readers never see a partial file)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_text(json.dumps(_json_ready(metrics), indent=2))
+    os.replace(tmp_path, path)
+
+
+def train_model(max_features=10000, ngram_range=(1, 2), C=1.0, backend="tfidf", n_bits=18,
+                test_size=0.15, val_size=0.15, dataset=None, use_cache=True,
+                registry=None, model_path=None, results_dir=RESULTS_DIR,
+                cascade=False, cascade_agreement=None, n_resamples=1000, corpus=None,
+                epochs=DEFAULT_EPOCHS):
+    """Featurize, fit, evaluate and publish one model.
+
+    ``corpus`` trains on a streamed corpus with the hashing featurizer
+    (``n_bits``, ``ngram_range``) instead of ``dataset``; its own split
+    sizes apply and ``max_features``/``backend`` are not used.
+    ``registry`` (default: the serving registry) receives the artifact;
+    ``model_path`` (default: ``pipeline.MODEL_PATH``) the joblib pickle.
+    Returns a ``TrainingResult`` whose ``version`` is the published
+    artifact's hash, as also written to ``results_dir/metrics.json``.
+    ``cascade_agreement`` defaults to ``cascade.DEFAULT_AGREEMENT``.
+    ``n_resamples`` bootstrap resamples give val/test confidence intervals
+    (0 skips them and the precision/recall curves).
+    """
+    from sklearn.pipeline import Pipeline
+
+    from .data import SpamDataset
+    from .feature_cache import FeatureCache, featurize_splits
+    from .features import TextFeaturizer
+    from .model import SpamClassifier, evaluation_metrics
+
+    if corpus is not None:
+        if cascade:
+            raise ValueError("The cascade needs an in-memory dataset, not a streamed corpus")
+        pipe, params, labels, scores = _fit_corpus(corpus, ngram_range, C, n_bits, epochs)
+    else:
+        dataset = dataset or SpamDataset(use_cache=use_cache)
+        split_params = [test_size, val_size, 42]
+        frames = dict(zip(SPLITS, dataset.load_split(test_size=test_size, val_size=val_size)))
+
+        featurizer = TextFeaturizer(max_features=max_features, ngram_range=ngram_range,
+                                    backend=backend, n_bits=n_bits)
+        classifier = SpamClassifier(C=C, class_weight="balanced")
+        with instrumentation.timer("train"):
+            texts = {split: frame["text"] for split, frame in frames.items()}
+            cache = FeatureCache(dataset.cache_dir) if use_cache else None
+            dataset_key = dataset.cache_key() if use_cache else None
+            X = featurize_splits(featurizer, texts, dataset_key, split_params, cache)
+            classifier.fit(X["train"], frames["train"]["label"])
+        with instrumentation.timer("evaluate"):
+            scores = {split: classifier.score(X[split]) for split in SPLITS}
+        labels = {split: frames[split]["label"].to_numpy() for split in SPLITS}
+        pipe = Pipeline([("tfidf", featurizer.vectorizer), ("clf", classifier.model)])
+        params = {**featurizer.params, "C": C, "test_size": test_size, "val_size": val_size}
+    metrics = {split: evaluation_metrics(labels[split], scores[split].labels,
+                                         scores[split].probabilities) for split in SPLITS}
+
+    registry, version = _save_pipeline(pipe, registry, model_path)
+
+    metrics = dict(metrics, model_version=version, params=params)
+    if cascade:
+        stage1, X1 = _train_stage1(texts, frames["train"]["label"], dataset_key, split_params,
+                                   cache, C)
+        metrics["cascade"] = _publish_cascade(stage1, X1, scores, frames, registry,
+                                              version, cascade_agreement)
+    if n_resamples:
+        metrics["confidence_intervals"] = _held_out_report(scores, labels, n_resamples,
+                                                           results_dir)
+    write_metrics(metrics, Path(results_dir) / METRICS_FILE)
+    return TrainingResult(pipe, metrics, version)
+
+
+def publish_model(pipe, frames, params, registry=None, model_path=None,
+                  results_dir=RESULTS_DIR, n_resamples=1000, cascade_agreement=None):
+    """Publish an already fitted ``pipe`` the way ``train_model`` does.
+
+    ``frames`` maps train/val/test to the DataFrames of the split ``pipe``
+    was fitted on. The splits are scored with the published artifact, so
+    ``metrics.json`` describes what is actually served, and a cascade saved
+    next to the artifact is recalibrated around the new version (keeping its
+    stage-1 model). Returns a ``TrainingResult``.
+    """
+    from .artifact import load_artifact
+    from .cascade import CONFIG_FILE, CascadeScorer
+    from .model import evaluation_metrics, score_matrix
+
+    registry, version = _save_pipeline(pipe, registry, model_path)
+    served = load_artifact(registry.path)
+    with instrumentation.timer("evaluate"):
+        scores = {split: score_matrix(served[-1], served[:-1].transform(frames[split]["text"]))
+                  for split in SPLITS}
+    labels = {split: frames[split]["label"].to_numpy() for split in SPLITS}
+    metrics = {split: evaluation_metrics(labels[split], scores[split].labels,
+                                         scores[split].probabilities) for split in SPLITS}
+    metrics = dict(metrics, model_version=version, params=params)
+
+    directory = Path(registry.path).parent
+    if (directory / CONFIG_FILE).exists():
+        stage1 = CascadeScorer.load(directory, served)[0].stage1
+        X1 = {"val": stage1[:-1].transform(frames["val"]["text"])}
+        metrics["cascade"] = _publish_cascade(stage1, X1, scores, frames, registry, version,
+                                              cascade_agreement, export_stage1=False)
+    if n_resamples:
+        metrics["confidence_intervals"] = _held_out_report(scores, labels, n_resamples,
+                                                           results_dir)
+    write_metrics(metrics, Path(results_dir) / METRICS_FILE)
+    return TrainingResult(pipe, metrics, version)
+
+
+def _save_pipeline(pipe, registry, model_path):
+    """Write the joblib pickle and publish the artifact; returns ``(registry, version)``."""
+    import joblib
+
+    from . import pipeline as serving
+
+    registry = registry or serving.get_registry()
+    model_path = Path(model_path or serving.MODEL_PATH)
+    # Keep the joblib pickle for sklearn tooling; serve the compact artifact.
+    model_path.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump(pipe, model_path)
+    return registry, registry.publish(pipe)
+
+
+def _fit_corpus(corpus, ngram_range, C, n_bits, epochs):
+    """Train on a streamed corpus; returns ``(pipeline, params, labels, scores)``.
+
+    ``labels`` and ``scores`` map each split to its labels and ``ScoreResult``.
+    """
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.pipeline import Pipeline
+
+    from .features import HashingTfidfVectorizer
+    from .model import ScoreResult, score_matrix
+    from .streaming import StreamingDataset
+
+    if not isinstance(corpus, StreamingDataset):
+        corpus = StreamingDataset(corpus)
+    vectorizer = HashingTfidfVectorizer(n_bits=n_bits, ngram_range=ngram_range)
+    doc_freq = np.zeros(2 ** n_bits, dtype=np.int64)
+    class_counts = np.zeros(2, dtype=np.int64)
+    with instrumentation.timer("train"):
+        for chunk in corpus.chunks("train"):
+            counts = vectorizer.hash_counts(chunk["text"])
+            doc_freq += np.bincount(counts.indices, minlength=len(doc_freq))
+            class_counts += np.bincount(chunk["label"], minlength=2)[:2]
+        if not class_counts.all():
+            raise ValueError("The corpus' train split must contain both ham and spam")
+        n_docs = int(class_counts.sum())
+        vectorizer.fit_document_frequencies(doc_freq, n_docs)
+        # LogisticRegression(C, class_weight="balanced") as SGD: alpha = 1 / (C * n).
+        clf = SGDClassifier(loss="log_loss", alpha=1.0 / (C * n_docs), random_state=42,
+                            class_weight={c: n_docs / (2 * n) for c, n in enumerate(class_counts)})
+        for _ in range(epochs):
+            for chunk in corpus.chunks("train"):
+                clf.partial_fit(vectorizer.transform(chunk["text"]), chunk["label"],
+                                classes=np.array([0, 1]))
+    labels, scores = {}, {}
+    with instrumentation.timer("evaluate"):
+        for split in SPLITS:
+            parts = [(chunk["label"].to_numpy(),
+                      score_matrix(clf, vectorizer.transform(chunk["text"])))
+                     for chunk in corpus.chunks(split)]
+            if not parts:
+                raise ValueError(f"The corpus has no {split} rows")
+            labels[split] = np.concatenate([y for y, _ in parts])
+            scores[split] = ScoreResult(*(np.concatenate(cols)
+                                          for cols in zip(*(result for _, result in parts))))
+    params = {
+        "backend": "hashing", "n_bits": n_bits, "ngram_range": list(ngram_range), "C": C,
+        "epochs": epochs, "test_size": corpus.test_size, "val_size": corpus.val_size,
+        "corpus": [str(path) for path in corpus.paths], "n_train": n_docs,
+    }
+    return Pipeline([("tfidf", vectorizer), ("clf", clf)]), params, labels, scores
+
+
+def _held_out_report(scores, labels, n_resamples, results_dir):
+    """Bootstrap CIs for val/test; writes ``pr_curve_<split>.csv`` files."""
+    from .evaluation import bootstrap_ci, write_pr_curve
+
+    intervals = {}
+    for split in ("val", "test"):
+        y, result = labels[split], scores[split]
+        intervals[split] = bootstrap_ci(y, result.probabilities, result.labels,
+                                        n_resamples=n_resamples)
+        write_pr_curve(Path(results_dir) / f"pr_curve_{split}.csv", y, result.probabilities)
+    return intervals
+
+
+def _train_stage1(texts, y_train, dataset_key, split_params, cache, C):
+    """Fit the cascade's stage-1 model; returns ``(pipeline, {split: X})``."""
+    from sklearn.pipeline import Pipeline
+
+    from .cascade import STAGE1_PARAMS
+    from .feature_cache import featurize_splits
+    from .features import TextFeaturizer
+    from .model import SpamClassifier
+
+    featurizer = TextFeaturizer(**STAGE1_PARAMS)
+    classifier = SpamClassifier(C=C, class_weight="balanced")
+    with instrumentation.timer("train_stage1"):
+        X = featurize_splits(featurizer, texts, dataset_key, split_params, cache)
+        classifier.fit(X["train"], y_train)
+    return Pipeline([("tfidf", featurizer.vectorizer), ("clf", classifier.model)]), X
+
+
+def _publish_cascade(stage1, X1, scores, frames, registry, version, agreement,
+                     export_stage1=True):
+    """Calibrate, save and evaluate the cascade around the published model.
+
+    Without ``export_stage1`` only ``cascade.json`` is rewritten; ``stage1``
+    is then the (mapped) stage-1 artifact already beside the model.
+    """
+    from .artifact import load_artifact
+    from .cascade import DEFAULT_AGREEMENT, CascadeScorer, calibrate_band, evaluate_cascade
+    from .model import score_matrix
+
+    agreement = DEFAULT_AGREEMENT if agreement is None else agreement
+    full_scores = {split: scores[split] for split in ("val", "test")}
+    stage1_val = score_matrix(stage1[-1], X1["val"])
+    low, high = calibrate_band(stage1_val.probabilities, full_scores["val"].labels, agreement)
+    directory = Path(registry.path).parent
+    scorer = CascadeScorer(stage1, None, low, high)
+    if export_stage1:
+        config = scorer.save(directory, version)
+    else:
+        config = scorer.save_config(directory, version)
+    # Time what serving runs: both stages loaded from their artifacts.
+    scorer, _ = CascadeScorer.load(directory, load_artifact(registry.path))
+    report = evaluate_cascade(
+        scorer, {split: frames[split] for split in full_scores}, full_scores
+    )
+    return dict(config, agreement=agreement, **report)
@@ -19,7 +19,8 @@ if str(REPO_ROOT) not in sys.path:
 	sys.path.insert(0, str(REPO_ROOT))
 
 from src.spam_classifier.pipeline import (
-	load_pipeline,
+	get_pipeline,
+	has_trained_model,
 	train_and_save_pipeline,
 	predict_texts,
 )
@@ -36,9 +37,11 @@ This demo shows a simple spam classifier trained on SMS messages. You can:
 """
 )
 
-# Ensure model exists (may use fallback inside load_pipeline)
-model = load_pipeline()
-if model is None:
+# Serve the published model; train (once, with the shared engine) only if
+# none exists yet. get_pipeline() falls back to a HAM-only model on errors.
+if has_trained_model():
+	model = get_pipeline()
+else:
 	with st.spinner("Training baseline model (this may take a minute)..."):
 		model = train_and_save_pipeline()
 	st.success("Model trained and saved.")
@@ -66,28 +69,29 @@ with col2:
 	st.subheader("Batch upload")
 	uploaded = st.file_uploader("Upload a CSV with a `text` column", type=["csv"]) 
 	if uploaded:
+		import os
+		import tempfile
 		import pandas as pd
+		from src.spam_classifier.batch import score_file
+		# Score in bounded-memory chunks into a temp file instead of
+		# materialising the whole upload and output CSV in memory.
+		fd, out_name = tempfile.mkstemp(suffix=".csv")
+		os.close(fd)
+		out_path = Path(out_name)
 		try:
-			df = pd.read_csv(uploaded)
-		except Exception as e:
-			st.error(f"Couldn't read CSV: {e}")
-			df = None
-		if df is not None:
-			if "text" not in df.columns:
-				st.error("CSV must contain a 'text' column")
-			else:
-				preds, probs = predict_texts(df["text"].astype(str).tolist())
-				df["pred"] = ["SPAM" if int(p) == 1 else "HAM" for p in preds]
-				try:
-					df["spam_prob"] = [float(p) for p in probs]
-				except Exception:
-					df["spam_prob"] = [1.0 if int(p) == 1 else 0.0 for p in preds]
-				st.dataframe(df.head(50))
+			stats = score_file(uploaded, out_path, input_format="csv", pipe=model)
+			st.dataframe(pd.read_csv(out_path, nrows=50))
+			st.caption(f"Scored {stats['rows']} rows ({stats['rows_per_sec']:.0f} rows/s)")
+			with open(out_path, "rb") as f:
 				st.download_button(
 					"Download predictions CSV",
-					df.to_csv(index=False).encode("utf-8"),
+					f,
 					file_name="predictions.csv",
 				)
+		except Exception as e:
+			st.error(f"Couldn't score CSV: {e}")
+		finally:
+			out_path.unlink(missing_ok=True)
 
 if show_metrics:
 	metrics_path = Path("results") / "phase1" / "metrics.json"
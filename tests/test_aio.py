@@ -0,0 +1,103 @@
+"""Test the asyncio scoring API."""
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+
+from spam_classifier.aio import AsyncScorer
+from spam_classifier.model import ScoreResult
+
+
+def fake_score(texts):
+    labels = np.array([1 if "free" in t else 0 for t in texts])
+    return ScoreResult(labels, labels * 0.9, labels - 0.5)
+
+
+def test_concurrent_callers_share_batches():
+    batch_sizes = []
+
+    def score_fn(texts):
+        batch_sizes.append(len(texts))
+        return fake_score(texts)
+
+    async def main():
+        async with AsyncScorer(score_fn, max_wait_ms=20) as scorer:
+            return await asyncio.gather(*(scorer.score([f"free {i}", "hi"]) for i in range(20)))
+
+    results = asyncio.run(main())
+    assert [list(r.labels) for r in results] == [[1, 0]] * 20
+    assert sum(batch_sizes) == 40
+    assert len(batch_sizes) < 20
+
+
+def test_batches_never_exceed_max_batch_size():
+    batch_sizes = []
+
+    def score_fn(texts):
+        batch_sizes.append(len(texts))
+        return fake_score(texts)
+
+    texts = [f"free {i}" if i % 3 == 0 else f"hi {i}" for i in range(10)]
+
+    async def main():
+        async with AsyncScorer(score_fn, max_batch_size=4, max_wait_ms=20) as scorer:
+            small = [scorer.score([f"free {i}", "hi", "hi"]) for i in range(6)]
+            return await asyncio.gather(scorer.score(texts), *small)
+
+    big, *small = asyncio.run(main())
+    assert max(batch_sizes) <= 4
+    assert sum(batch_sizes) == 28
+    # The oversized request is scored in slices and merged back in order.
+    assert list(big.labels) == list(fake_score(texts).labels)
+    assert len(big.probabilities) == len(big.margins) == 10
+    assert [list(r.labels) for r in small] == [[1, 0, 0]] * 6
+
+
+def test_queue_full_pushes_back():
+    release = threading.Event()
+
+    def slow_score(texts):
+        release.wait(5)
+        return fake_score(texts)
+
+    async def main():
+        scorer = AsyncScorer(slow_score, max_batch_size=1, max_wait_ms=0,
+                             max_queue=2, max_in_flight=1)
+        # One batch running, one held by the batcher, two filling the queue.
+        tasks = [asyncio.ensure_future(scorer.score(["free"])) for _ in range(4)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(asyncio.QueueFull):
+            await scorer.score_nowait(["free"])
+        release.set()
+        results = await asyncio.gather(*tasks)
+        await scorer.close()
+        return results
+
+    assert len(asyncio.run(main())) == 4
+
+
+def test_errors_reach_every_caller():
+    def broken(texts):
+        raise RuntimeError("boom")
+
+    async def main():
+        async with AsyncScorer(broken, max_wait_ms=5) as scorer:
+            return await asyncio.gather(scorer.score(["a"]), scorer.score(["b"]),
+                                        return_exceptions=True)
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(main()))
+
+
+def test_failed_slice_fails_the_whole_request():
+    def score_fn(texts):
+        if "boom" in texts:
+            raise RuntimeError("boom")
+        return fake_score(texts)
+
+    async def main():
+        async with AsyncScorer(score_fn, max_batch_size=2, max_wait_ms=1) as scorer:
+            return await scorer.score(["free", "hi", "boom"])
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(main())
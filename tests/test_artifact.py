@@ -0,0 +1,89 @@
+"""Test the compact memory-mapped model artifact."""
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from spam_classifier.artifact import CompactModel, export_pipeline, load_artifact
+from spam_classifier.features import build_vectorizer
+
+TRAIN = [
+    "hello how are you", "win free money now", "meeting at 3pm",
+    "claim your prize now", "café at noon?", "free entry to win £1000",
+]
+LABELS = [0, 1, 0, 1, 0, 1]
+QUERIES = TRAIN + ["free café prize", "unseen words only", ""]
+
+
+@pytest.mark.parametrize("backend", ["tfidf", "hashing"])
+def test_round_trip_matches_sklearn(tmp_path, backend):
+    pipe = Pipeline([
+        ("tfidf", build_vectorizer(backend, max_features=20, n_bits=12, max_df=1.0)),
+        ("clf", LogisticRegression()),
+    ]).fit(TRAIN, LABELS)
+    path = tmp_path / "pipeline.spm"
+    export_pipeline(pipe, path)
+    mapped = load_artifact(path)
+
+    np.testing.assert_allclose(mapped.predict_proba(QUERIES), pipe.predict_proba(QUERIES))
+    assert list(mapped.predict(QUERIES)) == list(pipe.predict(QUERIES))
+
+    # Pickles by path only, so workers re-map the file instead of copying it.
+    assert len(pickle.dumps(mapped)) < 1024
+    np.testing.assert_allclose(pickle.loads(pickle.dumps(mapped)).predict_proba(QUERIES),
+                               pipe.predict_proba(QUERIES))
+
+
+def test_steps_share_one_mapping_across_a_publish(tmp_path):
+    path = tmp_path / "pipeline.spm"
+    old = Pipeline([("tfidf", build_vectorizer("tfidf", max_df=1.0)),
+                    ("clf", LogisticRegression())]).fit(TRAIN, LABELS)
+    export_pipeline(old, path)
+    mapped = load_artifact(path)
+    assert mapped.named_steps["tfidf"]._model is mapped.named_steps["clf"]._model
+
+    # Replace the file, as a publish does; the loaded steps keep the old model.
+    new = Pipeline([("tfidf", build_vectorizer("tfidf", max_df=1.0)),
+                    ("clf", LogisticRegression())]).fit(TRAIN[:4], LABELS[:4])
+    export_pipeline(new, tmp_path / "next.spm")
+    (tmp_path / "next.spm").replace(path)
+    np.testing.assert_allclose(mapped.predict_proba(QUERIES), old.predict_proba(QUERIES))
+
+    restored = pickle.loads(pickle.dumps(mapped))
+    assert restored.named_steps["tfidf"]._model is restored.named_steps["clf"]._model
+    with pytest.raises(TypeError, match="read-only"):
+        mapped.named_steps["clf"].fit(None)
+
+
+def test_vocabulary_is_sorted_string_table(tmp_path):
+    pipe = Pipeline([("tfidf", build_vectorizer("tfidf")), ("clf", LogisticRegression())])
+    pipe.fit(TRAIN, LABELS)
+    export_pipeline(pipe, tmp_path / "pipeline.spm")
+    vectorizer = load_artifact(tmp_path / "pipeline.spm").named_steps["tfidf"]
+
+    names = list(vectorizer.get_feature_names_out())
+    assert names == sorted(pipe.named_steps["tfidf"].vocabulary_)
+    assert vectorizer.vocabulary.index("café") == names.index("café")
+    assert vectorizer.vocabulary.index("not-a-term") == -1
+
+
+@pytest.mark.parametrize("backend", ["tfidf", "hashing"])
+@pytest.mark.parametrize("dtype,tol", [("float32", 1e-6), ("int8", 0.05)])
+def test_quantized_export_is_smaller_and_close(tmp_path, backend, dtype, tol):
+    pipe = Pipeline([
+        ("tfidf", build_vectorizer(backend, max_features=20, n_bits=12, max_df=1.0)),
+        ("clf", LogisticRegression()),
+    ]).fit(TRAIN, LABELS)
+    export_pipeline(pipe, tmp_path / "full.spm")
+    export_pipeline(pipe, tmp_path / "small.spm", dtype=dtype)
+    small = load_artifact(tmp_path / "small.spm")
+
+    stored = CompactModel(tmp_path / "small.spm").array("coef").dtype
+    assert stored == np.dtype("i1" if dtype == "int8" else "<f4")
+    assert (tmp_path / "small.spm").stat().st_size <= (tmp_path / "full.spm").stat().st_size
+    np.testing.assert_allclose(small.predict_proba(QUERIES), pipe.predict_proba(QUERIES),
+                               atol=tol)
+    with pytest.raises(ValueError, match="dtype"):
+        export_pipeline(pipe, tmp_path / "bad.spm", dtype="float16")
@@ -0,0 +1,65 @@
+"""Test the streaming batch scorer."""
+import json
+
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from spam_classifier.batch import score_file
+
+
+@pytest.fixture
+def pipe():
+    texts = ["hello how are you", "win free money now", "meeting at 3pm", "claim your prize now"]
+    pipeline = Pipeline([("tfidf", TfidfVectorizer()), ("clf", LogisticRegression())])
+    return pipeline.fit(texts, [0, 1, 0, 1])
+
+
+def test_score_csv_in_chunks(tmp_path, pipe):
+    src = tmp_path / "in.csv"
+    texts = [f"win free money {i}" if i % 2 else f"see you at {i}" for i in range(25)]
+    pd.DataFrame({"id": range(25), "message": texts}).to_csv(src, index=False)
+
+    seen = []
+    stats = score_file(src, tmp_path / "out.csv", chunk_size=4, pipe=pipe,
+                       progress=lambda rows, _: seen.append(rows))
+
+    out = pd.read_csv(tmp_path / "out.csv")
+    assert stats["rows"] == 25
+    assert seen == [4, 8, 12, 16, 20, 24, 25]
+    assert list(out["id"]) == list(range(25))
+    assert set(out["pred"]) <= {"SPAM", "HAM"}
+    expected = pipe.predict_proba(texts)[:, 1]
+    assert list(out["spam_prob"]) == pytest.approx(list(expected))
+
+
+def test_score_jsonl(tmp_path, pipe):
+    src = tmp_path / "in.jsonl"
+    src.write_text("\n".join(json.dumps({"text": t}) for t in ["win free money", "hello"]) + "\n")
+    score_file(src, tmp_path / "out.jsonl", chunk_size=1, pipe=pipe)
+    rows = [json.loads(line) for line in (tmp_path / "out.jsonl").read_text().splitlines()]
+    assert [r["text"] for r in rows] == ["win free money", "hello"]
+    assert all("spam_prob" in r for r in rows)
+
+
+def test_missing_text_column(tmp_path, pipe):
+    src = tmp_path / "in.csv"
+    pd.DataFrame({"other": ["x"]}).to_csv(src, index=False)
+    with pytest.raises(ValueError):
+        score_file(src, tmp_path / "out.csv", pipe=pipe)
+
+
+def test_parallel_matches_serial(tmp_path, pipe):
+    src = tmp_path / "in.csv"
+    texts = [f"claim your free prize {i}" if i % 3 else f"lunch at {i}" for i in range(50)]
+    pd.DataFrame({"text": texts}).to_csv(src, index=False)
+
+    score_file(src, tmp_path / "serial.csv", chunk_size=7, pipe=pipe)
+    stats = score_file(src, tmp_path / "parallel.csv", chunk_size=7, pipe=pipe, workers=2)
+
+    serial = pd.read_csv(tmp_path / "serial.csv")
+    parallel = pd.read_csv(tmp_path / "parallel.csv")
+    assert stats["rows"] == 50
+    pd.testing.assert_frame_equal(serial, parallel)
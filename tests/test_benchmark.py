@@ -0,0 +1,30 @@
+"""Test the benchmark suite's corpus generator and baseline comparison."""
+import pandas as pd
+
+from scripts.benchmark import compare, synthesize_corpus
+
+
+def test_synthesize_corpus_keeps_balance_and_vocabulary():
+    source = pd.DataFrame({
+        "label": [0, 0, 0, 1],
+        "text": ["see you soon", "on my way home", "call me later", "free prize now"],
+    })
+    corpus = synthesize_corpus(source, 2000, seed=1)
+    assert len(corpus) == 2000
+    assert 0.2 < (corpus["label"] == "spam").mean() < 0.3
+    spam_words = set(" ".join(corpus.loc[corpus["label"] == "spam", "text"]).split())
+    assert spam_words == {"free", "prize", "now"}
+    assert synthesize_corpus(source, 50, seed=1).equals(synthesize_corpus(source, 50, seed=1))
+
+
+def test_compare_flags_slower_times_and_rates():
+    def report(seconds, rate):
+        return {"results": {"10": {"fit": {"seconds": seconds, "peak_rss_mb": 1.0},
+                                   "predict": {"msgs_per_sec": rate}}}}
+
+    rows = {key: regressed for key, *_, regressed
+            in compare(report(1.5, 100.0), report(1.0, 100.0), tolerance=0.2)}
+    assert rows == {"10/fit/seconds": True, "10/predict/msgs_per_sec": False}
+    rows = {key: regressed for key, *_, regressed
+            in compare(report(1.0, 50.0), report(1.0, 100.0), tolerance=0.2)}
+    assert rows["10/predict/msgs_per_sec"] is True
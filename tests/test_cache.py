@@ -0,0 +1,45 @@
+"""Test the content-addressed prediction cache."""
+import numpy as np
+
+from spam_classifier.cache import PredictionCache
+from spam_classifier.model import ScoreResult
+
+
+class CountingScorer:
+    def __init__(self):
+        self.seen = []
+
+    def __call__(self, texts):
+        self.seen.append(list(texts))
+        labels = np.array([1 if "free" in t.lower() else 0 for t in texts])
+        return ScoreResult(labels, labels * 0.9, labels - 0.5)
+
+
+def test_duplicates_scored_once_and_fanned_out():
+    cache, scorer = PredictionCache(), CountingScorer()
+    result = cache.score(["FREE prize", "hi", " free prize ", "hi"], scorer, version="v1")
+
+    assert scorer.seen == [["FREE prize", "hi"]]
+    assert list(result.labels) == [1, 0, 1, 0]
+    assert list(result.probabilities) == [0.9, 0.0, 0.9, 0.0]
+
+    cache.score(["hi", "new one"], scorer, version="v1")
+    assert scorer.seen[-1] == ["new one"]
+    assert cache.stats()["hits"] == 3
+
+
+def test_model_swap_invalidates():
+    cache, scorer = PredictionCache(), CountingScorer()
+    cache.score(["free"], scorer, version="v1")
+    cache.score(["free"], scorer, version="v2")
+    assert len(scorer.seen) == 2
+    assert len(cache) == 1
+
+
+def test_lru_eviction():
+    cache, scorer = PredictionCache(max_entries=2), CountingScorer()
+    cache.score(["a", "b"], scorer, version="v1")
+    cache.score(["a"], scorer, version="v1")  # "a" is now most recent
+    cache.score(["c"], scorer, version="v1")  # evicts "b"
+    cache.score(["a", "b"], scorer, version="v1")
+    assert scorer.seen[-1] == ["b"]
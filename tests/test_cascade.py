@@ -0,0 +1,75 @@
+"""Test cascade calibration, routing and training."""
+import json
+
+import numpy as np
+
+from spam_classifier import instrumentation
+from spam_classifier.artifact import export_pipeline, load_artifact
+from spam_classifier.cascade import CascadeScorer, calibrate_band
+from spam_classifier.data import SpamDataset
+from spam_classifier.pipeline import score_texts
+from spam_classifier.registry import ModelRegistry
+from spam_classifier.training import train_model
+
+ROWS = ["ham,See you at dinner tonight", "spam,FREE prize call now to claim",
+        "ham,Running late for the meeting", "spam,Win cash now text WIN to claim",
+        "ham,ok thanks see you soon"] * 12
+
+
+def test_calibrate_band_keeps_agreeing_extremes():
+    proba = np.array([0.05, 0.1, 0.2, 0.4, 0.6, 0.7, 0.9, 0.95])
+    reference = np.array([0, 0, 0, 1, 0, 1, 1, 1])
+    assert calibrate_band(proba, reference, agreement=1.0) == (0.2, 0.7)
+    # 4 of the 5 lowest are ham, which would reach 0.6; low is capped at 0.5.
+    assert calibrate_band(proba, reference, agreement=0.8)[0] == 0.5
+
+
+def test_calibrate_band_without_agreement_routes_everything():
+    assert calibrate_band([0.2, 0.8], [1, 0], agreement=1.0) == (0.0, 1.0)
+
+
+def _train(tmp_path, **kwargs):
+    (tmp_path / "data" / "raw").mkdir(parents=True)
+    (tmp_path / "data" / "raw" / "sms_spam_no_header.csv").write_text("\n".join(ROWS) + "\n")
+    registry = ModelRegistry(tmp_path / "models" / "pipeline.spm", loader=load_artifact,
+                             dumper=export_pipeline)
+    result = train_model(max_features=50, dataset=SpamDataset(tmp_path / "data"),
+                         registry=registry, model_path=tmp_path / "models" / "pipeline.joblib",
+                         results_dir=tmp_path / "results", **kwargs)
+    return result, registry
+
+
+def test_train_publishes_and_reports_cascade(tmp_path):
+    result, _ = _train(tmp_path, cascade=True)
+    report = json.loads((tmp_path / "results" / "metrics.json").read_text())["cascade"]
+    assert report["low"] == result.metrics["cascade"]["low"]
+    assert report["full_version"] == result.version
+    assert 0.0 <= report["low"] <= 0.5 <= report["high"] <= 1.0
+    for split in ("val", "test"):
+        assert set(report[split]) >= {"routed_fraction", "accuracy_loss", "speedup", "f1"}
+    scorer, config = CascadeScorer.load(tmp_path / "models", result.pipeline)
+    assert config["stage1_version"] == report["stage1_version"]
+
+
+def test_cascade_routes_only_the_uncertain_band(tmp_path):
+    result, _ = _train(tmp_path, cascade=True)
+    texts = ["free prize call now", "see you at dinner", "win cash now", "running late"]
+    loaded, _ = CascadeScorer.load(tmp_path / "models", result.pipeline)
+    first = score_texts(texts, pipe=loaded.stage1)
+    full = score_texts(texts, pipe=result.pipeline)
+
+    everything = CascadeScorer(loaded.stage1, result.pipeline, 0.0, 1.0)
+    assert np.allclose(everything.score(texts).probabilities, full.probabilities)
+
+    nothing = CascadeScorer(loaded.stage1, result.pipeline, 0.5, 0.5)
+    instrumentation.get_metrics().reset()
+    instrumentation.enable()
+    try:
+        scored = nothing.score(texts)
+        counters = instrumentation.snapshot()["counters"]
+    finally:
+        instrumentation.disable()
+        instrumentation.get_metrics().reset()
+    assert np.allclose(scored.probabilities, first.probabilities)
+    assert counters["cascade_messages"] == 4
+    assert counters.get("cascade_routed_messages", 0) == 0
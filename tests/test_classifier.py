@@ -61,4 +61,47 @@ def test_model_training(sample_data):
     # Evaluate
     metrics = classifier.evaluate(X, df["label"])
     assert 0 <= metrics["accuracy"] <= 1
-    assert "confusion_matrix" in metrics
\ No newline at end of file
+    assert "confusion_matrix" in metrics
+
+def test_score_matches_predict_and_proba(sample_data):
+    """Test the single-pass scoring API against predict/predict_proba."""
+    dataset = SpamDataset()
+    df = dataset.preprocess(sample_data)
+    featurizer = TextFeaturizer(max_features=100)
+    X = featurizer.fit_transform(df["text"])
+    classifier = SpamClassifier().fit(X, df["label"])
+
+    labels, probs, margins = classifier.score(X)
+    assert list(labels) == list(classifier.predict(X))
+    assert probs == pytest.approx(classifier.predict_proba(X)[:, 1])
+    assert margins == pytest.approx(classifier.model.decision_function(X))
+
+
+def test_score_texts_vectorizes_once(sample_data, monkeypatch):
+    """Test scoring raw texts with one featurizer pass."""
+    df = SpamDataset().preprocess(sample_data)
+    featurizer = TextFeaturizer(max_features=100)
+    X = featurizer.fit_transform(df["text"])
+    classifier = SpamClassifier().fit(X, df["label"])
+
+    calls = []
+    transform = featurizer.transform
+    monkeypatch.setattr(featurizer, "transform", lambda texts: calls.append(1) or transform(texts))
+    result = classifier.score_texts(featurizer, df["text"])
+    assert calls == [1]
+    expected = classifier.score(X)
+    assert list(result.labels) == list(expected.labels)
+    assert result.probabilities == pytest.approx(expected.probabilities)
+    assert result.margins == pytest.approx(expected.margins)
+
+
+def test_hashing_featurizer(sample_data):
+    """Test the hashing backend: fixed width, stateless transform."""
+    featurizer = TextFeaturizer(backend="hashing", n_bits=16)
+    X = featurizer.fit_transform(sample_data["text"])
+
+    assert X.shape == (4, 2 ** 16)
+    assert (abs(X.multiply(X).sum(axis=1) - 1) < 1e-9).all()  # L2-normalised rows
+    assert (featurizer.transform(sample_data["text"]) != X).nnz == 0
+    # Unseen n-grams have zero IDF and are dropped, like out-of-vocabulary terms.
+    assert featurizer.transform(["zzz qqq"]).nnz == 0
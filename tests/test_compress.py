@@ -0,0 +1,107 @@
+"""Test coefficient pruning and the compression report."""
+import json
+
+import numpy as np
+
+from spam_classifier.artifact import export_pipeline, load_artifact
+from spam_classifier.compress import compress_model, kept_columns, prune_pipeline
+from spam_classifier.data import SpamDataset
+from spam_classifier.registry import ModelRegistry
+from spam_classifier.training import train_model
+
+ROWS = ["ham,See you at dinner tonight", "spam,FREE prize call now to claim",
+        "ham,Running late for the meeting", "spam,Win cash now text WIN to claim",
+        "ham,ok thanks see you soon"] * 12
+
+
+def test_kept_columns_by_threshold_and_top_n():
+    coef = np.array([0.5, -2.0, 0.01, 1.0, -0.02])
+    assert kept_columns(coef, threshold=0.1).tolist() == [0, 1, 3]
+    assert kept_columns(coef, top_n=2).tolist() == [1, 3]
+    assert kept_columns(coef, threshold=0.1, top_n=5).tolist() == [0, 1, 3]
+
+
+def _train(tmp_path):
+    (tmp_path / "data" / "raw").mkdir(parents=True)
+    (tmp_path / "data" / "raw" / "sms_spam_no_header.csv").write_text("\n".join(ROWS) + "\n")
+    registry = ModelRegistry(tmp_path / "models" / "pipeline.spm", loader=load_artifact,
+                             dumper=export_pipeline)
+    dataset = SpamDataset(tmp_path / "data")
+    train_model(max_features=50, dataset=dataset, registry=registry,
+                model_path=tmp_path / "models" / "pipeline.joblib",
+                results_dir=tmp_path / "results")
+    return dataset
+
+
+def test_pruned_pipeline_drops_terms_and_keeps_their_weights(tmp_path):
+    import joblib
+
+    _train(tmp_path)
+    pipe = joblib.load(tmp_path / "models" / "pipeline.joblib")
+    pruned = prune_pipeline(pipe, top_n=5)
+    coef = pipe.named_steps["clf"].coef_[0]
+    names = pipe.named_steps["tfidf"].get_feature_names_out()
+    kept = kept_columns(coef, top_n=5)
+
+    assert list(pruned.named_steps["tfidf"].get_feature_names_out()) == list(names[kept])
+    np.testing.assert_array_equal(pruned.named_steps["clf"].coef_[0], coef[kept])
+    assert pruned.predict(["free prize call now"]).tolist() == [1]
+
+
+def test_compress_model_reports_size_speed_and_metric_delta(tmp_path):
+    dataset = _train(tmp_path)
+    result = compress_model(top_n=10, dtype="int8", dataset=dataset,
+                            source=tmp_path / "models" / "pipeline.joblib",
+                            results_dir=tmp_path / "results")
+
+    saved = json.loads((tmp_path / "results" / "compression.json").read_text())
+    assert saved["model_version"] == result["model_version"]
+    assert saved["compressed"]["n_features"] == 10
+    assert saved["compressed"]["size_bytes"] < saved["reference"]["size_bytes"]
+    assert set(saved["metric_delta"]) == {"val", "test"}
+    assert set(saved["metric_delta"]["test"]) >= {"accuracy", "f1"}
+    assert load_artifact(result["artifact"]).predict(["free prize call now"]).tolist() == [1]
+
+
+def test_publish_moves_pickle_metrics_and_cascade_to_the_new_version(tmp_path):
+    import joblib
+
+    (tmp_path / "data" / "raw").mkdir(parents=True)
+    (tmp_path / "data" / "raw" / "sms_spam_no_header.csv").write_text("\n".join(ROWS) + "\n")
+    registry = ModelRegistry(tmp_path / "models" / "pipeline.spm", loader=load_artifact,
+                             dumper=export_pipeline)
+    dataset = SpamDataset(tmp_path / "data")
+    model_path = tmp_path / "models" / "pipeline.joblib"
+    trained = train_model(max_features=50, dataset=dataset, registry=registry,
+                          model_path=model_path, results_dir=tmp_path / "results",
+                          cascade=True, n_resamples=20)
+
+    result = compress_model(top_n=10, dtype="int8", dataset=dataset, source=model_path,
+                            results_dir=tmp_path / "results", publish=True,
+                            registry=registry, n_resamples=20)
+
+    version = result["model_version"]
+    assert version != trained.version and result["baseline_version"] == trained.version
+    assert result["artifact"] == str(registry.path)
+    metrics = json.loads((tmp_path / "results" / "metrics.json").read_text())
+    assert metrics["model_version"] == version
+    assert metrics["params"]["compression"] == result["params"]
+    cascade = json.loads((tmp_path / "models" / "cascade.json").read_text())
+    assert cascade["full_version"] == metrics["cascade"]["full_version"] == version
+    # The pickle is the compressed model, with the weights the int8 artifact stores.
+    pickled, served = joblib.load(model_path), load_artifact(registry.path)
+    texts = [row.split(",", 1)[1] for row in ROWS[:5]]
+    assert len(pickled.named_steps["tfidf"].vocabulary_) == 10
+    np.testing.assert_allclose(pickled.predict_proba(texts), served.predict_proba(texts))
+
+
+def test_pruned_vectorizer_is_built_from_public_parameters(tmp_path):
+    import joblib
+
+    _train(tmp_path)
+    pipe = joblib.load(tmp_path / "models" / "pipeline.joblib")
+    vectorizer = prune_pipeline(pipe, top_n=5).named_steps["tfidf"]
+    terms = list(vectorizer.get_feature_names_out())
+    assert vectorizer.get_params()["vocabulary"] == {t: j for j, t in enumerate(terms)}
+    X = vectorizer.transform(["free prize call now"])
+    assert X.shape == (1, 5)
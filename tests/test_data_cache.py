@@ -0,0 +1,35 @@
+"""Test the preprocessed dataset and split cache."""
+import pandas as pd
+
+from spam_classifier.data import SpamDataset
+
+ROWS = ["ham,See you at dinner", "spam,FREE prize call now", "ham,  Running late ",
+        'spam,"Win cash, text WIN"', "ham,ok ☺ thanks"] * 8
+
+
+def _write_raw(data_dir, rows):
+    (data_dir / "raw").mkdir(parents=True, exist_ok=True)
+    (data_dir / "raw" / "sms_spam_no_header.csv").write_text("\n".join(rows) + "\n",
+                                                             encoding="utf-8")
+
+
+def test_cached_split_matches_uncached(tmp_path):
+    _write_raw(tmp_path, ROWS)
+    expected = SpamDataset(tmp_path, use_cache=False).load_split(test_size=0.2, val_size=0.2)
+    for _ in range(2):  # cold, then served from the cache
+        got = SpamDataset(tmp_path).load_split(test_size=0.2, val_size=0.2)
+        for a, b in zip(expected, got):
+            pd.testing.assert_frame_equal(a, b)
+    assert len(list((tmp_path / "cache").glob("*.npz"))) == 2
+
+
+def test_cache_keyed_by_raw_file_and_split(tmp_path):
+    _write_raw(tmp_path, ROWS)
+    dataset = SpamDataset(tmp_path)
+    dataset.load_split(test_size=0.2, val_size=0.2)
+    dataset.load_split(test_size=0.25, val_size=0.2)
+    assert len(list((tmp_path / "cache").glob("split-*.npz"))) == 2
+
+    _write_raw(tmp_path, ROWS + ["spam,new free offer"] * 5)
+    train, val, test = dataset.load_split(test_size=0.2, val_size=0.2)
+    assert len(train) + len(val) + len(test) == len(ROWS) + 5
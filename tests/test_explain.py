@@ -0,0 +1,70 @@
+"""Test per-message token attributions."""
+import numpy as np
+import pytest
+from sklearn.dummy import DummyClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from spam_classifier.artifact import export_pipeline, load_artifact
+from spam_classifier.explain import Explainer, explainer_for
+from spam_classifier.features import build_vectorizer
+
+TEXTS = ["free prize call now", "see you at dinner", "win free cash now", "running late sorry",
+         "claim your free prize", "ok see you soon", "call now to win", "dinner was great"]
+LABELS = [1, 0, 1, 0, 1, 0, 1, 0]
+QUERY = ["free dinner prize now", "see you soon ok", "", "unknown words only"]
+
+
+def _pipeline(backend):
+    vectorizer = build_vectorizer(backend, n_bits=12, max_df=1.0)
+    return Pipeline([("tfidf", vectorizer), ("clf", LogisticRegression(C=10))]).fit(TEXTS, LABELS)
+
+
+def _contributions(pipe, text):
+    vectorizer, clf = pipe.named_steps["tfidf"], pipe.named_steps["clf"]
+    x = vectorizer.transform([text]).toarray()[0]
+    return {term: x[j] * clf.coef_[0][j] for term, j in vectorizer.vocabulary_.items() if x[j]}
+
+
+def test_margins_and_top_k_match_brute_force():
+    pipe = _pipeline("tfidf")
+    explanations = Explainer.from_pipeline(pipe).explain(QUERY, k=2)
+    np.testing.assert_allclose([e.margin for e in explanations], pipe.decision_function(QUERY))
+    for text, explanation in zip(QUERY, explanations):
+        contrib = _contributions(pipe, text)
+        values = sorted(contrib.values())
+        spam = [v for v in reversed(values) if v > 0][:2]
+        ham = [v for v in values if v < 0][:2]
+        # Strongest first; ties may come in any order, so compare weights.
+        np.testing.assert_allclose([w for _, w in explanation.spam_tokens], spam)
+        np.testing.assert_allclose([w for _, w in explanation.ham_tokens], ham)
+        for term, weight in explanation.spam_tokens + explanation.ham_tokens:
+            assert contrib[term] == pytest.approx(weight)
+    assert explanations[2].spam_tokens == explanations[2].ham_tokens == []
+
+
+def test_global_index_and_cache():
+    pipe = _pipeline("tfidf")
+    explainer = explainer_for(pipe)
+    assert explainer_for(pipe) is explainer
+    coef = pipe.named_steps["clf"].coef_[0]
+    names = pipe.named_steps["tfidf"].get_feature_names_out()
+    assert explainer.top_tokens(3) == [(names[j], coef[j]) for j in np.argsort(-coef)[:3]]
+    assert explainer.top_tokens(1, label="ham")[0][0] == names[np.argmin(coef)]
+    with pytest.raises(ValueError):
+        Explainer.from_pipeline(Pipeline([("tfidf", build_vectorizer()),
+                                          ("clf", DummyClassifier())]).fit(TEXTS, LABELS))
+
+
+def test_mapped_and_hashed_pipelines(tmp_path):
+    pipe = _pipeline("tfidf")
+    export_pipeline(pipe, tmp_path / "model.spm")
+    mapped = Explainer.from_pipeline(load_artifact(tmp_path / "model.spm"))
+    assert mapped.explain(QUERY) == Explainer.from_pipeline(pipe).explain(QUERY)
+
+    hashed = _pipeline("hashing")
+    explanations = Explainer.from_pipeline(hashed).explain(QUERY, k=3)
+    np.testing.assert_allclose([e.margin for e in explanations], hashed.decision_function(QUERY))
+    terms = hashed.named_steps["tfidf"].build_analyzer()(QUERY[0])
+    assert explanations[0].spam_tokens
+    assert all(t in terms for t, _ in explanations[0].spam_tokens + explanations[0].ham_tokens)
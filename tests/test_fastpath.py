@@ -0,0 +1,45 @@
+"""Test the fast-path linear scorer against sklearn."""
+import numpy as np
+import pytest
+from sklearn.dummy import DummyClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from spam_classifier.artifact import export_pipeline, load_artifact
+from spam_classifier.fastpath import LinearScorer
+from spam_classifier.features import HashingTfidfVectorizer
+
+TRAIN = [
+    "hello how are you", "win free money now now", "meeting at 3pm",
+    "claim your prize now", "café at noon?", "free entry to win £1000",
+]
+LABELS = [0, 1, 0, 1, 0, 1]
+QUERIES = TRAIN + ["free free café prize", "unseen words only", ""]
+
+
+@pytest.mark.parametrize("vectorizer", [
+    TfidfVectorizer(ngram_range=(1, 2)),
+    TfidfVectorizer(sublinear_tf=True, norm="l1"),
+    TfidfVectorizer(binary=True, use_idf=False),
+    HashingTfidfVectorizer(n_bits=12),
+])
+def test_matches_sklearn(tmp_path, vectorizer):
+    pipe = Pipeline([("tfidf", vectorizer), ("clf", LogisticRegression())]).fit(TRAIN, LABELS)
+    expected = pipe.predict_proba(QUERIES)[:, 1]
+
+    result = LinearScorer.from_pipeline(pipe).score(QUERIES)
+    np.testing.assert_allclose(result.probabilities, expected, atol=1e-12)
+    assert list(result.labels) == list(pipe.predict(QUERIES))
+
+    export_pipeline(pipe, tmp_path / "pipeline.spm")
+    mapped = LinearScorer.from_pipeline(load_artifact(tmp_path / "pipeline.spm"))
+    label, proba, _ = mapped.score_one(QUERIES[1])
+    assert proba == pytest.approx(expected[1], abs=1e-12)
+    assert label == pipe.predict(QUERIES[1:2])[0]
+
+
+def test_rejects_non_logistic_pipeline():
+    pipe = Pipeline([("tfidf", TfidfVectorizer()), ("clf", DummyClassifier())]).fit(TRAIN, LABELS)
+    with pytest.raises(ValueError):
+        LinearScorer.from_pipeline(pipe)
@@ -0,0 +1,50 @@
+"""Test the fitted-featurizer and feature-matrix cache."""
+import pytest
+
+from spam_classifier.feature_cache import FeatureCache, featurize_splits
+from spam_classifier.features import TextFeaturizer
+
+TEXTS = {
+    "train": ["free prize call now", "see you at dinner", "win cash now", "running late",
+              "free entry win", "ok thanks see you"],
+    "val": ["call now to win", "dinner at eight"],
+    "test": ["free cash", "see you"],
+}
+
+
+@pytest.mark.parametrize("backend", ["tfidf", "hashing"])
+def test_second_run_skips_vectorization(tmp_path, backend):
+    cache = FeatureCache(tmp_path)
+    expected = featurize_splits(TextFeaturizer(backend=backend, n_bits=10), TEXTS,
+                                "data-v1", [0.15, 0.15, 42], cache)
+
+    featurizer = TextFeaturizer(backend=backend, n_bits=10)
+
+    def fail(texts):
+        raise AssertionError("vectorized despite a warm cache")
+    featurizer.fit_transform = featurizer.transform = fail
+    got = featurize_splits(featurizer, TEXTS, "data-v1", [0.15, 0.15, 42], cache)
+
+    for split, X in expected.items():
+        assert (got[split] != X).nnz == 0 and got[split].shape == X.shape
+        assert not got[split].data.flags.writeable  # a view of the read-only mmap
+    # The cached vectorizer is handed back, so new texts still transform.
+    assert featurizer.vectorizer.transform(["free prize"]).shape[1] == expected["val"].shape[1]
+
+
+def test_keyed_by_dataset_split_and_params(tmp_path):
+    cache = FeatureCache(tmp_path)
+    featurize_splits(TextFeaturizer(), TEXTS, "data-v1", [0.15, 0.15, 42], cache)
+    featurize_splits(TextFeaturizer(), TEXTS, "data-v2", [0.15, 0.15, 42], cache)
+    featurize_splits(TextFeaturizer(), TEXTS, "data-v1", [0.2, 0.15, 42], cache)
+    featurize_splits(TextFeaturizer(max_features=3), TEXTS, "data-v1", [0.15, 0.15, 42], cache)
+    assert len(list(cache.cache_dir.iterdir())) == 4
+
+
+def test_incomplete_split_is_recomputed(tmp_path):
+    cache = FeatureCache(tmp_path)
+    expected = featurize_splits(TextFeaturizer(), TEXTS, "data-v1", [0.15, 0.15, 42], cache)
+    (entry,) = cache.cache_dir.iterdir()
+    (entry / "val.indices.npy").write_bytes(b"")
+    got = featurize_splits(TextFeaturizer(), TEXTS, "data-v1", [0.15, 0.15, 42], cache)
+    assert (got["val"] != expected["val"]).nnz == 0
@@ -0,0 +1,48 @@
+"""Import-time budget for inference entry points.
+
+Each import runs in a fresh interpreter so earlier tests cannot have loaded
+the heavy modules already.
+"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).parent.parent
+HEAVY = {"sklearn", "pandas", "scipy", "joblib"}
+# Generous: numpy alone is ~0.15s, anything dragging in sklearn is ~2s.
+IMPORT_BUDGET_SECONDS = 1.0
+
+PROBE = """
+import json, pathlib, sys, time
+mkdirs = []
+pathlib.Path.mkdir = lambda self, *args, **kwargs: mkdirs.append(str(self))
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "mkdirs": mkdirs,
+                  "modules": sorted({{m.split(".")[0] for m in sys.modules}})}}))
+"""
+
+
+def _probe(module):
+    out = subprocess.run([sys.executable, "-c", PROBE.format(module=module)], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    return json.loads(out)
+
+
+@pytest.mark.parametrize("module, allowed", [
+    ("src.spam_classifier", set()),
+    ("src.spam_classifier.cli", set()),
+    ("src.spam_classifier.pipeline", {"numpy"}),
+    ("src.spam_classifier.server", {"numpy"}),
+    ("src.spam_classifier.aio", {"numpy"}),
+])
+def test_inference_imports_stay_light(module, allowed):
+    result = _probe(module)
+    loaded = set(result["modules"]) & (HEAVY | {"numpy"})
+    assert loaded <= allowed, f"{module} imported {sorted(loaded - allowed)}"
+    assert result["seconds"] < IMPORT_BUDGET_SECONDS
+    assert result["mkdirs"] == [], "importing must not create directories"
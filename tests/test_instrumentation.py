@@ -0,0 +1,78 @@
+"""Test hot-path instrumentation and exporters."""
+import json
+
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from spam_classifier import instrumentation
+from spam_classifier.features import HashingTfidfVectorizer
+from spam_classifier.pipeline import get_registry, predict_texts, score_texts
+
+
+@pytest.fixture
+def metrics():
+    instrumentation.get_metrics().reset()
+    instrumentation.enable()
+    yield instrumentation
+    instrumentation.disable()
+    instrumentation.get_metrics().reset()
+
+
+def _pipe():
+    texts = ["free prize call now", "see you at dinner", "win cash now", "running late"]
+    return Pipeline([("tfidf", HashingTfidfVectorizer(n_bits=12)),
+                     ("clf", LogisticRegression())]).fit(texts, [1, 0, 1, 0])
+
+
+def test_disabled_records_nothing():
+    instrumentation.get_metrics().reset()
+    score_texts(["free prize"] * 40, _pipe())
+    snap = instrumentation.snapshot()
+    assert snap == {"counters": {}, "histograms": {}, "enabled": False}
+
+
+def test_stage_timers_and_counters(metrics):
+    pipe = _pipe()
+    score_texts(["free prize"] * 40, pipe)
+    score_texts(["hi"], pipe)
+    snap = metrics.snapshot()
+    assert snap["counters"]["batches"] == 2
+    assert snap["counters"]["messages"] == 41
+    assert snap["counters"]["fastpath_batches"] == 1
+    for stage in ("score", "featurize", "tokenize", "tfidf_weight", "classify", "fastpath"):
+        assert snap["histograms"][f"{stage}_seconds"]["count"] >= 1
+
+    text = metrics.prometheus_text()
+    assert "spam_classifier_messages_total 41" in text
+    assert 'spam_classifier_score_seconds_bucket{le="+Inf"} 2' in text
+
+
+class Broken:
+    pass
+
+
+def test_swallowed_errors_are_counted(metrics):
+    registry = get_registry()
+    registry.swap(Broken())
+    try:
+        assert predict_texts(["free prize"]) == ([0], [0.0])
+    finally:
+        registry.clear()
+    assert metrics.snapshot()["counters"]['swallowed_errors{error="TypeError"}'] == 1
+
+
+def test_periodic_exporter_writes_final_dump(metrics, tmp_path):
+    path = tmp_path / "metrics.json"
+    exporter = metrics.PeriodicExporter(metrics.json_file_exporter(path), interval=3600)
+    metrics.inc("messages", 5)
+    exporter.stop()
+    assert json.loads(path.read_text())["counters"]["messages"] == 5
+
+
+def test_histogram_quantiles():
+    hist = instrumentation.Histogram(buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 1.5, 1.5, 3.0):
+        hist.observe(value)
+    assert hist.quantile(0.5) == pytest.approx(1.5)
+    assert hist.to_dict()["buckets"] == {"1.0": 1, "2.0": 3, "4.0": 4, "+Inf": 4}
@@ -0,0 +1,77 @@
+"""Test incremental training from appended feedback."""
+from spam_classifier.online import OnlineTrainer
+from spam_classifier.artifact import export_pipeline, load_artifact
+from spam_classifier.registry import ModelRegistry
+
+HAM = "ham,see you at dinner tonight\nham,can you pick up milk on the way home\n"
+SPAM = "spam,free prize claim now call 0800\nspam,win cash free entry text now\n"
+
+
+def test_only_appended_rows_are_ingested(tmp_path):
+    feedback = tmp_path / "feedback.csv"
+    feedback.write_text(HAM + SPAM)
+    trainer = OnlineTrainer(tmp_path / "state", n_bits=12)
+    assert trainer.ingest([feedback]) == 4
+    assert trainer.ingest([feedback]) == 0
+
+    # A partially written trailing line is left for the next run.
+    with open(feedback, "a") as f:
+        f.write("spam,free cash prize now\nham,running la")
+    assert trainer.ingest([feedback]) == 1
+    with open(feedback, "a") as f:
+        f.write("te sorry\n")
+    assert trainer.ingest([feedback]) == 1
+    assert trainer.n_docs == 6
+
+
+def test_quoted_text_spanning_lines_is_consumed_whole(tmp_path):
+    feedback = tmp_path / "feedback.csv"
+    feedback.write_text(HAM + 'spam,"WIN cash\nreply ""YES"" now\nand')
+    trainer = OnlineTrainer(tmp_path / "state", n_bits=12)
+    # The open quote makes the cut a partial record, not two rows.
+    assert trainer.ingest([feedback]) == 2
+    with open(feedback, "a") as f:
+        f.write(' claim"\n' + SPAM)
+    assert trainer.ingest([feedback]) == 3
+    assert trainer.n_docs == 5
+
+
+def test_feedback_is_read_and_trained_in_batches(tmp_path, monkeypatch):
+    import sys
+
+    # Small blocks make records straddle reads.
+    monkeypatch.setattr(sys.modules[OnlineTrainer.__module__], "READ_SIZE", 16)
+    feedback = tmp_path / "feedback.csv"
+    feedback.write_text((HAM + SPAM) * 5)
+    trainer = OnlineTrainer(tmp_path / "state", n_bits=12)
+    assert trainer.ingest([feedback], batch_size=3) == 20
+    assert trainer.n_updates == 7
+    assert trainer.offsets[str(feedback.resolve())] == feedback.stat().st_size
+
+
+def test_checkpoint_round_trip(tmp_path):
+    feedback = tmp_path / "feedback.csv"
+    feedback.write_text(HAM + SPAM)
+    trainer = OnlineTrainer(tmp_path / "state", n_bits=12)
+    trainer.ingest([feedback])
+    trainer.save()
+
+    resumed = OnlineTrainer.load(tmp_path / "state")
+    assert resumed.n_docs == 4
+    assert resumed.ingest([feedback]) == 0
+    texts = ["free prize call now", "see you at dinner"]
+    assert (resumed.to_pipeline().predict_proba(texts)
+            == trainer.to_pipeline().predict_proba(texts)).all()
+
+
+def test_publish_through_registry(tmp_path):
+    feedback = tmp_path / "feedback.csv"
+    feedback.write_text((HAM + SPAM) * 5)
+    trainer = OnlineTrainer(tmp_path / "state", n_bits=12)
+    trainer.ingest([feedback])
+
+    registry = ModelRegistry(tmp_path / "model.spm", loader=load_artifact, dumper=export_pipeline)
+    version = trainer.publish(registry)
+    model, active = registry.get_versioned()
+    assert active == version == trainer.published_version
+    assert list(model.predict(["free cash prize now", "see you at dinner"])) == [1, 0]
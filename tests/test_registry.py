@@ -0,0 +1,77 @@
+"""Test the in-memory model registry."""
+import os
+import pickle
+import threading
+
+import pytest
+
+from spam_classifier.registry import ModelRegistry
+
+
+def _pickle_dump(obj, path):
+    with open(path, "wb") as f:
+        pickle.dump(obj, f)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    calls = []
+
+    def loader(path):
+        calls.append(path)
+        if not path.exists():
+            return "fallback"
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    reg = ModelRegistry(tmp_path / "model.pkl", loader=loader, dumper=_pickle_dump)
+    reg.calls = calls
+    return reg
+
+
+def test_lazy_load_is_cached(registry):
+    _pickle_dump({"v": 1}, registry.path)
+    assert registry.get() == {"v": 1}
+    assert registry.get() == {"v": 1}
+    assert len(registry.calls) == 1
+
+
+def test_reload_only_when_content_changes(registry):
+    _pickle_dump({"v": 1}, registry.path)
+    registry.get()
+    # Same content, new mtime: hash matches so no reload.
+    st = os.stat(registry.path)
+    os.utime(registry.path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    registry.get()
+    assert len(registry.calls) == 1
+
+    _pickle_dump({"v": 2}, registry.path)
+    st = os.stat(registry.path)
+    os.utime(registry.path, ns=(st.st_atime_ns, st.st_mtime_ns + 2 * 10**9))
+    assert registry.get() == {"v": 2}
+    assert len(registry.calls) == 2
+
+
+def test_publish_and_swap(registry):
+    assert registry.get() == "fallback"
+    version = registry.publish({"v": 3})
+    assert registry.path.exists()
+    assert registry.version == version
+    assert registry.get() == {"v": 3}
+    assert len(registry.calls) == 1  # publish does not trigger a reload
+
+    registry.swap({"v": 4}, version="candidate")
+    assert registry.get() == {"v": 4}
+    assert registry.version == "candidate"
+
+
+def test_concurrent_get_loads_once(registry):
+    _pickle_dump({"v": 1}, registry.path)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == [{"v": 1}] * 8
+    assert len(registry.calls) == 1
@@ -0,0 +1,190 @@
+"""Test the micro-batching scoring service."""
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+
+from spam_classifier import instrumentation
+from spam_classifier.model import ScoreResult
+from spam_classifier.pipeline import disable_prediction_cache, enable_prediction_cache
+from spam_classifier.server import MicroBatcher, make_server
+
+
+def fake_score(texts):
+    labels = np.array([1 if "free" in t else 0 for t in texts])
+    return ScoreResult(labels, labels * 0.9, labels - 0.5)
+
+
+def test_concurrent_requests_share_batches():
+    batch_sizes = []
+
+    def score_fn(texts):
+        batch_sizes.append(len(texts))
+        return fake_score(texts)
+
+    batcher = MicroBatcher(score_fn, max_batch_size=64, max_wait_ms=50)
+    futures = [batcher.submit([f"free {i}", f"hi {i}"]) for i in range(10)]
+    results = [f.result(timeout=5) for f in futures]
+    batcher.close()
+
+    assert [list(r.labels) for r in results] == [[1, 0]] * 10
+    assert sum(batch_sizes) == 20
+    assert len(batch_sizes) < 10
+    assert batcher.snapshot()["requests"] == 10
+
+
+def test_batch_size_is_capped():
+    batch_sizes = []
+    batcher = MicroBatcher(lambda t: batch_sizes.append(len(t)) or fake_score(t),
+                           max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit(["free"]) for _ in range(12)]
+    for f in futures:
+        f.result(timeout=5)
+    batcher.close()
+    assert max(batch_sizes) <= 4
+
+
+def test_multi_text_requests_never_overflow_the_cap():
+    batch_sizes = []
+    batcher = MicroBatcher(lambda t: batch_sizes.append(len(t)) or fake_score(t),
+                           max_batch_size=5, max_wait_ms=50)
+    requests = [[f"free {i}", f"hi {i}", f"free again {i}"] for i in range(6)]
+    futures = [batcher.submit(texts) for texts in requests]
+    results = [f.result(timeout=5) for f in futures]
+    batcher.close()
+
+    assert max(batch_sizes) <= 5
+    assert sum(batch_sizes) == 18
+    assert [list(r.labels) for r in results] == [[1, 0, 1]] * 6
+
+
+def test_oversized_request_is_scored_in_capped_slices():
+    batch_sizes = []
+    batcher = MicroBatcher(lambda t: batch_sizes.append(len(t)) or fake_score(t),
+                           max_batch_size=4, max_wait_ms=1)
+    texts = [f"free {i}" if i % 3 == 0 else f"hi {i}" for i in range(10)]
+    result = batcher.score(texts, timeout=5)
+    batcher.close()
+
+    assert max(batch_sizes) <= 4 and sum(batch_sizes) == 10
+    assert list(result.labels) == list(fake_score(texts).labels)
+    assert len(result.probabilities) == len(result.margins) == 10
+    assert batcher.snapshot()["requests"] == 1
+
+
+def test_failed_slice_fails_the_whole_request():
+    def score_fn(texts):
+        if "boom" in texts:
+            raise RuntimeError("boom")
+        return fake_score(texts)
+
+    batcher = MicroBatcher(score_fn, max_batch_size=2, max_wait_ms=1)
+    with pytest.raises(RuntimeError):
+        batcher.score(["free", "hi", "boom"], timeout=5)
+    batcher.close()
+
+
+@pytest.fixture
+def server():
+    srv = make_server("127.0.0.1", 0, batcher=MicroBatcher(fake_score, max_wait_ms=1))
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{srv.server_port}"
+    srv.shutdown()
+    srv.server_close()
+    srv.batcher.close()
+
+
+def _post(url, payload):
+    req = urllib.request.Request(url, data=json.dumps(payload).encode(), method="POST",
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req) as resp:
+        return json.loads(resp.read())
+
+
+def test_health_reports_the_model_version_before_any_scoring(server, tmp_path, monkeypatch):
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    from spam_classifier.artifact import export_pipeline
+    from spam_classifier.features import build_vectorizer
+    from spam_classifier.pipeline import get_registry
+    from spam_classifier.registry import file_digest
+
+    texts, labels = ["free prize now", "see you soon"], [1, 0]
+    vectorizer = build_vectorizer("tfidf", max_df=1.0).fit(texts)
+    pipe = Pipeline([("tfidf", vectorizer),
+                     ("clf", LogisticRegression().fit(vectorizer.transform(texts), labels))])
+    export_pipeline(pipe, tmp_path / "pipeline.spm")
+    registry = get_registry()
+    monkeypatch.setattr(registry, "path", tmp_path / "pipeline.spm")
+    monkeypatch.setattr(registry, "fallback_paths", ())
+    registry.clear()
+    try:
+        with urllib.request.urlopen(server + "/health") as resp:
+            health = json.loads(resp.read())
+    finally:
+        registry.clear()
+    assert health["model_version"] == file_digest(tmp_path / "pipeline.spm")
+
+
+def test_http_endpoints(server):
+    assert _post(server + "/score", {"text": "free prize"})["label"] == "SPAM"
+    batch = _post(server + "/score", {"texts": ["free prize", "hello"]})
+    assert [r["label"] for r in batch["results"]] == ["SPAM", "HAM"]
+
+    with urllib.request.urlopen(server + "/health") as resp:
+        assert json.loads(resp.read())["status"] == "ok"
+    with urllib.request.urlopen(server + "/metrics") as resp:
+        assert json.loads(resp.read())["messages"] == 3
+    with urllib.request.urlopen(server + "/metrics/prometheus") as resp:
+        assert "spam_classifier_batcher_messages 3" in resp.read().decode().splitlines()
+
+    with pytest.raises(urllib.error.HTTPError) as err:
+        _post(server + "/score", {"nope": 1})
+    assert err.value.code == 400
+
+
+def _metric_families(text):
+    """``{family: type}`` of an exposition; fails on a family declared twice."""
+    families = {}
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split()
+            # OpenMetrics: counter samples carry a _total suffix on the family name.
+            family = name[:-len("_total")] if kind == "counter" else name
+            assert family not in families, f"{family} is both {families[family]} and {kind}"
+            families[family] = kind
+    suffixes = {"counter": ("_total",), "histogram": ("_bucket", "_sum", "_count"),
+                "gauge": ("",)}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            sample = line.split("{")[0].split()[0]
+            owners = [family for family, kind in families.items()
+                      if any(sample == family + suffix for suffix in suffixes[kind])]
+            assert len(owners) == 1, f"{sample} belongs to {owners}"
+    return families
+
+
+def test_prometheus_families_are_unique(server):
+    enable_prediction_cache()
+    instrumentation.get_metrics().reset()
+    instrumentation.enable()
+    try:
+        # The counters and histograms that scoring records, next to the gauges.
+        for name in ("messages", "batches", "shadow_messages"):
+            instrumentation.inc(name, 3)
+        with instrumentation.timer("score"):
+            _post(server + "/score", {"texts": ["free prize", "hello", "hi"]})
+        with urllib.request.urlopen(server + "/metrics/prometheus") as resp:
+            families = _metric_families(resp.read().decode())
+    finally:
+        instrumentation.disable()
+        instrumentation.get_metrics().reset()
+        disable_prediction_cache()
+    assert families["spam_classifier_messages"] == "counter"
+    assert families["spam_classifier_batcher_messages"] == "gauge"
+    assert families["spam_classifier_batcher_cache_hits"] == "gauge"
@@ -0,0 +1,148 @@
+"""Test shadow scoring of candidate models."""
+import copy
+import json
+
+import numpy as np
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from spam_classifier import instrumentation
+from spam_classifier.artifact import export_pipeline, load_artifact
+from spam_classifier.features import build_vectorizer
+from spam_classifier.pipeline import (
+    disable_cascade, disable_shadow, enable_cascade, enable_shadow, get_registry,
+    get_shadow_stats, load_pipeline, score_texts,
+)
+from spam_classifier.shadow import ShadowScorer, featurizer_fingerprint
+
+TEXTS = ["free prize call now", "see you at dinner", "win free cash now", "running late sorry",
+         "claim your free prize", "ok see you soon", "call now to win", "dinner was great"]
+LABELS = [1, 0, 1, 0, 1, 0, 1, 0]
+QUERY = TEXTS + ["free dinner prize now", "see you soon ok", "", "unknown words only"]
+
+
+def _pipeline(C=1.0, vectorizer=None):
+    vectorizer = vectorizer or build_vectorizer("tfidf", max_df=1.0).fit(TEXTS)
+    clf = LogisticRegression(C=C).fit(vectorizer.transform(TEXTS), LABELS)
+    return Pipeline([("tfidf", vectorizer), ("clf", clf)])
+
+
+@pytest.mark.parametrize("query", [QUERY, QUERY * 3], ids=["fastpath", "matrix"])
+def test_shared_featurizer_is_one_group_and_matches_each_model(tmp_path, query):
+    primary = _pipeline(C=10)
+    candidate = _pipeline(C=0.01, vectorizer=copy.deepcopy(primary.named_steps["tfidf"]))
+    export_pipeline(candidate, tmp_path / "candidate.spm")
+    mapped = load_artifact(tmp_path / "candidate.spm")
+    scorer = ShadowScorer(primary, {"candidate": candidate, "mapped": mapped})
+
+    # The artifact keeps the same columns and IDF, so all three share one pass.
+    assert len(scorer.groups) == 1
+    results = scorer.score_all(query)
+    np.testing.assert_allclose(results["primary"].probabilities, primary.predict_proba(query)[:, 1])
+    np.testing.assert_allclose(results["candidate"].probabilities,
+                               candidate.predict_proba(query)[:, 1])
+    np.testing.assert_allclose(results["mapped"].probabilities, results["candidate"].probabilities)
+    # The primary's own matrix is reused for candidates sharing its featurizer.
+    shared = scorer.score_candidates(query, primary.named_steps["tfidf"].transform(query))
+    np.testing.assert_allclose(shared["mapped"].probabilities, results["mapped"].probabilities)
+
+
+def test_batch_without_known_terms_scores_the_intercept():
+    primary, candidate = _pipeline(C=10), _pipeline(C=0.01)
+    scorer = ShadowScorer(primary, {"candidate": candidate})
+    result = scorer.score_all(["unknown words only"])["candidate"]
+    np.testing.assert_allclose(result.margins, candidate.named_steps["clf"].intercept_)
+
+
+def test_fingerprint_tells_featurizers_apart():
+    vectorizer = build_vectorizer("tfidf", max_df=1.0).fit(TEXTS)
+    assert featurizer_fingerprint(vectorizer) == featurizer_fingerprint(copy.deepcopy(vectorizer))
+    other = build_vectorizer("tfidf", max_df=1.0).fit(TEXTS[:6])
+    assert featurizer_fingerprint(vectorizer) != featurizer_fingerprint(other)
+
+
+def test_score_returns_primary_and_logs_disagreements(tmp_path):
+    primary = _pipeline(C=10)
+    # Flipped coefficients disagree with the primary on every message.
+    flipped = copy.deepcopy(primary)
+    flipped.named_steps["clf"].coef_ = -flipped.named_steps["clf"].coef_
+    flipped.named_steps["clf"].intercept_ = -flipped.named_steps["clf"].intercept_
+    log_path = tmp_path / "shadow.jsonl"
+    scorer = ShadowScorer(primary, {"flipped": flipped}, log_path=log_path, primary_version="v1")
+
+    instrumentation.get_metrics().reset()
+    instrumentation.enable()
+    try:
+        result = scorer.score(TEXTS)
+        counters = instrumentation.snapshot()["counters"]
+    finally:
+        instrumentation.disable()
+        instrumentation.get_metrics().reset()
+
+    assert result.labels.tolist() == primary.predict(TEXTS).tolist()
+    assert scorer.stats()["disagreements"] == {"flipped": len(TEXTS)}
+    assert counters['shadow_disagreements{model="flipped"}'] == len(TEXTS)
+    records = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert len(records) == len(TEXTS)
+    assert records[0]["model"] == "flipped" and records[0]["primary_version"] == "v1"
+    assert records[0]["primary"]["label"] != records[0]["candidate"]["label"]
+
+
+def test_primary_name_is_reserved():
+    with pytest.raises(ValueError, match="reserved"):
+        ShadowScorer(_pipeline(), {"primary": _pipeline()})
+
+
+def test_failing_shadow_never_changes_the_served_response(tmp_path, monkeypatch):
+    candidate = _pipeline()
+    export_pipeline(candidate, tmp_path / "candidate.spm")
+    fallback = load_pipeline(tmp_path / "missing.spm")
+    registry = get_registry()
+    registry.swap(fallback)
+    enable_shadow({"candidate": tmp_path / "candidate.spm"})
+    instrumentation.get_metrics().reset()
+    instrumentation.enable()
+    try:
+        # A non-linear primary (the HAM fallback) is served as without shadow.
+        result = score_texts(TEXTS)
+        assert result.labels.tolist() == [0] * len(TEXTS)
+        assert get_shadow_stats()["disagreements"]["candidate"] == 4
+
+        # A shadow failure is counted once and shadowing stops for this model.
+        calls = []
+
+        def broken(self, texts, primary, features=None):
+            calls.append(len(texts))
+            raise RuntimeError("candidate exploded")
+
+        monkeypatch.setattr(ShadowScorer, "compare", broken)
+        disable_shadow()
+        enable_shadow({"candidate": tmp_path / "candidate.spm"})
+        for _ in range(2):
+            assert score_texts(TEXTS).labels.tolist() == [0] * len(TEXTS)
+        counters = instrumentation.snapshot()["counters"]
+    finally:
+        instrumentation.disable()
+        instrumentation.get_metrics().reset()
+        disable_shadow()
+        registry.clear()
+    assert calls == [len(TEXTS)]
+    assert counters['shadow_errors{error="RuntimeError"}'] == 1
+
+
+def test_shadow_and_cascade_cannot_both_be_enabled(tmp_path):
+    export_pipeline(_pipeline(), tmp_path / "candidate.spm")
+    try:
+        enable_cascade()
+        with pytest.raises(ValueError, match="cascade"):
+            enable_shadow({"candidate": tmp_path / "candidate.spm"})
+        assert get_shadow_stats() is None
+        disable_cascade()
+
+        enable_shadow({"candidate": tmp_path / "candidate.spm"})
+        with pytest.raises(ValueError, match="[Ss]hadow"):
+            enable_cascade()
+    finally:
+        disable_cascade()
+        disable_shadow()
@@ -0,0 +1,92 @@
+"""Test the out-of-core streaming dataset."""
+import json
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from spam_classifier.artifact import export_pipeline, load_artifact
+from spam_classifier.online import OnlineTrainer
+from spam_classifier.registry import ModelRegistry
+from spam_classifier.streaming import StratifiedSplitter, StreamingDataset
+from spam_classifier.training import train_model
+
+
+def _raw_csv(path, n=200):
+    rows = [f"spam,FREE prize {i} call now" if i % 4 == 0 else f"ham,  See you at {i} "
+            for i in range(n)]
+    path.write_text("\n".join(rows) + "\n")
+    return path
+
+
+def test_headerless_csv_chunks_and_splits(tmp_path):
+    dataset = StreamingDataset(_raw_csv(tmp_path / "raw.csv"), chunk_size=30)
+    chunks = list(dataset.chunks())
+    assert max(len(c) for c in chunks) == 30
+    df = pd.concat(chunks)
+    assert len(df) == 200 and df["label"].sum() == 50
+    assert df["text"].iloc[1] == "see you at 1"
+
+    by_split = {s: pd.concat(dataset.chunks(s)) for s in ("train", "val", "test")}
+    assert sum(len(part) for part in by_split.values()) == 200
+    assert 0.6 < len(by_split["train"]) / 200 < 0.8
+    # Deterministic: a second pass assigns the same rows.
+    assert list(pd.concat(dataset.chunks("val"))["text"]) == list(by_split["val"]["text"])
+    # Stratified: each class is split in proportion, to within one message.
+    for label, n in ((1, 50), (0, 150)):
+        n_test = (by_split["test"]["label"] == label).sum()
+        n_val = (by_split["val"]["label"] == label).sum()
+        assert n_test in (math.floor(n * 0.15), math.ceil(n * 0.15))
+        assert abs(n_val - n * 0.15) <= 1
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 1000])
+def test_splitter_is_exact_per_class_whatever_the_chunking(chunk):
+    rng = np.random.default_rng(0)
+    labels = (rng.random(1000) < 0.1).astype(int)
+    splitter = StratifiedSplitter(test_size=0.2, val_size=0.1, seed=3)
+    split = np.concatenate([splitter.assign(labels[i:i + chunk])
+                            for i in range(0, len(labels), chunk)])
+    for label in (0, 1):
+        n = (labels == label).sum()
+        assert abs((split[labels == label] == 2).sum() - 0.2 * n) <= 1
+        assert abs((split[labels == label] == 1).sum() - 0.1 * n) <= 1
+    again = StratifiedSplitter(test_size=0.2, val_size=0.1, seed=3).assign(labels)
+    assert np.array_equal(split, again)
+
+
+def test_jsonl_with_header_and_numeric_labels(tmp_path):
+    path = tmp_path / "mail.jsonl"
+    with open(path, "w") as f:
+        for i in range(20):
+            f.write(json.dumps({"class": i % 2, "body": f"Message {i}"}) + "\n")
+    df = pd.concat(StreamingDataset(path, chunk_size=7).chunks())
+    assert list(df["label"]) == [i % 2 for i in range(20)]
+    assert df["text"].iloc[3] == "message 3"
+
+
+def test_online_trainer_fits_stream(tmp_path):
+    dataset = StreamingDataset(_raw_csv(tmp_path / "raw.csv"), chunk_size=50)
+    trainer = OnlineTrainer(tmp_path / "state", n_bits=12)
+    rows = trainer.fit_stream(dataset)
+    assert rows == trainer.n_docs == len(pd.concat(dataset.chunks("train")))
+    assert trainer.evaluate_chunks(dataset.chunks("val"))["accuracy"] == 1.0
+
+
+def test_train_model_streams_a_corpus(tmp_path):
+    dataset = StreamingDataset(_raw_csv(tmp_path / "raw.csv"), chunk_size=40)
+    registry = ModelRegistry(tmp_path / "models" / "pipeline.spm", loader=load_artifact,
+                             dumper=export_pipeline)
+    result = train_model(corpus=dataset, n_bits=12, registry=registry, n_resamples=50,
+                         model_path=tmp_path / "models" / "pipeline.joblib",
+                         results_dir=tmp_path / "results")
+
+    saved = json.loads((tmp_path / "results" / "metrics.json").read_text())
+    assert saved["model_version"] == result.version == registry.get_versioned()[1]
+    assert saved["params"]["backend"] == "hashing"
+    assert saved["params"]["n_train"] == len(pd.concat(dataset.chunks("train")))
+    assert saved["val"]["accuracy"] == 1.0
+    assert result.pipeline.predict(["free prize 7 call now", "see you at 9"]).tolist() == [1, 0]
+    with pytest.raises(ValueError, match="cascade"):
+        train_model(corpus=dataset, cascade=True, registry=registry)
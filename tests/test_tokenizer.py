@@ -0,0 +1,75 @@
+"""Test the shared tokenizer against sklearn's analyzer."""
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from spam_classifier.artifact import export_pipeline, load_artifact
+from spam_classifier.features import TokenizedTfidfVectorizer
+from spam_classifier.tokenizer import Tokenizer, tokenizer_for
+
+DOCS = [
+    "FREE entry to win a prize, call now",
+    "see you at the game tonight",
+    "",
+    "x",
+    "Call CALL call me maybe",
+    "Héllo ΣΑΣ naïve café café",
+    "win win win a free prize now",
+]
+
+
+@pytest.mark.parametrize("params", [
+    {"ngram_range": (1, 2)},
+    {"ngram_range": (1, 1), "sublinear_tf": True},
+    {"ngram_range": (2, 2)},
+    {"ngram_range": (1, 2), "min_df": 2},
+    {"ngram_range": (1, 2), "lowercase": False, "max_features": 8},
+])
+def test_matches_tfidf_vectorizer(params):
+    expected = TfidfVectorizer(**params)
+    actual = TokenizedTfidfVectorizer(**params)
+    X_expected, X_actual = expected.fit_transform(DOCS), actual.fit_transform(DOCS)
+    assert actual.vocabulary_ == expected.vocabulary_
+    assert (X_expected != X_actual).nnz == 0
+    query = ["call now for a free prize", "unseen words only", "café"]
+    assert (expected.transform(query) != actual.transform(query)).nnz == 0
+
+
+def test_analyze_and_unsupported_settings():
+    sklearn_analyze = TfidfVectorizer(ngram_range=(1, 2)).build_analyzer()
+    for doc in DOCS:
+        assert Tokenizer().analyze(doc) == sklearn_analyze(doc)
+    assert tokenizer_for({"ngram_range": (1, 3)}) is None
+    assert tokenizer_for({"stop_words": "english"}) is None
+    assert tokenizer_for({"analyzer": "char"}) is None
+    # Falls back to sklearn for settings the tokenizer does not cover.
+    trigram = TokenizedTfidfVectorizer(ngram_range=(1, 3)).fit(DOCS)
+    assert "win win win" in trigram.vocabulary_
+
+
+def test_count_looks_up_each_term_once_in_first_seen_order():
+    calls = []
+
+    def lookup(term):
+        calls.append(term)
+        return -1 if term == "win" else len(calls)
+
+    values, indices, indptr = Tokenizer().count(["win a prize win a prize", "a prize"], lookup)
+    assert calls == ["win", "prize", "win prize", "prize win"]
+    assert list(indptr) == [0, 3, 4]
+    assert list(indices) == [2, 3, 4, 2]
+    assert list(values) == [2, 2, 1, 1]
+
+
+def test_mapped_artifact_uses_tokenizer(tmp_path):
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2))
+    X = vectorizer.fit_transform(DOCS)
+    pipe = Pipeline([("tfidf", vectorizer),
+                     ("clf", LogisticRegression().fit(X, np.arange(len(DOCS)) % 2))])
+    export_pipeline(pipe, tmp_path / "model.spm")
+    mapped = load_artifact(tmp_path / "model.spm").steps[0][1]
+    assert mapped._tokenizer is not None
+    query = DOCS + ["FREE prize tonight"]
+    assert (mapped.transform(query) != vectorizer.transform(query)).nnz == 0
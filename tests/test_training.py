@@ -0,0 +1,55 @@
+"""Test the shared training engine."""
+import json
+
+import joblib
+
+from spam_classifier import instrumentation
+from spam_classifier.artifact import export_pipeline, load_artifact
+from spam_classifier.data import SpamDataset
+from spam_classifier.registry import ModelRegistry, file_digest
+from spam_classifier.training import train_model
+
+ROWS = ["ham,See you at dinner tonight", "spam,FREE prize call now to claim",
+        "ham,Running late for the meeting", "spam,Win cash now text WIN to claim",
+        "ham,ok thanks see you soon"] * 12
+
+
+def _setup(tmp_path):
+    (tmp_path / "data" / "raw").mkdir(parents=True)
+    (tmp_path / "data" / "raw" / "sms_spam_no_header.csv").write_text("\n".join(ROWS) + "\n")
+    registry = ModelRegistry(tmp_path / "models" / "pipeline.spm", loader=load_artifact,
+                             dumper=export_pipeline)
+    return SpamDataset(tmp_path / "data"), registry
+
+
+def test_trains_once_and_publishes_artifact_and_metrics(tmp_path):
+    dataset, registry = _setup(tmp_path)
+    result = train_model(max_features=50, dataset=dataset, registry=registry,
+                         model_path=tmp_path / "models" / "pipeline.joblib",
+                         results_dir=tmp_path / "results")
+
+    metrics = json.loads((tmp_path / "results" / "metrics.json").read_text())
+    assert metrics["model_version"] == result.version == registry.version
+    assert result.version == file_digest(tmp_path / "models" / "pipeline.spm")
+    assert set(metrics) >= {"train", "val", "test", "params"}
+    assert metrics["params"]["max_features"] == 50
+    assert registry.get() is result.pipeline
+    pickled = joblib.load(tmp_path / "models" / "pipeline.joblib")
+    assert list(pickled.predict(["free prize call now"])) == [1]
+
+
+def test_retrain_with_new_classifier_settings_reuses_features(tmp_path):
+    dataset, registry = _setup(tmp_path)
+    kwargs = dict(max_features=50, dataset=dataset, registry=registry,
+                  model_path=tmp_path / "pipeline.joblib", results_dir=tmp_path / "results")
+    first = train_model(C=1.0, **kwargs)
+    instrumentation.get_metrics().reset()
+    instrumentation.enable()
+    try:
+        second = train_model(C=10.0, **kwargs)
+        counters = instrumentation.snapshot()["counters"]
+    finally:
+        instrumentation.disable()
+        instrumentation.get_metrics().reset()
+    assert counters == {f'feature_cache_hits{{split="{s}"}}': 1 for s in ("train", "val", "test")}
+    assert second.version != first.version
@@ -1,11 +1,17 @@
 import streamlit as st
 from pathlib import Path
 import json
+import os
+import tempfile
 from typing import List, Tuple
 
 import pandas as pd
 
-from src.spam_classifier.pipeline import load_pipeline, train_and_save_pipeline, predict_texts
+from src.spam_classifier.pipeline import (
+    get_pipeline, has_trained_model, predict_texts, train_and_save_pipeline,
+)
+from src.spam_classifier.batch import score_file
+from src.spam_classifier.explain import explainer_for
 
 
 st.set_page_config(page_title="2025 Spam Email Demo", layout="centered")
@@ -23,16 +29,17 @@ Tips:
 )
 
 
-@st.cache_resource
 def get_or_train_pipeline():
-    """Load an existing pipeline or train and save a new one.
+    """Load the published pipeline, training one only if none exists yet.
 
-    Cached so the model isn't reloaded or retrained on every interaction.
+    The process-wide model registry keeps the pipeline in memory and only
+    reloads it when the artifact on disk changes, so no Streamlit cache is
+    needed (and a retrained model is picked up without a restart). A model
+    published by ``cli train`` is served as is, never retrained here.
     """
-    pipe = load_pipeline()
-    if pipe is None:
-        pipe = train_and_save_pipeline()
-    return pipe
+    if not has_trained_model():
+        return train_and_save_pipeline()
+    return get_pipeline()
 
 
 def safe_predict(texts: List[str]) -> Tuple[List[int], List[float]]:
@@ -49,22 +56,24 @@ def safe_predict(texts: List[str]) -> Tuple[List[int], List[float]]:
 def top_positive_tokens(pipe, n: int = 15) -> List[Tuple[str, float]]:
     """Return top tokens that increase the spam score (token, weight).
 
-    Works with a Pipeline containing a TfidfVectorizer named 'tfidf' and a linear 'clf'.
+    Uses the per-model explanation index, so the vocabulary is sorted once
+    per model version rather than on every click.
     """
     try:
-        tfidf = pipe.named_steps.get("tfidf")
-        clf = pipe.named_steps.get("clf")
-        if tfidf is None or clf is None:
-            return []
-        feature_names = list(tfidf.get_feature_names_out())
-        coefs = clf.coef_[0]
-        pairs = list(zip(feature_names, coefs))
-        pairs.sort(key=lambda x: x[1], reverse=True)
-        return pairs[:n]
-    except Exception:
+        return explainer_for(pipe).top_tokens(n, label="spam")
+    except ValueError:
         return []
 
 
+def message_tokens(text: str, n: int = 10):
+    """Tokens of ``text`` that pushed it towards spam and towards ham."""
+    try:
+        explanation = explainer_for(get_or_train_pipeline()).explain([text], k=n)[0]
+    except ValueError:
+        return [], []
+    return explanation.spam_tokens, explanation.ham_tokens
+
+
 # Do not load/train the model at import time on startup.
 # get_or_train_pipeline() is called lazily by prediction helpers so the
 # app can start even if training data or models are not yet available.
@@ -73,6 +82,9 @@ model = None
 
 st.sidebar.header("Demo options")
 show_metrics = st.sidebar.checkbox("Show baseline metrics (if available)", value=True)
+if st.sidebar.checkbox("Show top spam tokens (global weights)", value=False):
+    tokens = top_positive_tokens(get_or_train_pipeline(), n=15)
+    st.sidebar.write(", ".join([f"{t} ({w:.2f})" for t, w in tokens]) or "Not available for this model")
 
 # Example quick buttons
 examples = [
@@ -113,13 +125,14 @@ with col1:
             except Exception:
                 pass
 
-            # show top tokens if available
-            tokens = top_positive_tokens(model, n=10)
-            if tokens:
-                st.markdown("**Top tokens that indicate SPAM (approx):**")
-                st.write(
-                    ", ".join([f"{t} ({w:.2f})" for t, w in tokens[:10]])
-                )
+            # show this message's own token contributions (tf-idf x weight)
+            spam_tokens, ham_tokens = message_tokens(text, n=10)
+            if spam_tokens:
+                st.markdown("**Tokens in this message that indicate SPAM:**")
+                st.write(", ".join([f"{t} (+{w:.2f})" for t, w in spam_tokens]))
+            if ham_tokens:
+                st.markdown("**Tokens in this message that indicate HAM:**")
+                st.write(", ".join([f"{t} ({w:.2f})" for t, w in ham_tokens]))
 
             # model info (if present)
             try:
@@ -136,26 +149,22 @@ with col2:
     st.subheader("Batch upload")
     uploaded = st.file_uploader("Upload a CSV with a `text` column (or `message`)", type=["csv"]) 
     if uploaded:
+        # Stream the upload through the chunked scorer into a temp file so
+        # large exports never have to fit in memory at once.
+        fd, out_name = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+        out_path = Path(out_name)
         try:
-            df = pd.read_csv(uploaded)
+            with st.spinner("Classifying batch..."):
+                stats = score_file(uploaded, out_path, input_format="csv", pipe=get_or_train_pipeline())
+            st.dataframe(pd.read_csv(out_path, nrows=50))
+            st.caption(f"Scored {stats['rows']} rows ({stats['rows_per_sec']:.0f} rows/s)")
+            with open(out_path, "rb") as f:
+                st.download_button("Download predictions CSV", f, file_name="predictions.csv")
         except Exception as e:
-            st.error(f"Couldn't read CSV: {e}")
-            df = None
-
-        if df is not None:
-            # try common column names
-            col_candidates = [c for c in df.columns if c.lower() in ("text", "message", "body")]
-            if not col_candidates:
-                st.error("CSV must contain a 'text' or 'message' column")
-            else:
-                text_col = col_candidates[0]
-                with st.spinner("Classifying batch..."):
-                    preds, probs = safe_predict(df[text_col].astype(str).tolist())
-                df["pred"] = ["SPAM" if p == 1 else "HAM" for p in preds]
-                df["spam_prob"] = probs
-                st.dataframe(df.head(50))
-                csv_bytes = df.to_csv(index=False).encode("utf-8")
-                st.download_button("Download predictions CSV", csv_bytes, file_name="predictions.csv")
+            st.error(f"Couldn't score CSV: {e}")
+        finally:
+            out_path.unlink(missing_ok=True)
 
     # provide an example CSV for users to download and try locally
     example_df = pd.DataFrame({